@@ -3,17 +3,21 @@ Controller de Consultas - rotas HTTP
 """
 
 from typing import List
-from datetime import datetime
-from fastapi import APIRouter, HTTPException, Query, status
+from datetime import datetime, date
+from fastapi import APIRouter, HTTPException, Query, Response, status
 
 from app.schemas.consulta_schema import (
     ConsultaCreate, 
     ConsultaUpdate, 
     ConsultaResponse,
-    ConsultaDetalhada
+    ConsultaDetalhada,
+    DisponibilidadeMedico,
+    HorarioLivre
 )
+from app.models.db_models import StatusConsulta
 from app.services.consulta_service import ConsultaService
 from app.infra.logger import get_logger
+from app.infra.paginacao import CABECALHO_CURSOR
 
 logger = get_logger(__name__)
 router = APIRouter()
@@ -22,21 +26,93 @@ service = ConsultaService()
 
 @router.get("/consultas", response_model=List[ConsultaResponse])
 async def listar_consultas(
+    response: Response,
     apenas_agendadas: bool = Query(False, description="Apenas consultas agendadas"),
     paciente_id: str = Query(None, description="Filtrar por paciente"),
-    medico_id: str = Query(None, description="Filtrar por médico")
+    medico_id: str = Query(None, description="Filtrar por médico"),
+    limit: int = Query(None, ge=1, description="Itens por página"),
+    after: str = Query(None, description="Cursor da página anterior (X-Next-Cursor)")
 ):
-    """Lista consultas com filtros opcionais"""
-    if paciente_id:
-        consultas = await service.listar_por_paciente(paciente_id)
-    elif medico_id:
-        consultas = await service.listar_por_medico(medico_id)
-    elif apenas_agendadas:
-        consultas = await service.listar_agendadas()
-    else:
-        consultas = await service.listar_todas()
+    """
+    Lista consultas com filtros opcionais, paginadas por cursor
+    Ordem: data/hora; o cursor da próxima página vem no cabeçalho X-Next-Cursor
+    """
+    pagina = await service.listar_pagina(
+        limit,
+        after,
+        paciente_id=paciente_id,
+        medico_id=medico_id,
+        apenas_agendadas=apenas_agendadas
+    )
+    if pagina.proximo_cursor:
+        response.headers[CABECALHO_CURSOR] = pagina.proximo_cursor
     
-    return [ConsultaResponse(**c.to_dict()) for c in consultas]
+    return [ConsultaResponse(**c.to_dict()) for c in pagina.itens]
+
+
+@router.get("/consultas/detalhadas", response_model=List[ConsultaDetalhada])
+async def listar_consultas_detalhadas(
+    response: Response,
+    paciente_id: str = Query(None, description="Filtrar por paciente"),
+    medico_id: str = Query(None, description="Filtrar por médico"),
+    status_consulta: StatusConsulta = Query(None, alias="status", description="Filtrar por status"),
+    data_inicio: date = Query(None, description="Data inicial (YYYY-MM-DD)"),
+    data_fim: date = Query(None, description="Data final (YYYY-MM-DD)"),
+    limit: int = Query(None, ge=1, description="Itens por página"),
+    after: str = Query(None, description="Cursor da página anterior (X-Next-Cursor)")
+):
+    """
+    Lista consultas com nomes do paciente e do médico
+    Substitui uma chamada a /consultas/{consulta_id} por linha
+    """
+    pagina = await service.listar_detalhadas(
+        limit,
+        after,
+        paciente_id=paciente_id,
+        medico_id=medico_id,
+        status=status_consulta,
+        data_inicio=data_inicio,
+        data_fim=data_fim
+    )
+    if pagina.proximo_cursor:
+        response.headers[CABECALHO_CURSOR] = pagina.proximo_cursor
+    
+    return pagina.itens
+
+
+@router.get("/consultas/horarios-disponiveis", response_model=List[DisponibilidadeMedico])
+async def listar_disponibilidade_periodo(
+    data_inicio: date = Query(..., description="Data inicial (YYYY-MM-DD)"),
+    data_fim: date = Query(..., description="Data final (YYYY-MM-DD)"),
+    medico_ids: List[str] = Query(None, description="IDs dos médicos"),
+    especialidade: str = Query(None, description="Especialidade (se medico_ids não informado)")
+):
+    """
+    Lista horários disponíveis de vários médicos em um período
+    
+    Substitui várias chamadas a /horarios-disponiveis/{medico_id}/{data}
+    (ex.: visão semanal da agenda)
+    """
+    return await service.listar_disponibilidade_periodo(
+        data_inicio, data_fim, medico_ids=medico_ids, especialidade=especialidade
+    )
+
+
+@router.get("/consultas/proximos-horarios", response_model=List[HorarioLivre])
+async def buscar_proximos_horarios(
+    especialidade: str = Query(..., description="Especialidade médica"),
+    a_partir_de: datetime = Query(None, description="Início da busca (padrão: agora)"),
+    quantidade: int = Query(5, ge=1, le=50, description="Quantidade de horários"),
+    max_dias: int = Query(None, ge=1, description="Dias à frente a pesquisar")
+):
+    """
+    Próximos horários livres entre todos os médicos de uma especialidade
+    
+    Ex.: "primeira consulta de cardiologia disponível"
+    """
+    return await service.buscar_proximos_horarios(
+        especialidade, a_partir_de=a_partir_de, quantidade=quantidade, max_dias=max_dias
+    )
 
 
 @router.get("/consultas/{consulta_id}", response_model=ConsultaDetalhada)
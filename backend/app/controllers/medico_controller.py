@@ -3,12 +3,13 @@ Controller de Médicos - rotas HTTP
 """
 
 from typing import List
-from fastapi import APIRouter, HTTPException, Query, status, Request
+from fastapi import APIRouter, HTTPException, Query, Response, status, Request
 from fastapi.exceptions import RequestValidationError
 
 from app.schemas.medico_schema import MedicoCreate, MedicoUpdate, MedicoResponse, MedicoCredenciaisResponse
 from app.services.medico_service import MedicoService
 from app.infra.logger import get_logger
+from app.infra.paginacao import CABECALHO_CURSOR
 
 logger = get_logger(__name__)
 router = APIRouter()
@@ -17,18 +18,26 @@ service = MedicoService()
 
 @router.get("/medicos", response_model=List[MedicoResponse])
 async def listar_medicos(
+    response: Response,
     apenas_ativos: bool = True,
-    especialidade: str = Query(None, description="Filtrar por especialidade")
+    especialidade: str = Query(None, description="Filtrar por especialidade"),
+    limit: int = Query(None, ge=1, description="Itens por página"),
+    after: str = Query(None, description="Cursor da página anterior (X-Next-Cursor)")
 ):
-    """Lista todos os médicos, com filtro opcional por especialidade"""
-    if especialidade:
-        medicos = await service.buscar_por_especialidade(especialidade)
-    elif apenas_ativos:
-        medicos = await service.listar_ativos()
-    else:
-        medicos = await service.listar_todos()
+    """
+    Lista médicos paginados por cursor, com filtro opcional por especialidade
+    O cursor da próxima página vem no cabeçalho X-Next-Cursor
+    """
+    pagina = await service.listar_pagina(
+        limit,
+        after,
+        apenas_ativos=apenas_ativos or bool(especialidade),
+        especialidade=especialidade
+    )
+    if pagina.proximo_cursor:
+        response.headers[CABECALHO_CURSOR] = pagina.proximo_cursor
     
-    return [MedicoResponse(**m.to_dict()) for m in medicos]
+    return [MedicoResponse(**m.to_dict()) for m in pagina.itens]
 
 
 @router.get("/medicos/{medico_id}", response_model=MedicoResponse)
@@ -3,11 +3,12 @@ Controller de Pacientes - rotas HTTP
 """
 
 from typing import List
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, HTTPException, Query, Response, status
 
 from app.schemas.paciente_schema import PacienteCreate, PacienteUpdate, PacienteResponse, PacienteCredenciaisResponse
 from app.services.paciente_service import PacienteService
 from app.infra.logger import get_logger
+from app.infra.paginacao import CABECALHO_CURSOR
 
 logger = get_logger(__name__)
 router = APIRouter()
@@ -15,14 +16,21 @@ service = PacienteService()
 
 
 @router.get("/pacientes", response_model=List[PacienteResponse])
-async def listar_pacientes(apenas_ativos: bool = True):
-    """Lista todos os pacientes"""
-    if apenas_ativos:
-        pacientes = await service.listar_ativos()
-    else:
-        pacientes = await service.listar_todos()
+async def listar_pacientes(
+    response: Response,
+    apenas_ativos: bool = True,
+    limit: int = Query(None, ge=1, description="Itens por página"),
+    after: str = Query(None, description="Cursor da página anterior (X-Next-Cursor)")
+):
+    """
+    Lista pacientes paginados por cursor
+    O cursor da próxima página vem no cabeçalho X-Next-Cursor
+    """
+    pagina = await service.listar_pagina(limit, after, apenas_ativos=apenas_ativos)
+    if pagina.proximo_cursor:
+        response.headers[CABECALHO_CURSOR] = pagina.proximo_cursor
     
-    return [PacienteResponse(**p.to_dict()) for p in pacientes]
+    return [PacienteResponse(**p.to_dict()) for p in pagina.itens]
 
 
 @router.get("/pacientes/{paciente_id}", response_model=PacienteResponse)
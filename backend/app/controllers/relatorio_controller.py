@@ -2,10 +2,14 @@
 Controller de Relatórios - rotas HTTP
 """
 
+from datetime import date, datetime
+from typing import List, Optional
+
 from fastapi import APIRouter, HTTPException
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, StreamingResponse
 
-from app.schemas.relatorio_schema import RelatorioRequest, RelatorioResponse
+from app.schemas.relatorio_schema import RelatorioRequest, RelatorioJobResponse, TipoRelatorio, FormatoRelatorio
+from app.services.relatorio_job_service import get_relatorio_job_service
 from app.services.relatorio_service import get_relatorio_service
 from app.infra.logger import get_logger
 
@@ -13,23 +17,82 @@ logger = get_logger(__name__)
 router = APIRouter()
 
 
-@router.post("/relatorios/gerar", response_model=RelatorioResponse)
+@router.post("/relatorios/gerar", response_model=RelatorioJobResponse, status_code=202)
 async def gerar_relatorio(request: RelatorioRequest):
     """
-    Gera relatório conforme especificação
+    Enfileira a geração do relatório e retorna o job imediatamente
+    
+    Acompanhe por GET /relatorios/jobs/{job_id}; ao concluir, `resultado.arquivo`
+    é baixado em /relatorios/download/{arquivo}.
     
-    Conceito de SO: Operação de I/O pesada executada em thread separada
+    Conceito de SO: Fila de tarefas com execução em segundo plano
     """
-    service = get_relatorio_service()
+    service = get_relatorio_job_service()
+    
+    try:
+        return await service.enfileirar(request)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/relatorios/jobs", response_model=List[RelatorioJobResponse])
+async def listar_jobs():
+    """Lista os jobs de relatório retidos (mais recentes primeiro)"""
+    service = get_relatorio_job_service()
+    return await service.listar()
+
+
+@router.get("/relatorios/jobs/{job_id}", response_model=RelatorioJobResponse)
+async def status_job(job_id: str):
+    """Status e progresso de um job de relatório"""
+    service = get_relatorio_job_service()
+    return await service.obter(job_id)
+
+
+@router.post("/relatorios/jobs/{job_id}/cancelar", response_model=RelatorioJobResponse)
+async def cancelar_job(job_id: str):
+    """
+    Cancela um job pendente ou em execução
+    
+    Conceito de SO: Sinalização de término para tarefa em execução
+    """
+    service = get_relatorio_job_service()
+    return await service.cancelar(job_id)
+
+
+@router.get("/relatorios/exportar/csv")
+async def exportar_csv(
+    tipo: TipoRelatorio = TipoRelatorio.GERAL,
+    paciente_id: Optional[str] = None,
+    medico_id: Optional[str] = None,
+    data_inicio: Optional[date] = None,
+    data_fim: Optional[date] = None
+):
+    """
+    Exporta consultas em CSV diretamente na resposta (sem arquivo em disco)
     
+    Conceito de SO: Streaming - os lotes são enviados conforme lidos do banco
+    """
+    request = RelatorioRequest(
+        tipo=tipo,
+        formato=FormatoRelatorio.CSV,
+        paciente_id=paciente_id,
+        medico_id=medico_id,
+        data_inicio=data_inicio,
+        data_fim=data_fim
+    )
     try:
-        relatorio = await service.gerar_relatorio(request)
-        return relatorio
+        request.validate_filters()
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
-    except Exception as e:
-        logger.error(f"Erro ao gerar relatório: {e}")
-        raise HTTPException(status_code=500, detail="Erro ao gerar relatório")
+    
+    service = get_relatorio_service()
+    filename = f"relatorio_{tipo.value}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+    return StreamingResponse(
+        service.exportar_csv(request),
+        media_type=f"text/csv; charset={service.config.file_encoding}",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
 
 
 @router.get("/relatorios/download/{arquivo}")
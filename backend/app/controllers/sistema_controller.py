@@ -91,15 +91,31 @@ async def limpar_backups(manter_ultimos: int = 10):
 @router.get("/sistema/cache/stats")
 async def stats_cache():
     """
-    Estatísticas do cache em memória
+    Estatísticas do cache: entradas, memória estimada, acertos, falhas,
+    expirações, despejos e tempo de carga por namespace
     
     Conceito de SO: Gerenciamento de memória
+    Executado no event loop, como as escritas no cache: as estruturas são
+    percorridas sem concorrência; só a contagem do arquivo compartilhado
+    vai para a thread do cache
     """
     service = get_cache_service()
-    stats = service.get_stats()
+    stats = await service.get_stats()
     return stats
 
 
+@router.post("/sistema/cache/stats/resetar")
+async def resetar_stats_cache():
+    """
+    Zera contadores e histogramas do cache (as entradas são mantidas)
+    
+    Conceito de SO: Monitoramento de desempenho
+    """
+    service = get_cache_service()
+    service.reset_stats()
+    return {"mensagem": "Estatísticas do cache zeradas"}
+
+
 @router.post("/sistema/cache/limpar")
 async def limpar_cache():
     """
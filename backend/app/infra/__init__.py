@@ -3,7 +3,7 @@
 from app.infra.config import get_config, Settings, OSInfo
 from app.infra.logger import setup_logging, get_logger
 from app.infra.file_manager import FileManager
-from app.infra.concurrency import get_concurrency_manager, ConcurrencyManager
+from app.infra.concurrency import get_concurrency_manager, ConcurrencyManager, ShardedAsyncLock
 from app.infra.storage import get_storage, JSONStorage
 
 __all__ = [
@@ -15,6 +15,7 @@ __all__ = [
     "FileManager",
     "get_concurrency_manager",
     "ConcurrencyManager",
+    "ShardedAsyncLock",
     "get_storage",
     "JSONStorage",
 ]
@@ -0,0 +1,141 @@
+"""
+Carregamento em lote por requisição (estilo DataLoader)
+
+Conceitos de SO demonstrados:
+- Agrupamento de E/S (batching): buscas por ID feitas na mesma volta do
+  event loop viram um único `WHERE id IN (...)`, como o escalonador de
+  disco que junta requisições de blocos vizinhos
+- Memoização por escopo: o resultado vale até o fim da requisição
+- Variáveis de contexto (ContextVar): estado isolado por requisição,
+  análogo ao armazenamento local de thread (TLS)
+"""
+
+import asyncio
+from contextvars import ContextVar
+from operator import attrgetter
+from typing import Any, Awaitable, Callable, Dict, Generic, Iterable, List, Optional, Set, TypeVar
+
+from app.infra.logger import get_logger
+
+logger = get_logger(__name__)
+
+T = TypeVar("T")
+
+# Carregadores da requisição atual (None fora de uma requisição HTTP)
+_escopo_requisicao: ContextVar[Optional[Dict[str, Any]]] = ContextVar(
+    "escopo_requisicao", default=None
+)
+
+
+class BatchLoader(Generic[T]):
+    """
+    Agrupa buscas por ID e memoiza os resultados
+    
+    Cada `load` registra o ID e aguarda; o lote é despachado uma única vez
+    depois que as corrotinas prontas na mesma volta do loop executaram.
+    As tarefas de despacho ficam referenciadas até terminarem (o event
+    loop guarda só referências fracas) e sempre resolvem seus futuros.
+    """
+    
+    def __init__(
+        self,
+        carregar_lote: Callable[[List[str]], Awaitable[Iterable[T]]],
+        chave: Callable[[T], str] = attrgetter("id")
+    ):
+        self._carregar_lote = carregar_lote
+        self._chave = chave
+        self._futuros: Dict[str, asyncio.Future] = {}
+        self._pendentes: List[str] = []
+        self._despachos: Set[asyncio.Task] = set()
+    
+    async def load(self, chave: str) -> Optional[T]:
+        """Retorna o item da chave (None se não existir)"""
+        futuro = self._futuros.get(chave)
+        if futuro is None:
+            loop = asyncio.get_running_loop()
+            futuro = loop.create_future()
+            self._futuros[chave] = futuro
+            self._pendentes.append(chave)
+            if len(self._pendentes) == 1:
+                # Primeiro ID do lote: despacha após a volta atual do loop
+                loop.call_soon(self._iniciar_despacho)
+        # shield: o cancelamento de um chamador não cancela os demais
+        return await asyncio.shield(futuro)
+    
+    async def load_many(self, chaves: Iterable[str]) -> List[Optional[T]]:
+        """Carrega várias chaves em um mesmo lote"""
+        return list(await asyncio.gather(*(self.load(c) for c in chaves)))
+    
+    def prime(self, item: T):
+        """Registra um item já carregado (ex.: recém-criado)"""
+        futuro = asyncio.get_running_loop().create_future()
+        futuro.set_result(item)
+        self._futuros[self._chave(item)] = futuro
+    
+    def limpar(self, chave: str):
+        """Descarta o valor memoizado de uma chave (após escrita)"""
+        futuro = self._futuros.get(chave)
+        if futuro is not None and futuro.done():
+            del self._futuros[chave]
+    
+    def _iniciar_despacho(self):
+        """Cria a tarefa de despacho e a mantém referenciada até terminar"""
+        tarefa = asyncio.ensure_future(self._despachar())
+        self._despachos.add(tarefa)
+        tarefa.add_done_callback(self._despachos.discard)
+    
+    async def _despachar(self):
+        """Executa uma query para todas as chaves pendentes"""
+        chaves, self._pendentes = self._pendentes, []
+        try:
+            itens = await self._carregar_lote(chaves)
+            por_chave = {self._chave(item): item for item in itens}
+            for chave in chaves:
+                futuro = self._futuros.get(chave)
+                if futuro is not None and not futuro.done():
+                    futuro.set_result(por_chave.get(chave))
+        except Exception as e:
+            logger.error(f"Erro ao carregar lote de {len(chaves)} chaves: {e}")
+            for chave in chaves:
+                futuro = self._futuros.pop(chave, None)
+                if futuro is not None and not futuro.done():
+                    futuro.set_exception(e)
+        finally:
+            # Cancelamento do despacho (ex.: shutdown): quem aguarda não
+            # fica bloqueado para sempre, e a chave pode ser recarregada
+            for chave in chaves:
+                futuro = self._futuros.get(chave)
+                if futuro is not None and not futuro.done():
+                    del self._futuros[chave]
+                    futuro.cancel()
+
+
+def obter_do_escopo(nome: str, fabrica: Callable[[], T]) -> T:
+    """
+    Objeto com escopo da requisição atual, criado na primeira chamada
+    Fora de uma requisição (startup, tarefas) cria um objeto avulso
+    """
+    escopo = _escopo_requisicao.get()
+    if escopo is None:
+        return fabrica()
+    if nome not in escopo:
+        escopo[nome] = fabrica()
+    return escopo[nome]
+
+
+class EscopoRequisicaoMiddleware:
+    """Middleware ASGI que abre um escopo de carregadores por requisição"""
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        token = _escopo_requisicao.set({})
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _escopo_requisicao.reset(token)
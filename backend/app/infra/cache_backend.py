@@ -0,0 +1,735 @@
+"""
+Backends de armazenamento do cache
+
+Conceitos de SO demonstrados:
+- Gerenciamento de memória: LRU, orçamento em bytes e despejo ponderado
+- Fila de prioridade (heap) de expirações, como a fila de timers do kernel
+- Comunicação entre processos (IPC) por arquivo compartilhado: workers
+  diferentes leem e gravam o mesmo cache SQLite
+- Coerência de cache: invalidações registradas em um log compartilhado
+  e aplicadas por cada processo à sua cópia local (como a invalidação
+  de linhas de cache entre núcleos de CPU)
+- E/S fora do event loop: o arquivo compartilhado é acessado por uma
+  thread dedicada; escritas são enfileiradas (write-behind)
+"""
+
+import asyncio
+import heapq
+import itertools
+import pickle
+import sqlite3
+import sys
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import partial
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from app.infra.config import Settings
+from app.infra.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Candidatas mais antigas avaliadas a cada despejo (a maior sai primeiro)
+_AMOSTRA_DESPEJO = 8
+# Profundidade máxima ao medir objetos aninhados
+_PROFUNDIDADE_MAXIMA = 4
+_ESCALARES = (str, bytes, int, float, bool, type(None))
+
+
+def estimar_tamanho(valor: Any, profundidade: int = 0) -> int:
+    """
+    Tamanho aproximado em bytes (sys.getsizeof recursivo)
+    
+    Percorre listas, tuplas, dicionários e atributos de objetos (ORM
+    inclusive, sem o estado interno do SQLAlchemy). Objetos compartilhados
+    são contados em cada referência: a estimativa é conservadora.
+    """
+    tamanho = sys.getsizeof(valor)
+    if isinstance(valor, _ESCALARES) or profundidade >= _PROFUNDIDADE_MAXIMA:
+        return tamanho
+    
+    proxima = profundidade + 1
+    if isinstance(valor, dict):
+        return tamanho + sum(
+            estimar_tamanho(k, proxima) + estimar_tamanho(v, proxima) for k, v in valor.items()
+        )
+    if isinstance(valor, (list, tuple, set, frozenset)):
+        return tamanho + sum(estimar_tamanho(item, proxima) for item in valor)
+    
+    atributos = getattr(valor, "__dict__", None)
+    if atributos:
+        return tamanho + sum(
+            estimar_tamanho(v, proxima) for k, v in atributos.items() if not k.startswith("_sa_")
+        )
+    return tamanho
+
+
+def namespace_da_chave(key: str) -> str:
+    """Namespace de uma chave: prefixo até o primeiro ':'"""
+    return key.split(":", 1)[0]
+
+
+@dataclass(slots=True)
+class CacheEntry:
+    """
+    Entrada do cache com TTL (relógio monotônico)
+    
+    - fresh_until: TTL suave; depois dele o valor ainda é servido,
+      mas dispara uma atualização em segundo plano
+    - expires_at: TTL rígido; depois dele a entrada não é mais servida
+    """
+    value: Any
+    expires_at: float
+    seq: int
+    fresh_until: float
+    tamanho: int
+    namespace: str
+
+
+@dataclass
+class NamespaceCache:
+    """Chaves (em ordem LRU), bytes, despejos e expirações de um namespace"""
+    chaves: "OrderedDict[str, None]"
+    budget_bytes: Optional[int] = None
+    bytes: int = 0
+    evictions: int = 0
+    expirations: int = 0
+
+
+class BaseCacheBackend(ABC):
+    """
+    Interface base para armazenamento do cache
+    
+    get_entry devolve (valor, fresco) ou None; `fresco` é False entre o
+    TTL suave e o rígido.
+    """
+    
+    nome: str = "base"
+    
+    @abstractmethod
+    def get_entry(self, key: str) -> Optional[Tuple[Any, bool]]:
+        """Busca valor e frescor da entrada"""
+        pass
+    
+    async def get_entry_async(self, key: str) -> Optional[Tuple[Any, bool]]:
+        """Busca sem bloquear o event loop (backends com E/S sobrescrevem)"""
+        return self.get_entry(key)
+    
+    @abstractmethod
+    def set(self, key: str, value: Any, ttl_seconds: float, soft_ttl_seconds: Optional[float] = None):
+        """Armazena valor com TTL rígido e TTL suave opcional"""
+        pass
+    
+    @abstractmethod
+    def delete(self, key: str) -> bool:
+        """Remove uma entrada"""
+        pass
+    
+    @abstractmethod
+    def delete_prefix(self, prefixo: str) -> int:
+        """Remove as entradas cujas chaves começam com o prefixo"""
+        pass
+    
+    @abstractmethod
+    def clear(self) -> int:
+        """Remove todas as entradas"""
+        pass
+    
+    @abstractmethod
+    def get_stats(self) -> dict:
+        """Estatísticas do armazenamento"""
+        pass
+    
+    async def get_stats_async(self) -> dict:
+        """
+        Estatísticas a partir do event loop
+        Backends com E/S a sobrescrevem para não bloquear o loop
+        """
+        return self.get_stats()
+    
+    @abstractmethod
+    def reset_stats(self):
+        """Zera os contadores (despejos, expirações)"""
+        pass
+    
+    def fechar(self):
+        """Libera conexões e threads (shutdown da aplicação)"""
+
+
+class MemoryCacheBackend(BaseCacheBackend):
+    """
+    Cache em memória do processo
+    
+    Conceito de SO: Gerenciamento de memória
+    - LRU em OrderedDict: get, set e delete em O(1) amortizado
+    - Expiração preguiçosa: entradas vencidas são descartadas no acesso
+      e pelo heap de expirações, sem varrer o cache inteiro
+    - Relógio monotônico: imune a ajustes do relógio do sistema
+    - Orçamento de memória global e por namespace; o despejo escolhe,
+      entre as entradas menos usadas, a que libera mais bytes
+    """
+    
+    nome = "memory"
+    
+    def __init__(
+        self,
+        max_size: int,
+        max_memory_bytes: int,
+        budgets_bytes: Optional[Dict[str, int]] = None
+    ):
+        self._cache: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        # (expires_at, seq, key); itens de entradas já removidas ou
+        # regravadas ficam obsoletos e são ignorados ao sair do heap
+        self._expiracoes: List[Tuple[float, int, str]] = []
+        self._seq = itertools.count()
+        self.max_size = max_size
+        self.max_memory_bytes = max_memory_bytes
+        self._budgets_bytes = budgets_bytes or {}
+        self._namespaces: Dict[str, NamespaceCache] = {}
+        self._bytes_total = 0
+        self._evictions = 0
+        self._expirations = 0
+    
+    def _namespace(self, nome: str) -> NamespaceCache:
+        """Estado do namespace (criado no primeiro uso)"""
+        namespace = self._namespaces.get(nome)
+        if namespace is None:
+            namespace = NamespaceCache(chaves=OrderedDict(), budget_bytes=self._budgets_bytes.get(nome))
+            self._namespaces[nome] = namespace
+        return namespace
+    
+    def _remover(self, key: str) -> Optional[CacheEntry]:
+        """Remove a entrada e desconta seus bytes"""
+        entry = self._cache.pop(key, None)
+        if entry is not None:
+            namespace = self._namespaces[entry.namespace]
+            del namespace.chaves[key]
+            namespace.bytes -= entry.tamanho
+            self._bytes_total -= entry.tamanho
+        return entry
+    
+    def _tocar(self, key: str, entry: CacheEntry):
+        """Marca como usada mais recentemente (global e no namespace)"""
+        self._cache.move_to_end(key)
+        self._namespaces[entry.namespace].chaves.move_to_end(key)
+    
+    def _expirar(self, key: str):
+        """Remove a entrada vencida e conta a expiração"""
+        entry = self._remover(key)
+        self._expirations += 1
+        self._namespaces[entry.namespace].expirations += 1
+    
+    def _is_expired(self, entry: CacheEntry, agora: Optional[float] = None) -> bool:
+        """Verifica se entrada está expirada"""
+        return (agora if agora is not None else time.monotonic()) >= entry.expires_at
+    
+    def _cleanup_expired(self):
+        """
+        Remove entradas expiradas do topo do heap
+        Conceito: Liberação de memória
+        
+        Custo proporcional ao número de expirações vencidas (amortizado O(log n)
+        por inserção), não ao tamanho do cache.
+        """
+        agora = time.monotonic()
+        removidas = 0
+        while self._expiracoes and self._expiracoes[0][0] <= agora:
+            _, seq, key = heapq.heappop(self._expiracoes)
+            entry = self._cache.get(key)
+            if entry is not None and entry.seq == seq:
+                self._expirar(key)
+                removidas += 1
+        
+        if removidas:
+            logger.debug(f"Cache: {removidas} entradas expiradas removidas")
+    
+    def _compactar_expiracoes(self):
+        """
+        Reconstrói o heap quando os itens obsoletos dominam
+        Mantém a memória do heap proporcional ao número de entradas
+        """
+        if len(self._expiracoes) > 2 * len(self._cache) + 64:
+            self._expiracoes = [
+                (entry.expires_at, entry.seq, key) for key, entry in self._cache.items()
+            ]
+            heapq.heapify(self._expiracoes)
+    
+    def _despejar(self, ordem_lru) -> None:
+        """
+        Despeja uma entrada entre as menos recentemente usadas
+        Conceito: Gerenciamento de memória limitada (LRU ponderado por tamanho)
+        
+        Das _AMOSTRA_DESPEJO chaves mais antigas, sai a maior: poucas
+        entradas grandes liberam o espaço de muitas pequenas.
+        """
+        candidatas = itertools.islice(ordem_lru, _AMOSTRA_DESPEJO)
+        vitima = max(candidatas, key=lambda k: self._cache[k].tamanho)
+        entry = self._remover(vitima)
+        self._evictions += 1
+        self._namespaces[entry.namespace].evictions += 1
+        logger.debug(f"Cache: Entrada removida (key={vitima}, {entry.tamanho} bytes)")
+    
+    def _evict_oldest(self, namespace: NamespaceCache, tamanho: int):
+        """
+        Libera espaço para uma nova entrada
+        Respeita o limite de entradas, o orçamento do namespace e o global
+        """
+        while self._cache and len(self._cache) >= self.max_size:
+            self._despejar(self._cache)
+        if namespace.budget_bytes is not None:
+            while namespace.chaves and namespace.bytes + tamanho > namespace.budget_bytes:
+                self._despejar(namespace.chaves)
+        while self._cache and self._bytes_total + tamanho > self.max_memory_bytes:
+            self._despejar(self._cache)
+    
+    def get_entry(self, key: str) -> Optional[Tuple[Any, bool]]:
+        """Busca valor e frescor; entradas vencidas são descartadas"""
+        entry = self._cache.get(key)
+        if entry is None:
+            return None
+        
+        agora = time.monotonic()
+        if self._is_expired(entry, agora):
+            self._expirar(key)
+            return None
+        
+        # Marca como usada mais recentemente
+        self._tocar(key, entry)
+        return entry.value, agora < entry.fresh_until
+    
+    def set(self, key: str, value: Any, ttl_seconds: float, soft_ttl_seconds: Optional[float] = None):
+        """Armazena valor com TTL (soft_ttl_seconds menor que o rígido)"""
+        # Limpeza das expirações vencidas (topo do heap)
+        self._cleanup_expired()
+        self._remover(key)
+        
+        # Entradas maiores que o orçamento não são armazenadas
+        nome_namespace = namespace_da_chave(key)
+        namespace = self._namespace(nome_namespace)
+        tamanho = estimar_tamanho(key) + estimar_tamanho(value)
+        limite = min(self.max_memory_bytes, namespace.budget_bytes or self.max_memory_bytes)
+        if tamanho > limite:
+            logger.warning(f"Cache: entrada {key} ({tamanho} bytes) excede o orçamento de {limite} bytes")
+            return
+        
+        # Evict se necessário
+        self._evict_oldest(namespace, tamanho)
+        
+        # Calcula expiração
+        agora = time.monotonic()
+        expires_at = agora + ttl_seconds
+        fresh_until = min(agora + soft_ttl_seconds, expires_at) if soft_ttl_seconds else expires_at
+        seq = next(self._seq)
+        
+        # Armazena
+        self._cache[key] = CacheEntry(
+            value=value,
+            expires_at=expires_at,
+            seq=seq,
+            fresh_until=fresh_until,
+            tamanho=tamanho,
+            namespace=nome_namespace
+        )
+        namespace.chaves[key] = None
+        namespace.bytes += tamanho
+        self._bytes_total += tamanho
+        heapq.heappush(self._expiracoes, (expires_at, seq, key))
+        self._compactar_expiracoes()
+    
+    def delete(self, key: str) -> bool:
+        """Remove entrada do cache"""
+        return self._remover(key) is not None
+    
+    def delete_prefix(self, prefixo: str) -> int:
+        """
+        Remove todas as entradas cujas chaves começam com o prefixo
+        Percorre o cache (O(n)): uso restrito a invalidações raras
+        """
+        chaves = [key for key in self._cache if key.startswith(prefixo)]
+        for key in chaves:
+            self._remover(key)
+        return len(chaves)
+    
+    def clear(self) -> int:
+        """Remove todas as entradas"""
+        size = len(self._cache)
+        self._cache.clear()
+        self._expiracoes.clear()
+        for namespace in self._namespaces.values():
+            namespace.chaves.clear()
+            namespace.bytes = 0
+        self._bytes_total = 0
+        return size
+    
+    def get_stats(self) -> dict:
+        """Entradas, memória e despejos (global e por namespace)"""
+        agora = time.monotonic()
+        total = len(self._cache)
+        expired = sum(1 for e in self._cache.values() if self._is_expired(e, agora))
+        
+        return {
+            "total_entries": total,
+            "expired_entries": expired,
+            "active_entries": total - expired,
+            "max_size": self.max_size,
+            "memory_bytes": self._bytes_total,
+            "max_memory_bytes": self.max_memory_bytes,
+            "evictions": self._evictions,
+            "expirations": self._expirations,
+            "namespaces": {
+                nome: {
+                    "entries": len(namespace.chaves),
+                    "bytes": namespace.bytes,
+                    "budget_bytes": namespace.budget_bytes,
+                    "evictions": namespace.evictions,
+                    "expirations": namespace.expirations
+                }
+                for nome, namespace in self._namespaces.items()
+            }
+        }
+    
+    def reset_stats(self):
+        """Zera despejos e expirações (global e por namespace)"""
+        self._evictions = 0
+        self._expirations = 0
+        for namespace in self._namespaces.values():
+            namespace.evictions = 0
+            namespace.expirations = 0
+
+
+class SQLiteCacheBackend(BaseCacheBackend):
+    """
+    Cache compartilhado entre workers em um arquivo SQLite
+    
+    Conceitos de SO:
+    - L1: MemoryCacheBackend local do processo (leituras quentes sem E/S)
+    - L2: tabela cache_entradas no arquivo compartilhado (WAL), que mantém
+      o cache aquecido para todos os workers
+    - Coerência: toda escrita (set, delete, delete_prefix, clear) grava
+      uma linha em cache_invalidacoes; cada processo consulta o log a cada
+      `intervalo_invalidacao` segundos e descarta do L1 as chaves alteradas
+      por outros processos
+    - Expiração em relógio de parede (time.time), comum a todos os processos
+    - E/S em thread dedicada (executor de uma thread, dona da conexão):
+      o event loop nunca espera pelo lock de escrita do arquivo. Escritas
+      atualizam o L1 e são enfileiradas (write-behind); a fila FIFO mantém
+      a ordem entre escritas e leituras do próprio processo
+    """
+    
+    nome = "sqlite"
+    
+    # Escritas entre manutenções (expiradas, limite de entradas, log antigo)
+    _MANUTENCAO_A_CADA = 512
+    # Retenção do log de invalidações
+    _RETENCAO_LOG_SEGUNDOS = 3600
+    
+    def __init__(
+        self,
+        caminho: Path,
+        local: MemoryCacheBackend,
+        max_entradas: int,
+        intervalo_invalidacao: float = 0.2
+    ):
+        caminho.parent.mkdir(parents=True, exist_ok=True)
+        self.caminho = caminho
+        self.local = local
+        self.max_entradas = max_entradas
+        self.intervalo_invalidacao = intervalo_invalidacao
+        self._origem = uuid.uuid4().hex
+        # O lock protege apenas o L1 (operações em memória, nunca E/S)
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="cache-sqlite")
+        self._conn = sqlite3.connect(
+            str(caminho), timeout=5, isolation_level=None, check_same_thread=False
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS cache_entradas (
+                chave TEXT PRIMARY KEY,
+                valor BLOB NOT NULL,
+                expires_at REAL NOT NULL,
+                fresh_until REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS ix_cache_entradas_expires_at
+                ON cache_entradas (expires_at);
+            CREATE TABLE IF NOT EXISTS cache_invalidacoes (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                tipo TEXT NOT NULL,
+                chave TEXT NOT NULL,
+                origem TEXT NOT NULL,
+                criado_em REAL NOT NULL
+            );
+            """
+        )
+        self._ultimo_seq = self._conn.execute(
+            "SELECT COALESCE(MAX(seq), 0) FROM cache_invalidacoes"
+        ).fetchone()[0]
+        self._proxima_verificacao = 0.0
+        self._sincronizacao_pendente = False
+        self._escritas = 0
+        self._invalidacoes_recebidas = 0
+        logger.info(f"Cache compartilhado em {caminho} (origem {self._origem[:8]})")
+    
+    # Métodos executados na thread do cache (únicos que usam a conexão)
+    
+    def _publicar(self, tipo: str, chave: str = ""):
+        """Registra uma invalidação no log compartilhado"""
+        self._conn.execute(
+            "INSERT INTO cache_invalidacoes (tipo, chave, origem, criado_em) VALUES (?, ?, ?, ?)",
+            (tipo, chave, self._origem, time.time())
+        )
+    
+    def _escrever(self, operacao: Callable[[], Any], tipo: str, chave: str = ""):
+        """Executa a escrita e publica a invalidação na mesma transação"""
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            operacao()
+            self._publicar(tipo, chave)
+            self._escritas += 1
+            if self._escritas % self._MANUTENCAO_A_CADA == 0:
+                self._manutencao()
+            self._conn.execute("COMMIT")
+        except Exception:
+            self._conn.execute("ROLLBACK")
+            raise
+    
+    def _sincronizar(self):
+        """Aplica ao L1 as invalidações publicadas por outros processos"""
+        try:
+            linhas = self._conn.execute(
+                "SELECT seq, tipo, chave, origem FROM cache_invalidacoes WHERE seq > ? ORDER BY seq",
+                (self._ultimo_seq,)
+            ).fetchall()
+        finally:
+            self._sincronizacao_pendente = False
+        if not linhas:
+            return
+        
+        with self._lock:
+            # Lacuna no log (linhas já podadas): o L1 pode estar incoerente
+            if self._ultimo_seq and linhas[0][0] > self._ultimo_seq + 1:
+                self.local.clear()
+            
+            for seq, tipo, chave, origem in linhas:
+                if origem == self._origem:
+                    continue
+                self._invalidacoes_recebidas += 1
+                if tipo == "chave":
+                    self.local.delete(chave)
+                elif tipo == "prefixo":
+                    self.local.delete_prefix(chave)
+                else:
+                    self.local.clear()
+        self._ultimo_seq = linhas[-1][0]
+    
+    def _ler(self, key: str) -> Optional[tuple]:
+        """Linha (valor, expires_at, fresh_until) da chave no arquivo"""
+        return self._conn.execute(
+            "SELECT valor, expires_at, fresh_until FROM cache_entradas WHERE chave = ?",
+            (key,)
+        ).fetchone()
+    
+    def _contar(self) -> int:
+        """Entradas válidas no arquivo compartilhado"""
+        return self._conn.execute(
+            "SELECT COUNT(*) FROM cache_entradas WHERE expires_at > ?", (time.time(),)
+        ).fetchone()[0]
+    
+    def _manutencao(self):
+        """Remove expiradas, excesso de entradas e log antigo"""
+        agora = time.time()
+        self._conn.execute("DELETE FROM cache_entradas WHERE expires_at <= ?", (agora,))
+        excesso = self._conn.execute("SELECT COUNT(*) FROM cache_entradas").fetchone()[0] - self.max_entradas
+        if excesso > 0:
+            # As que expiram primeiro saem primeiro
+            self._conn.execute(
+                "DELETE FROM cache_entradas WHERE chave IN "
+                "(SELECT chave FROM cache_entradas ORDER BY expires_at LIMIT ?)",
+                (excesso,)
+            )
+        self._conn.execute(
+            "DELETE FROM cache_invalidacoes WHERE criado_em < ?",
+            (agora - self._RETENCAO_LOG_SEGUNDOS,)
+        )
+    
+    # Interface (chamada pelo event loop: não bloqueia em E/S)
+    
+    def _em_segundo_plano(self, funcao: Callable[..., Any], *args) -> Optional[Future]:
+        """Enfileira na thread do cache; falhas são registradas no log"""
+        try:
+            futuro = self._executor.submit(funcao, *args)
+        except RuntimeError:
+            # Executor encerrado (shutdown): o L1 continua atendendo
+            return None
+        futuro.add_done_callback(self._registrar_falha)
+        return futuro
+    
+    @staticmethod
+    def _registrar_falha(futuro: Future):
+        """Loga a exceção de uma operação em segundo plano"""
+        if not futuro.cancelled() and futuro.exception() is not None:
+            logger.warning(f"Cache compartilhado: falha na operação - {futuro.exception()}")
+    
+    def _agendar_sincronizacao(self):
+        """Agenda a leitura do log de invalidações (no máximo a cada intervalo)"""
+        agora = time.monotonic()
+        if self._sincronizacao_pendente or agora < self._proxima_verificacao:
+            return
+        self._proxima_verificacao = agora + self.intervalo_invalidacao
+        self._sincronizacao_pendente = True
+        if self._em_segundo_plano(self._sincronizar) is None:
+            self._sincronizacao_pendente = False
+    
+    def get_entry(self, key: str) -> Optional[Tuple[Any, bool]]:
+        """Busca apenas no L1 (sem E/S); o arquivo é lido por get_entry_async"""
+        self._agendar_sincronizacao()
+        with self._lock:
+            return self.local.get_entry(key)
+    
+    async def get_entry_async(self, key: str) -> Optional[Tuple[Any, bool]]:
+        """Busca no L1 e, em falha, no arquivo compartilhado (na thread do cache)"""
+        local = self.get_entry(key)
+        if local is not None:
+            return local
+        
+        try:
+            linha = await asyncio.get_running_loop().run_in_executor(self._executor, self._ler, key)
+        except RuntimeError:
+            return None
+        if linha is None:
+            return None
+        
+        valor_bytes, expires_at, fresh_until = linha
+        agora = time.time()
+        if agora >= expires_at:
+            return None
+        try:
+            value = pickle.loads(valor_bytes)
+        except Exception as e:
+            logger.warning(f"Cache: entrada {key} ilegível no arquivo compartilhado - {e}")
+            return None
+        
+        # Copia para o L1 com o TTL restante
+        restante_suave = fresh_until - agora
+        with self._lock:
+            self.local.set(key, value, expires_at - agora, restante_suave if restante_suave > 0 else 1e-6)
+        return value, agora < fresh_until
+    
+    def set(self, key: str, value: Any, ttl_seconds: float, soft_ttl_seconds: Optional[float] = None):
+        """Grava no L1 e enfileira a gravação no arquivo (invalida a chave nos demais)"""
+        try:
+            valor_bytes = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception as e:
+            logger.warning(f"Cache: valor de {key} não serializável - {e}")
+            return
+        
+        agora = time.time()
+        expires_at = agora + ttl_seconds
+        fresh_until = min(agora + soft_ttl_seconds, expires_at) if soft_ttl_seconds else expires_at
+        with self._lock:
+            self.local.set(key, value, ttl_seconds, soft_ttl_seconds)
+        self._em_segundo_plano(self._escrever, partial(
+            self._conn.execute,
+            "INSERT OR REPLACE INTO cache_entradas (chave, valor, expires_at, fresh_until) "
+            "VALUES (?, ?, ?, ?)",
+            (key, valor_bytes, expires_at, fresh_until)
+        ), "chave", key)
+    
+    def delete(self, key: str) -> bool:
+        """Remove do L1 e enfileira a remoção nos demais processos (retorno: L1)"""
+        with self._lock:
+            removida = self.local.delete(key)
+        self._em_segundo_plano(self._escrever, partial(
+            self._conn.execute, "DELETE FROM cache_entradas WHERE chave = ?", (key,)
+        ), "chave", key)
+        return removida
+    
+    def delete_prefix(self, prefixo: str) -> int:
+        """Remove as entradas do prefixo em todos os processos (retorno: L1)"""
+        with self._lock:
+            removidas = self.local.delete_prefix(prefixo)
+        # Intervalo [prefixo, prefixo + U+FFFF) usa a chave primária
+        self._em_segundo_plano(self._escrever, partial(
+            self._conn.execute,
+            "DELETE FROM cache_entradas WHERE chave >= ? AND chave < ?",
+            (prefixo, prefixo + "\uffff")
+        ), "prefixo", prefixo)
+        return removidas
+    
+    def clear(self) -> int:
+        """Remove todas as entradas em todos os processos (retorno: L1)"""
+        with self._lock:
+            removidas = self.local.clear()
+        self._em_segundo_plano(self._escrever, partial(
+            self._conn.execute, "DELETE FROM cache_entradas"
+        ), "tudo")
+        return removidas
+    
+    def get_stats(self) -> dict:
+        """
+        Estatísticas do L1 e do arquivo compartilhado
+        Aguarda a contagem na thread do cache: chamar fora do event loop
+        """
+        return self._montar_stats(self._executor.submit(self._contar).result())
+    
+    async def get_stats_async(self) -> dict:
+        """Estatísticas sem bloquear o loop: só a contagem vai à thread do cache"""
+        compartilhadas = await asyncio.get_running_loop().run_in_executor(self._executor, self._contar)
+        return self._montar_stats(compartilhadas)
+    
+    def _montar_stats(self, compartilhadas: int) -> dict:
+        """Estatísticas do L1 acrescidas das do arquivo compartilhado"""
+        with self._lock:
+            stats = self.local.get_stats()
+        stats.update({
+            "shared_path": str(self.caminho),
+            "shared_entries": compartilhadas,
+            "shared_file_bytes": self.caminho.stat().st_size if self.caminho.exists() else 0,
+            "invalidations_received": self._invalidacoes_recebidas
+        })
+        return stats
+    
+    def reset_stats(self):
+        """Zera os contadores do L1 e das invalidações recebidas"""
+        with self._lock:
+            self.local.reset_stats()
+            self._invalidacoes_recebidas = 0
+    
+    def fechar(self):
+        """Conclui as escritas enfileiradas e fecha a conexão"""
+        try:
+            self._executor.submit(self._conn.close)
+        except RuntimeError:
+            return
+        self._executor.shutdown(wait=True)
+
+
+def criar_cache_backend(config: Settings) -> BaseCacheBackend:
+    """Cria o backend configurado em cache_backend ("memory" ou "sqlite")"""
+    local = MemoryCacheBackend(
+        max_size=config.cache_max_size,
+        max_memory_bytes=int(config.cache_max_memory_mb * 1024 * 1024),
+        budgets_bytes={
+            nome: int(mb * 1024 * 1024)
+            for nome, mb in config.cache_namespace_budgets_mb.items()
+        }
+    )
+    if config.cache_backend == "sqlite":
+        caminho = Path(config.cache_shared_path) if config.cache_shared_path else config.data_dir / "cache.db"
+        return SQLiteCacheBackend(
+            caminho,
+            local,
+            max_entradas=config.cache_max_size,
+            intervalo_invalidacao=config.cache_invalidation_poll_ms / 1000
+        )
+    if config.cache_backend != "memory":
+        logger.warning(f"Backend de cache desconhecido: {config.cache_backend} (usando memória)")
+    return local
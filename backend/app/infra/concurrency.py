@@ -6,18 +6,38 @@ Conceitos de SO demonstrados:
 - ProcessPoolExecutor para operações CPU-bound
 - Controle de concorrência e sincronização
 - Escalonamento de tarefas
+- Locks particionados (sharding) para seções críticas por chave
+- Criação de processos com "spawn": o filho começa com um interpretador
+  limpo (sem threads, locks ou conexões herdadas do pai)
+- Comunicação entre processos: objetos compartilhados (Event, dict) de um
+  multiprocessing.Manager, passados como argumento às tarefas do pool
 """
 
 import asyncio
 from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
-from typing import Callable, Any
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+from multiprocessing.managers import SyncManager
+from typing import Callable, Any, List, Optional
 import multiprocessing
+import signal
+import zlib
 
 from app.infra.logger import get_logger
 
 logger = get_logger(__name__)
 
 
+def _inicializar_processo():
+    """
+    Inicializador dos processos do pool
+    
+    SIGINT (Ctrl+C) é tratado só pelo processo principal, que encerra o
+    pool; os filhos terminam a tarefa atual em vez de despejar tracebacks.
+    """
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
 class ConcurrencyManager:
     """
     Gerenciador de pools de threads e processos
@@ -35,7 +55,9 @@ class ConcurrencyManager:
         
         self.max_workers = max_workers
         self._thread_pool = ThreadPoolExecutor(max_workers=max_workers)
-        self._process_pool = ProcessPoolExecutor(max_workers=max_workers)
+        self._process_pool = self._criar_process_pool()
+        self._gerenciador: Optional[SyncManager] = None
+        self._gerenciador_lock = asyncio.Lock()
         
         logger.info(f"ConcurrencyManager iniciado com {max_workers} workers")
     
@@ -58,6 +80,18 @@ class ConcurrencyManager:
             logger.error(f"Erro ao executar em thread: {e}")
             raise
     
+    def _criar_process_pool(self) -> ProcessPoolExecutor:
+        """
+        Pool de processos com início "spawn" em todos os SOs
+        Fork de um processo com event loop e threads ativas pode herdar
+        locks travados; spawn é o padrão do Windows e do macOS
+        """
+        return ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_inicializar_processo
+        )
+    
     async def run_in_process(self, func: Callable, *args, **kwargs) -> Any:
         """
         Executa função em processo separado (bom para CPU-bound)
@@ -65,23 +99,73 @@ class ConcurrencyManager:
         Conceito: Processamento paralelo multi-processo
         - Contorna o GIL do Python
         - Ideal para operações pesadas de CPU
+        
+        A tarefa é enviada ao filho por pickle: `func` deve ser uma função
+        de nível de módulo (não lambda, closure ou método ligado a objetos
+        com recursos abertos) e os argumentos/retorno, dados serializáveis.
         """
-        loop = asyncio.get_event_loop()
+        loop = asyncio.get_running_loop()
         try:
             result = await loop.run_in_executor(
                 self._process_pool,
-                lambda: func(*args, **kwargs)
+                partial(func, *args, **kwargs)
             )
             return result
+        except BrokenProcessPool as e:
+            # Um filho morreu (ex.: falta de memória): o pool não aceita
+            # mais tarefas e é recriado para as próximas chamadas
+            logger.error(f"Pool de processos interrompido: {e}")
+            self._process_pool.shutdown(wait=False)
+            self._process_pool = self._criar_process_pool()
+            raise
         except Exception as e:
             logger.error(f"Erro ao executar em processo: {e}")
             raise
     
+    async def gerenciador_compartilhado(self) -> SyncManager:
+        """
+        Servidor de objetos compartilhados com os processos do pool
+        
+        Conceito de SO: Comunicação entre processos
+        - Event e dict do Manager são proxies serializáveis: podem ir como
+          argumento de uma tarefa (multiprocessing.Event só é herdado na
+          criação do processo, o que não serve a um pool já iniciado)
+        - Processo servidor criado no primeiro uso e encerrado no shutdown
+        """
+        async with self._gerenciador_lock:
+            if self._gerenciador is None:
+                gerenciador = SyncManager(ctx=multiprocessing.get_context("spawn"))
+                await self.run_in_thread(gerenciador.start, _inicializar_processo)
+                self._gerenciador = gerenciador
+        return self._gerenciador
+    
     def shutdown(self, wait: bool = True):
         """Finaliza os pools de forma limpa"""
         logger.info("Encerrando pools de threads e processos...")
         self._thread_pool.shutdown(wait=wait)
         self._process_pool.shutdown(wait=wait)
+        if self._gerenciador is not None:
+            self._gerenciador.shutdown()
+            self._gerenciador = None
+
+
+class ShardedAsyncLock:
+    """
+    Conjunto fixo de asyncio.Lock indexado por hash da chave
+    
+    Conceito de SO: Exclusão mútua com granularidade fina
+    - Chaves diferentes raramente disputam o mesmo lock
+    - Memória constante, independente do número de chaves
+    """
+    
+    def __init__(self, shards: int = 64):
+        self.shards = shards
+        self._locks: List[asyncio.Lock] = [asyncio.Lock() for _ in range(shards)]
+    
+    def for_key(self, key: str) -> asyncio.Lock:
+        """Retorna o lock responsável pela chave"""
+        # crc32 é estável entre processos (hash() de str é aleatorizado)
+        return self._locks[zlib.crc32(key.encode()) % self.shards]
 
 
 # Instância singleton
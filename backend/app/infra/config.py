@@ -12,7 +12,7 @@ import platform
 import os
 import sys
 from pathlib import Path
-from typing import List
+from typing import Dict, List, Optional
 from pydantic_settings import BaseSettings
 from dataclasses import dataclass
 
@@ -62,9 +62,64 @@ class Settings(BaseSettings):
     log_file_max_bytes: int = 10_485_760  # 10MB
     log_file_backup_count: int = 5
     
+    # Banco de dados (SQLite) - perfil de desempenho
+    # Aplicado via PRAGMA em toda nova conexão
+    db_journal_mode: str = "WAL"  # leitores não bloqueiam durante escrita
+    db_synchronous: str = "NORMAL"  # seguro com WAL, menos fsync por commit
+    db_cache_size_kb: int = 65_536  # 64MB de page cache por conexão
+    db_mmap_size_bytes: int = 268_435_456  # 256MB mapeados em memória
+    db_busy_timeout_ms: int = 5_000  # espera pelo lock antes de falhar
+    db_temp_store: str = "MEMORY"
+    
+    # Pool de conexões
+    db_pool_size: int = 10
+    db_max_overflow: int = 20
+    db_pool_timeout_seconds: int = 30
+    db_pool_recycle_seconds: int = 3_600
+    
+    # Índice de agendas em memória (conflitos de horário)
+    agenda_index_ttl_seconds: int = 300
+    
+    # Consulta de disponibilidade por período (dias por requisição)
+    disponibilidade_max_dias: int = 31
+    
+    # Paginação das listagens (itens por página)
+    paginacao_limite_padrao: int = 100
+    paginacao_limite_maximo: int = 500
+    
+    # Busca de próximos horários livres (dias à frente no máximo)
+    proximos_horarios_max_dias: int = 60
+    
     # Cache
-    cache_max_size: int = 100
+    cache_max_size: int = 10_000  # entradas (LRU O(1) por operação)
     cache_ttl_seconds: int = 300  # 5 minutos
+    cache_max_memory_mb: int = 64  # orçamento total (tamanho aproximado das entradas)
+    # Orçamento por namespace (prefixo da chave até ":"), ex.: {"horarios": 16}
+    cache_namespace_budgets_mb: Dict[str, float] = {}
+    # Horários livres: após o TTL suave são servidos e atualizados em segundo plano
+    cache_horarios_soft_ttl_seconds: int = 60
+    # Backend: "memory" (por processo) ou "sqlite" (arquivo compartilhado entre workers)
+    cache_backend: str = "memory"
+    cache_shared_path: Optional[str] = None  # padrão: data_dir/cache.db
+    # Intervalo de leitura do log de invalidações de outros workers
+    cache_invalidation_poll_ms: int = 200
+    
+    # Relatórios em segundo plano
+    relatorio_max_jobs_simultaneos: int = 2  # gerações em execução ao mesmo tempo, por worker
+    relatorio_max_jobs_pendentes: int = 50  # jobs na fila + em execução, somando todos os workers
+    relatorio_job_retencao_minutos: int = 60  # jobs finalizados consultáveis
+    relatorio_job_sincronizacao_ms: int = 1000  # gravação de progresso/heartbeat no banco
+    # Job ativo sem heartbeat por mais que isso é dado como falho (worker encerrado)
+    relatorio_job_heartbeat_limite_segundos: int = 30
+    relatorio_stream_lote: int = 500  # linhas por lote na exportação em fluxo
+    # Linhas de dados por aba do Excel (limite: 1.048.576 com o cabeçalho)
+    relatorio_excel_linhas_por_planilha: int = 1_048_575
+    # Linhas por bloco de tabela no PDF (cada bloco cabe em uma página A4)
+    relatorio_pdf_linhas_por_tabela: int = 40
+    # Cache de relatórios em reports_dir: arquivos mais antigos que a idade
+    # máxima são removidos; acima do tamanho, os menos acessados primeiro
+    relatorio_cache_max_mb: int = 500
+    relatorio_cache_max_idade_horas: int = 24
     
     # Backup
     backup_enabled: bool = True
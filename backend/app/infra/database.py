@@ -1,13 +1,23 @@
 """
 Configuração do Banco de Dados SQLAlchemy
 Gerencia conexão, sessões e modelos ORM
+
+Conceitos de SO demonstrados:
+- I/O assíncrono: engine aiosqlite executa as queries fora do event loop
+- Engine síncrona mantida para tarefas administrativas (criação de tabelas)
+- WAL e PRAGMAs de desempenho aplicados em toda nova conexão
+- Pool de conexões dimensionado pela configuração
+- Transações BEGIN IMMEDIATE para seções críticas (lock de escrita antecipado)
 """
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
 from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession, AsyncEngine
 from sqlalchemy.orm import sessionmaker, Session
-from contextlib import contextmanager
-from typing import Generator
+from contextlib import contextmanager, asynccontextmanager
+from typing import Generator, AsyncGenerator, Optional
 import os
 from pathlib import Path
 
@@ -20,33 +30,159 @@ Base = declarative_base()
 _engine = None
 _SessionLocal = None
 
+# Engine e sessões assíncronas (usadas pelos repositories)
+_async_engine: AsyncEngine | None = None
+_AsyncSessionLocal: async_sessionmaker[AsyncSession] | None = None
 
-def get_database_url() -> str:
-    """Retorna URL do banco de dados SQLite"""
+
+def get_database_path() -> Path:
+    """Retorna o caminho do arquivo do banco SQLite"""
     # Banco na pasta do projeto: backend/banco/database.db
     project_root = Path(__file__).parent.parent.parent  # volta para backend/
     db_dir = project_root / "banco"
     db_dir.mkdir(exist_ok=True)  # Cria pasta se não existir
-    db_path = db_dir / "database.db"
-    return f"sqlite:///{db_path}"
+    return db_dir / "database.db"
+
+
+def get_database_url() -> str:
+    """Retorna URL do banco de dados SQLite (driver síncrono)"""
+    return f"sqlite:///{get_database_path()}"
+
+
+def get_async_database_url() -> str:
+    """Retorna URL do banco de dados SQLite (driver aiosqlite)"""
+    return f"sqlite+aiosqlite:///{get_database_path()}"
+
+
+def _apply_sqlite_pragmas(dbapi_connection, connection_record):
+    """
+    Aplica o perfil de desempenho em cada nova conexão SQLite
+    
+    Conceito de SO: I/O de disco e memória
+    - WAL: escritas vão para um log, leitores continuam lendo o banco
+    - synchronous=NORMAL: fsync apenas nos checkpoints do WAL
+    - cache_size/mmap_size: páginas servidas da memória em vez do disco
+    - busy_timeout: espera pelo lock em vez de falhar imediatamente
+    """
+    config = get_config()
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute(f"PRAGMA journal_mode={config.db_journal_mode}")
+        cursor.execute(f"PRAGMA synchronous={config.db_synchronous}")
+        # Valor negativo: tamanho em KiB (em vez de número de páginas)
+        cursor.execute(f"PRAGMA cache_size=-{config.db_cache_size_kb}")
+        cursor.execute(f"PRAGMA mmap_size={config.db_mmap_size_bytes}")
+        cursor.execute(f"PRAGMA busy_timeout={config.db_busy_timeout_ms}")
+        cursor.execute(f"PRAGMA temp_store={config.db_temp_store}")
+    finally:
+        cursor.close()
+
+
+def _pool_options() -> dict:
+    """Parâmetros do pool de conexões (compartilhados pelas duas engines)"""
+    config = get_config()
+    return {
+        "pool_size": config.db_pool_size,
+        "max_overflow": config.db_max_overflow,
+        "pool_timeout": config.db_pool_timeout_seconds,
+        "pool_recycle": config.db_pool_recycle_seconds,
+        "pool_pre_ping": True,
+    }
+
+
+def _disable_driver_transactions(dbapi_connection, connection_record):
+    """
+    Desliga o controle de transação do driver sqlite3
+    
+    O driver só emite BEGIN antes de INSERT/UPDATE e nunca BEGIN IMMEDIATE.
+    Com isolation_level=None o BEGIN passa a ser emitido por _begin_transaction.
+    """
+    dbapi_connection.isolation_level = None
+
+
+def _begin_transaction(conn):
+    """
+    Emite o BEGIN de cada transação
+    
+    O modo vem da execution option "sqlite_begin" (padrão DEFERRED).
+    IMMEDIATE reserva o lock de escrita já no início da transação.
+    """
+    mode = conn.get_execution_options().get("sqlite_begin", "DEFERRED")
+    conn.exec_driver_sql(f"BEGIN {mode}")
 
 
-def init_database():
-    """Inicializa o banco de dados"""
+def _register_connect_hooks(engine: Engine):
+    """Registra os hooks executados a cada nova conexão física"""
+    event.listen(engine, "connect", _disable_driver_transactions)
+    event.listen(engine, "connect", _apply_sqlite_pragmas)
+    event.listen(engine, "begin", _begin_transaction)
+
+
+def init_database(database_url: Optional[str] = None):
+    """
+    Inicializa o banco de dados
+    
+    Args:
+        database_url: banco a usar (padrão: get_database_url()). Processos do
+            pool (spawn) não herdam o estado do pai e recebem o URL dele;
+            se o URL mudar, a engine anterior é descartada
+    """
     global _engine, _SessionLocal
     
+    database_url = database_url or get_database_url()
+    if _engine is not None and str(_engine.url) != database_url:
+        _engine.dispose()
+        _engine = None
+    
     if _engine is None:
-        database_url = get_database_url()
+        config = get_config()
         _engine = create_engine(
             database_url,
-            connect_args={"check_same_thread": False},  # Necessário para SQLite
-            echo=False  # True para debug SQL
+            connect_args={
+                "check_same_thread": False,  # Necessário para SQLite
+                "timeout": config.db_busy_timeout_ms / 1000,
+            },
+            echo=False,  # True para debug SQL
+            poolclass=QueuePool,
+            **_pool_options()
         )
+        _register_connect_hooks(_engine)
         _SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=_engine)
     
     return _engine
 
 
+def init_async_database() -> AsyncEngine:
+    """
+    Inicializa a engine assíncrona
+    
+    Conceito de SO: I/O não bloqueante
+    - Cada conexão aiosqlite roda em uma thread própria
+    - O event loop continua atendendo outras requisições durante a query
+    """
+    global _async_engine, _AsyncSessionLocal
+    
+    if _async_engine is None:
+        config = get_config()
+        _async_engine = create_async_engine(
+            get_async_database_url(),
+            connect_args={"timeout": config.db_busy_timeout_ms / 1000},
+            echo=False,  # True para debug SQL
+            poolclass=AsyncAdaptedQueuePool,  # aiosqlite usa NullPool por padrão
+            **_pool_options()
+        )
+        _register_connect_hooks(_async_engine.sync_engine)
+        # expire_on_commit=False: objetos continuam legíveis após o commit
+        # (substitui o expunge usado com a sessão síncrona)
+        _AsyncSessionLocal = async_sessionmaker(
+            bind=_async_engine,
+            autoflush=False,
+            expire_on_commit=False
+        )
+    
+    return _async_engine
+
+
 def get_engine():
     """Retorna engine do banco de dados"""
     if _engine is None:
@@ -61,6 +197,20 @@ def get_session_local():
     return _SessionLocal
 
 
+def get_async_engine() -> AsyncEngine:
+    """Retorna engine assíncrona do banco de dados"""
+    if _async_engine is None:
+        init_async_database()
+    return _async_engine
+
+
+def get_async_session_local() -> async_sessionmaker[AsyncSession]:
+    """Retorna a fábrica de sessões assíncronas"""
+    if _AsyncSessionLocal is None:
+        init_async_database()
+    return _AsyncSessionLocal
+
+
 @contextmanager
 def get_db_session() -> Generator[Session, None, None]:
     """
@@ -81,8 +231,100 @@ def get_db_session() -> Generator[Session, None, None]:
         db.close()
 
 
+@asynccontextmanager
+async def get_async_session(immediate: bool = False) -> AsyncGenerator[AsyncSession, None]:
+    """
+    Context manager assíncrono para obter sessão do banco
+    Uso:
+        async with get_async_session() as db:
+            result = await db.execute(select(Usuario))
+    
+    Args:
+        immediate: inicia a transação com BEGIN IMMEDIATE (lock de escrita
+            adquirido antes da primeira leitura - leitura e escrita atômicas)
+    """
+    AsyncSessionLocal = get_async_session_local()
+    async with AsyncSessionLocal() as db:
+        try:
+            if immediate:
+                await db.connection(execution_options={"sqlite_begin": "IMMEDIATE"})
+            yield db
+            await db.commit()
+        except Exception:
+            await db.rollback()
+            raise
+
+
+async def dispose_async_engine():
+    """Fecha as conexões da engine assíncrona (shutdown)"""
+    global _async_engine, _AsyncSessionLocal
+    if _async_engine is not None:
+        await _async_engine.dispose()
+        _async_engine = None
+        _AsyncSessionLocal = None
+
+
+def get_alembic_config():
+    """Retorna a configuração do Alembic (backend/alembic.ini)"""
+    from alembic.config import Config
+    
+    backend_dir = Path(__file__).parent.parent.parent
+    return Config(str(backend_dir / "alembic.ini"))
+
+
+def _revisao_do_schema(connection) -> str:
+    """
+    Revisão mais recente cujo schema já está no banco (sem alembic_version)
+    
+    Cada migração deixa um objeto característico; create_all com os models
+    atuais cria todos eles, bancos antigos só os das revisões que tinham.
+    Verificado da mais nova para a mais antiga.
+    """
+    from sqlalchemy import inspect
+    
+    inspector = inspect(connection)
+    tables = set(inspector.get_table_names())
+    triggers = set(connection.exec_driver_sql(
+        "SELECT name FROM sqlite_master WHERE type = 'trigger'"
+    ).scalars())
+    indices = {indice["name"] for indice in inspector.get_indexes("consultas")}
+    
+    marcadores = [
+        ("0005", "relatorio_jobs" in tables),
+        ("0004", "trg_medicos_versao_nome" in triggers),
+        ("0003", "versao_dados" in tables),
+        ("0002", "ix_consultas_medico_data_hora" in indices),
+    ]
+    for revisao, presente in marcadores:
+        if presente:
+            return revisao
+    return "0001"
+
+
+def run_migrations():
+    """
+    Aplica as migrações pendentes (alembic upgrade head)
+    
+    Bancos criados sem o Alembic (create_all antigo ou create_tables())
+    não possuem a tabela alembic_version: são marcados na revisão que o
+    schema já contém e então recebem apenas as migrações posteriores.
+    """
+    from alembic import command
+    from sqlalchemy import inspect
+    
+    engine = get_engine()
+    alembic_cfg = get_alembic_config()
+    
+    with engine.begin() as connection:
+        alembic_cfg.attributes["connection"] = connection
+        tables = set(inspect(connection).get_table_names())
+        if "alembic_version" not in tables and "consultas" in tables:
+            command.stamp(alembic_cfg, _revisao_do_schema(connection))
+        command.upgrade(alembic_cfg, "head")
+
+
 def create_tables():
-    """Cria todas as tabelas do banco de dados"""
+    """Cria todas as tabelas do banco de dados (sem migrações - uso em testes/scripts)"""
     from app.models.db_models import Usuario, Medico, Paciente, Consulta
     
     engine = get_engine()
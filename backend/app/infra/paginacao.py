@@ -0,0 +1,78 @@
+"""
+Paginação por cursor (keyset pagination)
+
+Conceitos de SO demonstrados:
+- Custo limitado por requisição: cada página lê no máximo `limit + 1`
+  linhas pelo índice, independente do tamanho da tabela (sem OFFSET,
+  que percorre e descarta todas as linhas anteriores)
+- Cursor opaco: a posição da última linha (chave de ordenação) é
+  serializada em base64, como um ponteiro de leitura de arquivo
+"""
+
+import base64
+import json
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Generic, List, Optional, Sequence, TypeVar
+
+from app.infra.config import get_config
+
+T = TypeVar("T")
+
+# Cabeçalho de resposta com o cursor da próxima página
+CABECALHO_CURSOR = "X-Next-Cursor"
+
+
+class CursorInvalidoError(ValueError):
+    """Cursor malformado ou de outra listagem"""
+
+
+@dataclass
+class Pagina(Generic[T]):
+    """Página de resultados e cursor da próxima (None na última)"""
+    itens: List[T]
+    proximo_cursor: Optional[str] = None
+
+
+def limite_efetivo(limit: Optional[int]) -> int:
+    """Aplica o limite padrão e o máximo configurados"""
+    config = get_config()
+    if not limit or limit < 1:
+        return config.paginacao_limite_padrao
+    return min(limit, config.paginacao_limite_maximo)
+
+
+def codificar_cursor(*chave: Any) -> str:
+    """Serializa a chave de ordenação da última linha da página"""
+    valores = [v.isoformat() if isinstance(v, datetime) else v for v in chave]
+    dados = json.dumps(valores, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(dados).decode().rstrip("=")
+
+
+def decodificar_cursor(cursor: str, tamanho: int) -> List[Any]:
+    """
+    Recupera a chave de ordenação de um cursor
+    
+    Raises:
+        CursorInvalidoError: se o cursor não tiver `tamanho` valores
+    """
+    try:
+        dados = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        valores = json.loads(dados)
+    except (ValueError, TypeError) as e:
+        raise CursorInvalidoError("Cursor inválido") from e
+    
+    if not isinstance(valores, list) or len(valores) != tamanho:
+        raise CursorInvalidoError("Cursor inválido")
+    return valores
+
+
+def montar_pagina(linhas: Sequence[T], limite: int, chave) -> Pagina[T]:
+    """
+    Monta a página a partir de `limite + 1` linhas lidas
+    A linha extra só indica que existe próxima página
+    """
+    itens = list(linhas[:limite])
+    if len(linhas) <= limite or not itens:
+        return Pagina(itens=itens)
+    return Pagina(itens=itens, proximo_cursor=codificar_cursor(*chave(itens[-1])))
@@ -7,6 +7,8 @@ Conceitos de SO demonstrados:
 - Gerenciamento de ciclo de vida da aplicação
 """
 
+import asyncio
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
@@ -15,6 +17,8 @@ import uvicorn
 from app.infra.config import get_config
 from app.infra.logger import setup_logging, get_logger
 from app.infra.file_manager import FileManager
+from app.infra.paginacao import CABECALHO_CURSOR
+from app.infra.batch_loader import EscopoRequisicaoMiddleware
 from app.controllers import (
     paciente_controller,
     medico_controller,
@@ -46,9 +50,10 @@ async def lifespan(app: FastAPI):
     logger.info("Estrutura de diretórios criada/verificada")
     
     # Inicializa banco de dados SQLite
-    from app.infra.database import init_database, create_tables
+    from app.infra.database import init_database, init_async_database, run_migrations
     init_database()
-    create_tables()
+    run_migrations()
+    init_async_database()
     logger.info("Banco de dados SQLite inicializado")
     
     # Cria usuário admin inicial se não existir
@@ -61,6 +66,14 @@ async def lifespan(app: FastAPI):
     
     # Shutdown
     logger.info("Encerrando aplicação...")
+    from app.services.relatorio_job_service import get_relatorio_job_service
+    await get_relatorio_job_service().encerrar()
+    from app.services.cache_service import get_cache_service
+    await asyncio.to_thread(get_cache_service().fechar)
+    from app.infra.concurrency import get_concurrency_manager
+    get_concurrency_manager().shutdown(wait=False)
+    from app.infra.database import dispose_async_engine
+    await dispose_async_engine()
     logger.info("Recursos liberados")
 
 
@@ -80,8 +93,12 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[CABECALHO_CURSOR],
 )
 
+# Carregadores em lote com escopo de requisição
+app.add_middleware(EscopoRequisicaoMiddleware)
+
 # Registra os controllers (routers)
 app.include_router(auth_controller.router, prefix="/api/v1", tags=["Autenticação"])
 app.include_router(paciente_controller.router, prefix="/api/v1", tags=["Pacientes"])
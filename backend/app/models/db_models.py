@@ -3,10 +3,12 @@ Modelos ORM do SQLAlchemy
 Define a estrutura das tabelas do banco de dados
 """
 
-from sqlalchemy import Column, String, Integer, Boolean, DateTime, Enum as SQLEnum, ForeignKey, Text
+from sqlalchemy import Column, String, Integer, Float, Boolean, DateTime, Enum as SQLEnum, ForeignKey, Text, Index, DDL, event
 from sqlalchemy.orm import relationship
 from datetime import datetime
+from typing import Optional
 import hashlib
+import json
 import enum
 
 from app.infra.database import Base
@@ -128,10 +130,16 @@ class Paciente(Base):
 class Consulta(Base):
     """Tabela de consultas"""
     __tablename__ = "consultas"
+    __table_args__ = (
+        # Índices compostos dos caminhos de acesso reais (ver migrations/versions/0002)
+        Index("ix_consultas_medico_data_hora", "medico_id", "data_hora"),
+        Index("ix_consultas_paciente_data_hora", "paciente_id", "data_hora"),
+        Index("ix_consultas_status_data_hora", "status", "data_hora"),
+    )
     
     id = Column(String(36), primary_key=True)
-    paciente_id = Column(String(36), ForeignKey("pacientes.id"), nullable=False, index=True)
-    medico_id = Column(String(36), ForeignKey("medicos.id"), nullable=False, index=True)
+    paciente_id = Column(String(36), ForeignKey("pacientes.id"), nullable=False)
+    medico_id = Column(String(36), ForeignKey("medicos.id"), nullable=False)
     data_hora = Column(DateTime, nullable=False, index=True)
     duracao_minutos = Column(Integer, nullable=False, default=30)
     status = Column(SQLEnum(StatusConsulta), nullable=False, default=StatusConsulta.AGENDADA)
@@ -141,6 +149,12 @@ class Consulta(Base):
     paciente = relationship("Paciente", back_populates="consultas", foreign_keys=[paciente_id])
     medico = relationship("Medico", back_populates="consultas", foreign_keys=[medico_id])
     
+    @property
+    def data_hora_fim(self) -> datetime:
+        """Calcula o horário de término da consulta"""
+        from datetime import timedelta
+        return self.data_hora + timedelta(minutes=self.duracao_minutos)
+    
     def to_dict(self):
         """Converte para dicionário"""
         from datetime import timedelta
@@ -154,3 +168,74 @@ class Consulta(Base):
             "status": self.status.value,
             "observacoes": self.observacoes
         }
+
+
+class JobRelatorio(Base):
+    """
+    Job de geração de relatório (ver migrations/versions/0005)
+    
+    Compartilhado entre workers: qualquer um consulta o status e pede o
+    cancelamento; o worker que executa o job grava o progresso e o
+    heartbeat (atualizado_em) e lê o pedido de cancelamento.
+    """
+    __tablename__ = "relatorio_jobs"
+    __table_args__ = (
+        Index("ix_relatorio_jobs_status", "status"),
+        Index("ix_relatorio_jobs_criado_em", "criado_em"),
+    )
+    
+    id = Column(String(36), primary_key=True)
+    tipo = Column(String(20), nullable=False)
+    formato = Column(String(10), nullable=False)
+    parametros = Column(Text, nullable=False)  # RelatorioRequest em JSON
+    status = Column(String(20), nullable=False)
+    progresso = Column(Float, nullable=False, default=0.0)
+    etapa = Column(String(100), nullable=True)
+    erro = Column(Text, nullable=True)
+    resultado_json = Column(Text, nullable=True)  # RelatorioResponse em JSON
+    cancelar = Column(Boolean, nullable=False, default=False)
+    worker = Column(String(100), nullable=False)  # host:pid que executa o job
+    criado_em = Column(DateTime, nullable=False)
+    iniciado_em = Column(DateTime, nullable=True)
+    finalizado_em = Column(DateTime, nullable=True)
+    atualizado_em = Column(DateTime, nullable=False)
+    
+    @property
+    def resultado(self) -> Optional[dict]:
+        """Resultado da geração (RelatorioResponse) decodificado"""
+        return json.loads(self.resultado_json) if self.resultado_json else None
+
+
+class VersaoDados(Base):
+    """
+    Contador de alterações por tabela
+    
+    Incrementado por triggers (ver migrations/versions/0003 e 0004): a
+    cada escrita em consultas e a cada mudança de nome de paciente ou de
+    nome/especialidade de médico. A soma identifica a versão dos dados
+    usada em um relatório, qualquer que seja o caminho de escrita.
+    """
+    __tablename__ = "versao_dados"
+    
+    nome = Column(String(50), primary_key=True)
+    versao = Column(Integer, nullable=False, default=0)
+
+
+# Mesmo DDL das migrações 0003 e 0004, para bancos criados por create_tables().
+# Triggers no evento do metadata: executados depois de todas as tabelas
+_TRIGGERS_VERSAO = [
+    ("consultas", "INSERT", "consultas_versao_insert"),
+    ("consultas", "UPDATE", "consultas_versao_update"),
+    ("consultas", "DELETE", "consultas_versao_delete"),
+    ("pacientes", "UPDATE OF nome", "pacientes_versao_nome"),
+    ("medicos", "UPDATE OF nome, especialidade", "medicos_versao_nome"),
+]
+
+event.listen(VersaoDados.__table__, "after_create", DDL(
+    "INSERT INTO versao_dados (nome, versao) VALUES ('consultas', 0), ('pacientes', 0), ('medicos', 0)"
+))
+for _tabela, _evento, _nome in _TRIGGERS_VERSAO:
+    event.listen(Base.metadata, "after_create", DDL(
+        f"CREATE TRIGGER IF NOT EXISTS trg_{_nome} AFTER {_evento} ON {_tabela} "
+        f"BEGIN UPDATE versao_dados SET versao = versao + 1 WHERE nome = '{_tabela}'; END"
+    ))
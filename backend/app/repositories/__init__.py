@@ -4,10 +4,12 @@ from app.repositories.base_repository import BaseRepository
 from app.repositories.paciente_repository import PacienteRepository
 from app.repositories.medico_repository import MedicoRepository
 from app.repositories.consulta_repository import ConsultaRepository
+from app.repositories.relatorio_job_repository import RelatorioJobRepository
 
 __all__ = [
     "BaseRepository",
     "PacienteRepository",
     "MedicoRepository",
     "ConsultaRepository",
+    "RelatorioJobRepository",
 ]
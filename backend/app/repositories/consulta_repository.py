@@ -2,106 +2,410 @@
 Repository de Consultas - SQLAlchemy
 """
 
-from typing import List, Optional
-from datetime import datetime, date
-from app.models.db_models import Consulta, StatusConsulta
-from app.infra.database import get_db_session
+from typing import AsyncIterator, List, Optional
+from datetime import datetime, date, timedelta
+from sqlalchemy import Row, Select, and_, func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.db_models import Consulta, Medico, Paciente, StatusConsulta, VersaoDados
+from app.infra.database import get_async_session
+from app.infra.paginacao import Pagina, CursorInvalidoError, decodificar_cursor, montar_pagina
+
+# Maior duração aceita pelo schema (ConsultaBase.duracao_minutos le=240).
+# Limita a janela de busca de consultas que podem sobrepor um horário.
+DURACAO_MAXIMA_MINUTOS = 240
+
+
+class ConflitoAgendamentoError(Exception):
+    """O médico já possui consulta que sobrepõe o horário solicitado"""
+    
+    def __init__(self, consulta: Consulta):
+        # Copia os valores: o rollback da transação expira a instância ORM
+        self.consulta_id = consulta.id
+        self.medico_id = consulta.medico_id
+        self.data_hora = consulta.data_hora
+        super().__init__(f"Conflito com a consulta {consulta.id} às {consulta.data_hora}")
 
 
 class ConsultaRepository:
-    """Repository para operações com Consultas usando SQLAlchemy"""
+    """Repository para operações com Consultas usando SQLAlchemy (async)"""
+    
+    async def _buscar_conflito(
+        self,
+        db: AsyncSession,
+        medico_id: str,
+        data_hora: datetime,
+        duracao_minutos: int,
+        ignorar_id: Optional[str] = None
+    ) -> Optional[Consulta]:
+        """
+        Retorna a primeira consulta não cancelada do médico que sobrepõe
+        o intervalo [data_hora, data_hora + duracao)
+        
+        Usa o índice (medico_id, data_hora) com uma janela limitada pela
+        duração máxima de uma consulta.
+        """
+        fim = data_hora + timedelta(minutes=duracao_minutos)
+        stmt = select(Consulta).where(
+            Consulta.medico_id == medico_id,
+            Consulta.data_hora < fim,
+            Consulta.data_hora > data_hora - timedelta(minutes=DURACAO_MAXIMA_MINUTOS),
+            Consulta.status != StatusConsulta.CANCELADA
+        ).order_by(Consulta.data_hora)
+        if ignorar_id:
+            stmt = stmt.where(Consulta.id != ignorar_id)
+        
+        for existente in await db.scalars(stmt):
+            if existente.data_hora_fim > data_hora:
+                return existente
+        return None
+    
+    async def agendar(self, consulta: Consulta) -> Consulta:
+        """
+        Cria consulta se o horário do médico estiver livre
+        
+        Conceito de SO: Seção crítica no banco
+        - Verificação de conflito e INSERT na mesma transação BEGIN IMMEDIATE
+        - Nenhuma outra escrita ocorre entre a leitura e o INSERT
+        
+        Raises:
+            ConflitoAgendamentoError: horário já ocupado
+        """
+        async with get_async_session(immediate=True) as db:
+            conflito = await self._buscar_conflito(
+                db, consulta.medico_id, consulta.data_hora, consulta.duracao_minutos
+            )
+            if conflito:
+                raise ConflitoAgendamentoError(conflito)
+            
+            db.add(consulta)
+            await db.flush()
+            await db.refresh(consulta)
+            return consulta
+    
+    async def reagendar(self, consulta_id: str, consulta: Consulta) -> Optional[Consulta]:
+        """
+        Atualiza consulta validando conflito de horário na mesma transação
+        
+        Raises:
+            ConflitoAgendamentoError: novo horário já ocupado
+        """
+        async with get_async_session(immediate=True) as db:
+            db_consulta = await db.get(Consulta, consulta_id)
+            if not db_consulta:
+                return None
+            
+            if consulta.status != StatusConsulta.CANCELADA:
+                conflito = await self._buscar_conflito(
+                    db, consulta.medico_id, consulta.data_hora,
+                    consulta.duracao_minutos, ignorar_id=consulta_id
+                )
+                if conflito:
+                    raise ConflitoAgendamentoError(conflito)
+            
+            db_consulta.data_hora = consulta.data_hora
+            db_consulta.duracao_minutos = consulta.duracao_minutos
+            db_consulta.status = consulta.status
+            db_consulta.observacoes = consulta.observacoes
+            await db.flush()
+            await db.refresh(db_consulta)
+            return db_consulta
     
     async def create(self, consulta: Consulta) -> Consulta:
         """Cria nova consulta"""
-        with get_db_session() as db:
+        async with get_async_session() as db:
             db.add(consulta)
-            db.flush()
-            db.refresh(consulta)
-            db.expunge(consulta)
+            await db.flush()
+            await db.refresh(consulta)
             return consulta
     
     async def find_by_id(self, consulta_id: str) -> Optional[Consulta]:
         """Busca consulta por ID"""
-        with get_db_session() as db:
-            consulta = db.query(Consulta).filter(Consulta.id == consulta_id).first()
-            if consulta:
-                db.expunge(consulta)
-            return consulta
+        async with get_async_session() as db:
+            return await db.get(Consulta, consulta_id)
     
     async def find_by_paciente(self, paciente_id: str) -> List[Consulta]:
         """Busca consultas de um paciente"""
-        with get_db_session() as db:
-            consultas = db.query(Consulta).filter(Consulta.paciente_id == paciente_id).all()
-            for c in consultas:
-                db.expunge(c)
-            return consultas
+        async with get_async_session() as db:
+            result = await db.scalars(
+                select(Consulta).where(Consulta.paciente_id == paciente_id)
+            )
+            return list(result)
     
     async def find_by_medico(self, medico_id: str) -> List[Consulta]:
         """Busca consultas de um médico"""
-        with get_db_session() as db:
-            consultas = db.query(Consulta).filter(Consulta.medico_id == medico_id).all()
-            for c in consultas:
-                db.expunge(c)
-            return consultas
+        async with get_async_session() as db:
+            result = await db.scalars(
+                select(Consulta).where(Consulta.medico_id == medico_id)
+            )
+            return list(result)
     
     async def find_by_data(self, data: date) -> List[Consulta]:
         """Busca consultas em uma data específica"""
-        with get_db_session() as db:
-            start = datetime.combine(data, datetime.min.time())
-            end = datetime.combine(data, datetime.max.time())
-            consultas = db.query(Consulta).filter(
-                Consulta.data_hora >= start,
-                Consulta.data_hora <= end
-            ).all()
-            for c in consultas:
-                db.expunge(c)
-            return consultas
-    
-    async def find_by_periodo(self, data_inicio: datetime, data_fim: datetime) -> List[Consulta]:
-        """Busca consultas em um período"""
-        with get_db_session() as db:
-            consultas = db.query(Consulta).filter(
-                Consulta.data_hora >= data_inicio,
-                Consulta.data_hora <= data_fim
-            ).all()
-            for c in consultas:
-                db.expunge(c)
-            return consultas
+        start = datetime.combine(data, datetime.min.time())
+        end = datetime.combine(data, datetime.max.time())
+        async with get_async_session() as db:
+            result = await db.scalars(
+                select(Consulta).where(
+                    Consulta.data_hora >= start,
+                    Consulta.data_hora <= end
+                )
+            )
+            return list(result)
+    
+    async def find_by_periodo(
+        self,
+        data_inicio: datetime,
+        data_fim: datetime,
+        medico_ids: Optional[List[str]] = None
+    ) -> List[Consulta]:
+        """Busca consultas em um período (opcionalmente de um conjunto de médicos)"""
+        stmt = select(Consulta).where(
+            Consulta.data_hora >= data_inicio,
+            Consulta.data_hora <= data_fim
+        )
+        if medico_ids is not None:
+            stmt = stmt.where(Consulta.medico_id.in_(medico_ids))
+        
+        async with get_async_session() as db:
+            result = await db.scalars(stmt)
+            return list(result)
     
     async def find_by_medico_data(self, medico_id: str, data: date) -> List[Consulta]:
         """Busca consultas de um médico em uma data específica"""
-        with get_db_session() as db:
-            start = datetime.combine(data, datetime.min.time())
-            end = datetime.combine(data, datetime.max.time())
-            consultas = db.query(Consulta).filter(
-                Consulta.medico_id == medico_id,
-                Consulta.data_hora >= start,
-                Consulta.data_hora <= end
-            ).all()
-            for c in consultas:
-                db.expunge(c)
-            return consultas
+        start = datetime.combine(data, datetime.min.time())
+        end = datetime.combine(data, datetime.max.time())
+        async with get_async_session() as db:
+            result = await db.scalars(
+                select(Consulta).where(
+                    Consulta.medico_id == medico_id,
+                    Consulta.data_hora >= start,
+                    Consulta.data_hora <= end
+                )
+            )
+            return list(result)
+    
+    async def find_ativas_by_medico(self, medico_id: str, a_partir_de: datetime) -> List[Consulta]:
+        """Busca consultas não canceladas de um médico a partir de uma data"""
+        async with get_async_session() as db:
+            result = await db.scalars(
+                select(Consulta).where(
+                    Consulta.medico_id == medico_id,
+                    Consulta.data_hora >= a_partir_de,
+                    Consulta.status != StatusConsulta.CANCELADA
+                ).order_by(Consulta.data_hora)
+            )
+            return list(result)
     
     async def find_agendadas(self) -> List[Consulta]:
         """Retorna apenas consultas agendadas (não canceladas/realizadas)"""
-        with get_db_session() as db:
-            consultas = db.query(Consulta).filter(Consulta.status == StatusConsulta.AGENDADA).all()
-            for c in consultas:
-                db.expunge(c)
-            return consultas
+        async with get_async_session() as db:
+            result = await db.scalars(
+                select(Consulta).where(Consulta.status == StatusConsulta.AGENDADA)
+            )
+            return list(result)
     
     async def find_all(self) -> List[Consulta]:
         """Lista todas as consultas"""
-        with get_db_session() as db:
-            consultas = db.query(Consulta).all()
-            for c in consultas:
-                db.expunge(c)
-            return consultas
+        async with get_async_session() as db:
+            result = await db.scalars(select(Consulta))
+            return list(result)
+    
+    def _filtrar_pagina(
+        self,
+        stmt: Select,
+        limite: int,
+        after: Optional[str],
+        paciente_id: Optional[str] = None,
+        medico_id: Optional[str] = None,
+        status: Optional[StatusConsulta] = None,
+        data_inicio: Optional[datetime] = None,
+        data_fim: Optional[datetime] = None
+    ) -> Select:
+        """Aplica filtros, ordem (data_hora, id) e posição do cursor"""
+        stmt = self._aplicar_filtros(
+            stmt.order_by(Consulta.data_hora, Consulta.id).limit(limite + 1),
+            paciente_id, medico_id, status, data_inicio, data_fim
+        )
+        if after:
+            data_hora, ultimo_id = decodificar_cursor(after, 2)
+            try:
+                data_hora = datetime.fromisoformat(data_hora)
+            except (TypeError, ValueError) as e:
+                raise CursorInvalidoError("Cursor inválido") from e
+            stmt = stmt.where(or_(
+                Consulta.data_hora > data_hora,
+                and_(Consulta.data_hora == data_hora, Consulta.id > ultimo_id)
+            ))
+        return stmt
+    
+    def _aplicar_filtros(
+        self,
+        stmt: Select,
+        paciente_id: Optional[str] = None,
+        medico_id: Optional[str] = None,
+        status: Optional[StatusConsulta] = None,
+        data_inicio: Optional[datetime] = None,
+        data_fim: Optional[datetime] = None
+    ) -> Select:
+        """Filtros por paciente, médico ou status usam os índices compostos"""
+        if paciente_id:
+            stmt = stmt.where(Consulta.paciente_id == paciente_id)
+        if medico_id:
+            stmt = stmt.where(Consulta.medico_id == medico_id)
+        if status:
+            stmt = stmt.where(Consulta.status == status)
+        if data_inicio:
+            stmt = stmt.where(Consulta.data_hora >= data_inicio)
+        if data_fim:
+            stmt = stmt.where(Consulta.data_hora <= data_fim)
+        return stmt
+    
+    def select_relatorio(
+        self,
+        paciente_id: Optional[str] = None,
+        medico_id: Optional[str] = None,
+        data_inicio: Optional[datetime] = None,
+        data_fim: Optional[datetime] = None
+    ) -> Select:
+        """
+        Colunas das consultas filtradas, com nomes do paciente e do médico
+        e a especialidade em um único JOIN, em ordem (data_hora, id)
+        Também executada com a sessão síncrona (processos do pool)
+        """
+        return self._aplicar_filtros(
+            select(
+                Consulta.id,
+                Consulta.paciente_id,
+                Paciente.nome.label("paciente_nome"),
+                Consulta.medico_id,
+                Medico.nome.label("medico_nome"),
+                Medico.especialidade.label("medico_especialidade"),
+                Consulta.data_hora,
+                Consulta.duracao_minutos,
+                Consulta.status,
+                Consulta.observacoes
+            )
+            .outerjoin(Paciente, Paciente.id == Consulta.paciente_id)
+            .outerjoin(Medico, Medico.id == Consulta.medico_id)
+            .order_by(Consulta.data_hora, Consulta.id),
+            paciente_id, medico_id, None, data_inicio, data_fim
+        )
+    
+    async def find_relatorio(
+        self,
+        paciente_id: Optional[str] = None,
+        medico_id: Optional[str] = None,
+        data_inicio: Optional[datetime] = None,
+        data_fim: Optional[datetime] = None
+    ) -> List[Row]:
+        """Todas as linhas de select_relatorio (relatórios em arquivo)"""
+        stmt = self.select_relatorio(paciente_id, medico_id, data_inicio, data_fim)
+        async with get_async_session() as db:
+            return list(await db.execute(stmt))
+    
+    async def stream_lotes(
+        self,
+        paciente_id: Optional[str] = None,
+        medico_id: Optional[str] = None,
+        data_inicio: Optional[datetime] = None,
+        data_fim: Optional[datetime] = None,
+        tamanho_lote: int = 500
+    ) -> AsyncIterator[List[Row]]:
+        """
+        Percorre as consultas filtradas em lotes, em ordem (data_hora, id)
+        
+        Conceito de SO: E/S em fluxo com buffer limitado
+        - Cursor do servidor com yield_per: no máximo `tamanho_lote` linhas
+          em memória, independente do total
+        - Seleciona colunas (não entidades): nada fica no identity map
+        - A transação de leitura fica aberta enquanto o consumidor itera
+        """
+        stmt = self.select_relatorio(
+            paciente_id, medico_id, data_inicio, data_fim
+        ).execution_options(yield_per=tamanho_lote)
+        
+        async with get_async_session() as db:
+            result = await db.stream(stmt)
+            async for lote in result.partitions():
+                yield lote
+    
+    def _select_detalhada(self) -> Select:
+        """Consulta + nomes do paciente e do médico em um único JOIN"""
+        return (
+            select(
+                Consulta,
+                Paciente.nome.label("paciente_nome"),
+                Medico.nome.label("medico_nome"),
+                Medico.especialidade.label("medico_especialidade")
+            )
+            .outerjoin(Paciente, Paciente.id == Consulta.paciente_id)
+            .outerjoin(Medico, Medico.id == Consulta.medico_id)
+        )
+    
+    async def find_pagina(
+        self,
+        limite: int,
+        after: Optional[str] = None,
+        paciente_id: Optional[str] = None,
+        medico_id: Optional[str] = None,
+        status: Optional[StatusConsulta] = None
+    ) -> Pagina[Consulta]:
+        """Página de consultas ordenada por (data_hora, id) - keyset"""
+        stmt = self._filtrar_pagina(
+            select(Consulta), limite, after,
+            paciente_id=paciente_id, medico_id=medico_id, status=status
+        )
+        async with get_async_session() as db:
+            result = await db.scalars(stmt)
+            return montar_pagina(list(result), limite, lambda c: (c.data_hora, c.id))
+    
+    async def find_detalhada_by_id(self, consulta_id: str) -> Optional[Row]:
+        """Busca consulta com nomes do paciente e do médico (uma query)"""
+        async with get_async_session() as db:
+            result = await db.execute(
+                self._select_detalhada().where(Consulta.id == consulta_id)
+            )
+            return result.first()
+    
+    async def find_detalhadas_pagina(
+        self,
+        limite: int,
+        after: Optional[str] = None,
+        paciente_id: Optional[str] = None,
+        medico_id: Optional[str] = None,
+        status: Optional[StatusConsulta] = None,
+        data_inicio: Optional[datetime] = None,
+        data_fim: Optional[datetime] = None
+    ) -> Pagina[Row]:
+        """
+        Página de consultas detalhadas (keyset) em um único JOIN
+        Linhas: (Consulta, paciente_nome, medico_nome, medico_especialidade)
+        """
+        stmt = self._filtrar_pagina(
+            self._select_detalhada(), limite, after,
+            paciente_id=paciente_id, medico_id=medico_id, status=status,
+            data_inicio=data_inicio, data_fim=data_fim
+        )
+        async with get_async_session() as db:
+            result = await db.execute(stmt)
+            return montar_pagina(
+                list(result), limite, lambda r: (r.Consulta.data_hora, r.Consulta.id)
+            )
+    
+    async def versao_dados(self) -> int:
+        """
+        Versão dos dados dos relatórios: soma dos contadores de alteração
+        (consultas, nomes de pacientes, nomes/especialidades de médicos),
+        incrementados por trigger
+        """
+        async with get_async_session() as db:
+            versao = await db.scalar(select(func.sum(VersaoDados.versao)))
+            return versao or 0
     
     async def update(self, consulta_id: str, consulta: Consulta) -> Consulta:
         """Atualiza consulta"""
-        with get_db_session() as db:
-            db_consulta = db.query(Consulta).filter(Consulta.id == consulta_id).first()
+        async with get_async_session() as db:
+            db_consulta = await db.get(Consulta, consulta_id)
             if db_consulta:
                 db_consulta.paciente_id = consulta.paciente_id
                 db_consulta.medico_id = consulta.medico_id
@@ -109,18 +413,16 @@ class ConsultaRepository:
                 db_consulta.duracao_minutos = consulta.duracao_minutos
                 db_consulta.status = consulta.status
                 db_consulta.observacoes = consulta.observacoes
-                db.flush()
-                db.refresh(db_consulta)
-                db.expunge(db_consulta)
+                await db.flush()
+                await db.refresh(db_consulta)
                 return db_consulta
             return None
     
     async def delete(self, consulta_id: str) -> bool:
         """Remove consulta"""
-        with get_db_session() as db:
-            db_consulta = db.query(Consulta).filter(Consulta.id == consulta_id).first()
+        async with get_async_session() as db:
+            db_consulta = await db.get(Consulta, consulta_id)
             if db_consulta:
-                db.delete(db_consulta)
+                await db.delete(db_consulta)
                 return True
             return False
-
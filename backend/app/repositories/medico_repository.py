@@ -3,70 +3,87 @@ Repository de Médicos - SQLAlchemy
 """
 
 from typing import List, Optional
-import json
+from sqlalchemy import select
 from app.models.db_models import Medico
-from app.infra.database import get_db_session
+from app.infra.database import get_async_session
+from app.infra.paginacao import Pagina, decodificar_cursor, montar_pagina
 
 
 class MedicoRepository:
-    """Repository para operações com Médicos usando SQLAlchemy"""
+    """Repository para operações com Médicos usando SQLAlchemy (async)"""
     
     async def create(self, medico: Medico) -> Medico:
         """Cria novo médico"""
-        with get_db_session() as db:
+        async with get_async_session() as db:
             db.add(medico)
-            db.flush()
-            db.refresh(medico)
-            db.expunge(medico)
+            await db.flush()
+            await db.refresh(medico)
             return medico
     
     async def find_by_id(self, medico_id: str) -> Optional[Medico]:
         """Busca médico por ID"""
-        with get_db_session() as db:
-            medico = db.query(Medico).filter(Medico.id == medico_id).first()
-            if medico:
-                db.expunge(medico)
-            return medico
+        async with get_async_session() as db:
+            return await db.get(Medico, medico_id)
+    
+    async def find_by_ids(self, medico_ids: List[str]) -> List[Medico]:
+        """Busca vários médicos por ID em uma única query"""
+        async with get_async_session() as db:
+            result = await db.scalars(select(Medico).where(Medico.id.in_(medico_ids)))
+            return list(result)
     
     async def find_by_crm(self, crm: str) -> Optional[Medico]:
         """Busca médico por CRM"""
-        with get_db_session() as db:
-            medico = db.query(Medico).filter(Medico.crm == crm).first()
-            if medico:
-                db.expunge(medico)
-            return medico
+        async with get_async_session() as db:
+            return await db.scalar(select(Medico).where(Medico.crm == crm))
     
     async def find_by_especialidade(self, especialidade: str) -> List[Medico]:
         """Busca médicos por especialidade"""
-        with get_db_session() as db:
-            medicos = db.query(Medico).filter(
-                Medico.especialidade == especialidade,
-                Medico.ativo == True
-            ).all()
-            for m in medicos:
-                db.expunge(m)
-            return medicos
+        async with get_async_session() as db:
+            result = await db.scalars(
+                select(Medico).where(
+                    Medico.especialidade == especialidade,
+                    Medico.ativo == True
+                )
+            )
+            return list(result)
     
     async def find_ativos(self) -> List[Medico]:
         """Retorna apenas médicos ativos"""
-        with get_db_session() as db:
-            medicos = db.query(Medico).filter(Medico.ativo == True).all()
-            for m in medicos:
-                db.expunge(m)
-            return medicos
+        async with get_async_session() as db:
+            result = await db.scalars(select(Medico).where(Medico.ativo == True))
+            return list(result)
     
     async def find_all(self) -> List[Medico]:
         """Lista todos os médicos"""
-        with get_db_session() as db:
-            medicos = db.query(Medico).all()
-            for m in medicos:
-                db.expunge(m)
-            return medicos
+        async with get_async_session() as db:
+            result = await db.scalars(select(Medico))
+            return list(result)
+    
+    async def find_pagina(
+        self,
+        limite: int,
+        after: Optional[str] = None,
+        apenas_ativos: bool = False,
+        especialidade: Optional[str] = None
+    ) -> Pagina[Medico]:
+        """Página de médicos ordenada por id (keyset)"""
+        stmt = select(Medico).order_by(Medico.id).limit(limite + 1)
+        if apenas_ativos:
+            stmt = stmt.where(Medico.ativo == True)
+        if especialidade:
+            stmt = stmt.where(Medico.especialidade == especialidade)
+        if after:
+            (ultimo_id,) = decodificar_cursor(after, 1)
+            stmt = stmt.where(Medico.id > ultimo_id)
+        
+        async with get_async_session() as db:
+            result = await db.scalars(stmt)
+            return montar_pagina(list(result), limite, lambda m: (m.id,))
     
     async def update(self, medico_id: str, medico: Medico) -> Medico:
         """Atualiza médico"""
-        with get_db_session() as db:
-            db_medico = db.query(Medico).filter(Medico.id == medico_id).first()
+        async with get_async_session() as db:
+            db_medico = await db.get(Medico, medico_id)
             if db_medico:
                 db_medico.nome = medico.nome
                 db_medico.crm = medico.crm
@@ -75,18 +92,16 @@ class MedicoRepository:
                 db_medico.email = medico.email
                 db_medico.ativo = medico.ativo
                 db_medico.horarios_atendimento = medico.horarios_atendimento
-                db.flush()
-                db.refresh(db_medico)
-                db.expunge(db_medico)
+                await db.flush()
+                await db.refresh(db_medico)
                 return db_medico
             return None
     
     async def delete(self, medico_id: str) -> bool:
         """Remove médico"""
-        with get_db_session() as db:
-            db_medico = db.query(Medico).filter(Medico.id == medico_id).first()
+        async with get_async_session() as db:
+            db_medico = await db.get(Medico, medico_id)
             if db_medico:
-                db.delete(db_medico)
+                await db.delete(db_medico)
                 return True
             return False
-
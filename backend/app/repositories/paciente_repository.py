@@ -3,58 +3,73 @@ Repository de Pacientes - SQLAlchemy
 """
 
 from typing import List, Optional
+from sqlalchemy import select
 from app.models.db_models import Paciente
-from app.infra.database import get_db_session
+from app.infra.database import get_async_session
+from app.infra.paginacao import Pagina, decodificar_cursor, montar_pagina
 
 
 class PacienteRepository:
-    """Repository para operações com Pacientes usando SQLAlchemy"""
+    """Repository para operações com Pacientes usando SQLAlchemy (async)"""
     
     async def create(self, paciente: Paciente) -> Paciente:
         """Cria novo paciente"""
-        with get_db_session() as db:
+        async with get_async_session() as db:
             db.add(paciente)
-            db.flush()
-            db.refresh(paciente)
-            db.expunge(paciente)
+            await db.flush()
+            await db.refresh(paciente)
             return paciente
     
     async def find_by_id(self, paciente_id: str) -> Optional[Paciente]:
         """Busca paciente por ID"""
-        with get_db_session() as db:
-            paciente = db.query(Paciente).filter(Paciente.id == paciente_id).first()
-            if paciente:
-                db.expunge(paciente)
-            return paciente
+        async with get_async_session() as db:
+            return await db.get(Paciente, paciente_id)
+    
+    async def find_by_ids(self, paciente_ids: List[str]) -> List[Paciente]:
+        """Busca vários pacientes por ID em uma única query"""
+        async with get_async_session() as db:
+            result = await db.scalars(select(Paciente).where(Paciente.id.in_(paciente_ids)))
+            return list(result)
     
     async def find_by_cpf(self, cpf: str) -> Optional[Paciente]:
         """Busca paciente por CPF"""
-        with get_db_session() as db:
-            paciente = db.query(Paciente).filter(Paciente.cpf == cpf).first()
-            if paciente:
-                db.expunge(paciente)
-            return paciente
+        async with get_async_session() as db:
+            return await db.scalar(select(Paciente).where(Paciente.cpf == cpf))
     
     async def find_ativos(self) -> List[Paciente]:
         """Retorna apenas pacientes ativos"""
-        with get_db_session() as db:
-            pacientes = db.query(Paciente).filter(Paciente.ativo == True).all()
-            for p in pacientes:
-                db.expunge(p)
-            return pacientes
+        async with get_async_session() as db:
+            result = await db.scalars(select(Paciente).where(Paciente.ativo == True))
+            return list(result)
     
     async def find_all(self) -> List[Paciente]:
         """Lista todos os pacientes"""
-        with get_db_session() as db:
-            pacientes = db.query(Paciente).all()
-            for p in pacientes:
-                db.expunge(p)
-            return pacientes
+        async with get_async_session() as db:
+            result = await db.scalars(select(Paciente))
+            return list(result)
+    
+    async def find_pagina(
+        self,
+        limite: int,
+        after: Optional[str] = None,
+        apenas_ativos: bool = False
+    ) -> Pagina[Paciente]:
+        """Página de pacientes ordenada por id (keyset)"""
+        stmt = select(Paciente).order_by(Paciente.id).limit(limite + 1)
+        if apenas_ativos:
+            stmt = stmt.where(Paciente.ativo == True)
+        if after:
+            (ultimo_id,) = decodificar_cursor(after, 1)
+            stmt = stmt.where(Paciente.id > ultimo_id)
+        
+        async with get_async_session() as db:
+            result = await db.scalars(stmt)
+            return montar_pagina(list(result), limite, lambda p: (p.id,))
     
     async def update(self, paciente_id: str, paciente: Paciente) -> Paciente:
         """Atualiza paciente"""
-        with get_db_session() as db:
-            db_paciente = db.query(Paciente).filter(Paciente.id == paciente_id).first()
+        async with get_async_session() as db:
+            db_paciente = await db.get(Paciente, paciente_id)
             if db_paciente:
                 db_paciente.nome = paciente.nome
                 db_paciente.cpf = paciente.cpf
@@ -63,18 +78,16 @@ class PacienteRepository:
                 db_paciente.email = paciente.email
                 db_paciente.ativo = paciente.ativo
                 db_paciente.endereco = paciente.endereco
-                db.flush()
-                db.refresh(db_paciente)
-                db.expunge(db_paciente)
+                await db.flush()
+                await db.refresh(db_paciente)
                 return db_paciente
             return None
     
     async def delete(self, paciente_id: str) -> bool:
         """Remove paciente"""
-        with get_db_session() as db:
-            db_paciente = db.query(Paciente).filter(Paciente.id == paciente_id).first()
+        async with get_async_session() as db:
+            db_paciente = await db.get(Paciente, paciente_id)
             if db_paciente:
-                db.delete(db_paciente)
+                await db.delete(db_paciente)
                 return True
             return False
-
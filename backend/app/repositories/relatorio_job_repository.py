@@ -0,0 +1,126 @@
+"""
+Repository de Jobs de Relatório - SQLAlchemy
+"""
+
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import delete, func, select, update
+
+from app.models.db_models import JobRelatorio
+from app.schemas.relatorio_schema import StatusJobRelatorio
+from app.infra.database import get_async_session
+
+_ATIVOS = (StatusJobRelatorio.PENDENTE.value, StatusJobRelatorio.EXECUTANDO.value)
+
+
+class RelatorioJobRepository:
+    """Repository para o estado compartilhado dos jobs de relatório (async)"""
+    
+    async def create_se_houver_vaga(self, job: JobRelatorio, max_ativos: int) -> bool:
+        """
+        Cria o job se houver menos que `max_ativos` jobs ativos
+        
+        Conceito de SO: Seção crítica no banco
+        - Contagem e INSERT na mesma transação BEGIN IMMEDIATE: o limite
+          vale para todos os workers, sem corrida entre eles
+        """
+        async with get_async_session(immediate=True) as db:
+            ativos = await db.scalar(
+                select(func.count()).select_from(JobRelatorio).where(JobRelatorio.status.in_(_ATIVOS))
+            )
+            if ativos >= max_ativos:
+                return False
+            db.add(job)
+            return True
+    
+    async def find_by_id(self, job_id: str) -> Optional[JobRelatorio]:
+        """Busca job por ID"""
+        async with get_async_session() as db:
+            return await db.get(JobRelatorio, job_id)
+    
+    async def find_recentes(self) -> List[JobRelatorio]:
+        """Jobs do mais recente ao mais antigo"""
+        async with get_async_session() as db:
+            result = await db.scalars(select(JobRelatorio).order_by(JobRelatorio.criado_em.desc()))
+            return list(result)
+    
+    async def update(self, job_id: str, **campos) -> None:
+        """Atualiza campos do job (atualizado_em incluso)"""
+        async with get_async_session() as db:
+            await db.execute(
+                update(JobRelatorio)
+                .where(JobRelatorio.id == job_id)
+                .values(atualizado_em=datetime.now(), **campos)
+            )
+    
+    async def solicitar_cancelamento(self, job_id: str) -> bool:
+        """Marca o pedido de cancelamento; False se o job já finalizou"""
+        async with get_async_session() as db:
+            result = await db.execute(
+                update(JobRelatorio)
+                .where(JobRelatorio.id == job_id, JobRelatorio.status.in_(_ATIVOS))
+                .values(cancelar=True, etapa="cancelando", atualizado_em=datetime.now())
+            )
+            return result.rowcount > 0
+    
+    async def sincronizar(self, progresso: Dict[str, Tuple[float, Optional[str]]]) -> List[str]:
+        """
+        Grava progresso e heartbeat dos jobs locais de um worker
+        
+        Args:
+            progresso: job_id -> (fração, etapa)
+        
+        Returns:
+            IDs, entre os informados, com cancelamento solicitado
+        """
+        agora = datetime.now()
+        async with get_async_session() as db:
+            for job_id, (fracao, etapa) in progresso.items():
+                await db.execute(
+                    update(JobRelatorio)
+                    .where(JobRelatorio.id == job_id, JobRelatorio.cancelar == False)
+                    .values(progresso=fracao, etapa=etapa, atualizado_em=agora)
+                )
+            # Cancelados mantêm a etapa "cancelando", mas o heartbeat segue
+            await db.execute(
+                update(JobRelatorio)
+                .where(JobRelatorio.id.in_(list(progresso)), JobRelatorio.cancelar == True)
+                .values(atualizado_em=agora)
+            )
+            result = await db.scalars(
+                select(JobRelatorio.id).where(
+                    JobRelatorio.id.in_(list(progresso)),
+                    JobRelatorio.cancelar == True
+                )
+            )
+            return list(result)
+    
+    async def marcar_orfaos(self, sem_heartbeat_desde: datetime) -> int:
+        """
+        Jobs ativos sem heartbeat (worker encerrado) passam a FALHOU
+        Liberam as vagas do limite global de jobs ativos
+        """
+        async with get_async_session() as db:
+            result = await db.execute(
+                update(JobRelatorio)
+                .where(JobRelatorio.status.in_(_ATIVOS), JobRelatorio.atualizado_em < sem_heartbeat_desde)
+                .values(
+                    status=StatusJobRelatorio.FALHOU.value,
+                    etapa=None,
+                    erro="Worker encerrado durante a geração",
+                    finalizado_em=datetime.now()
+                )
+            )
+            return result.rowcount
+    
+    async def delete_finalizados(self, antes_de: datetime) -> int:
+        """Remove jobs finalizados antes da data (retenção)"""
+        async with get_async_session() as db:
+            result = await db.execute(
+                delete(JobRelatorio).where(
+                    JobRelatorio.status.not_in(_ATIVOS),
+                    JobRelatorio.finalizado_em < antes_de
+                )
+            )
+            return result.rowcount
@@ -14,13 +14,17 @@ from app.schemas.consulta_schema import (
     ConsultaCreate,
     ConsultaUpdate,
     ConsultaResponse,
-    ConsultaDetalhada
+    ConsultaDetalhada,
+    DisponibilidadeMedico,
+    HorarioLivre
 )
 from app.schemas.relatorio_schema import (
     RelatorioRequest,
     RelatorioResponse,
     TipoRelatorio,
-    FormatoRelatorio
+    FormatoRelatorio,
+    StatusJobRelatorio,
+    RelatorioJobResponse
 )
 
 __all__ = [
@@ -34,8 +38,12 @@ __all__ = [
     "ConsultaUpdate",
     "ConsultaResponse",
     "ConsultaDetalhada",
+    "DisponibilidadeMedico",
+    "HorarioLivre",
     "RelatorioRequest",
     "RelatorioResponse",
     "TipoRelatorio",
     "FormatoRelatorio",
+    "StatusJobRelatorio",
+    "RelatorioJobResponse",
 ]
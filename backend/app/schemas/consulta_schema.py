@@ -5,7 +5,7 @@ Validação de dados de entrada/saída da API
 
 from pydantic import BaseModel, Field, field_validator
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Dict, List, Optional
 from app.models.consulta import StatusConsulta
 
 
@@ -16,6 +16,10 @@ class ConsultaBase(BaseModel):
     data_hora: datetime
     duracao_minutos: int = Field(default=30, ge=15, le=240)
     observacoes: Optional[str] = Field(None, max_length=1000)
+
+
+class ConsultaCreate(ConsultaBase):
+    """Schema para criação de consulta"""
     
     @field_validator('data_hora')
     @classmethod
@@ -31,11 +35,6 @@ class ConsultaBase(BaseModel):
         return v
 
 
-class ConsultaCreate(ConsultaBase):
-    """Schema para criação de consulta"""
-    pass
-
-
 class ConsultaUpdate(BaseModel):
     """Schema para atualização de consulta"""
     data_hora: Optional[datetime] = None
@@ -58,3 +57,19 @@ class ConsultaDetalhada(ConsultaResponse):
     paciente_nome: Optional[str] = None
     medico_nome: Optional[str] = None
     medico_especialidade: Optional[str] = None
+
+
+class DisponibilidadeMedico(BaseModel):
+    """Horários disponíveis de um médico em um período"""
+    medico_id: str
+    medico_nome: str
+    especialidade: str
+    horarios: Dict[str, List[str]]  # data (YYYY-MM-DD) -> horários livres (HH:MM)
+
+
+class HorarioLivre(BaseModel):
+    """Horário livre de um médico (busca dos próximos horários)"""
+    medico_id: str
+    medico_nome: str
+    especialidade: str
+    data_hora: datetime
@@ -4,9 +4,26 @@ Validação de dados de entrada/saída da API
 """
 
 from pydantic import BaseModel, Field, validator
-from typing import Optional
+from typing import List, Optional
 import re
 
+HORARIO_PATTERN = r'^(([01]\d|2[0-3]):[0-5]\d|24:00)$'
+
+
+class HorarioAtendimentoSchema(BaseModel):
+    """Faixa de atendimento em um dia da semana"""
+    dia_semana: int = Field(..., ge=0, le=6)  # 0 = domingo ... 6 = sábado
+    horario_inicio: str = Field(..., pattern=HORARIO_PATTERN)
+    horario_fim: str = Field(..., pattern=HORARIO_PATTERN)
+    
+    @validator('horario_fim')
+    def validar_fim(cls, v, values):
+        """Valida se o fim é posterior ao início (HH:MM compara como texto)"""
+        inicio = values.get('horario_inicio')
+        if inicio and v <= inicio:
+            raise ValueError('horario_fim deve ser posterior a horario_inicio')
+        return v
+
 
 class MedicoBase(BaseModel):
     """Campos base do médico"""
@@ -15,6 +32,7 @@ class MedicoBase(BaseModel):
     especialidade: str = Field(..., min_length=3, max_length=50)
     telefone: str = Field(..., min_length=10, max_length=15)
     email: str = Field(..., pattern=r'^[\w\.-]+@[\w\.-]+\.\w+$')
+    horarios_atendimento: Optional[List[HorarioAtendimentoSchema]] = None
     
     @validator('crm')
     def validar_crm(cls, v):
@@ -36,6 +54,7 @@ class MedicoUpdate(BaseModel):
     telefone: Optional[str] = Field(None, min_length=10, max_length=15)
     email: Optional[str] = Field(None, pattern=r'^[\w\.-]+@[\w\.-]+\.\w+$')
     ativo: Optional[bool] = None
+    horarios_atendimento: Optional[List[HorarioAtendimentoSchema]] = None
 
 
 class MedicoResponse(MedicoBase):
@@ -53,6 +53,34 @@ class RelatorioResponse(BaseModel):
     formato: FormatoRelatorio
     data_geracao: datetime
     tamanho_bytes: int
+    reaproveitado: bool = False  # Mesmo pedido e dados inalterados: arquivo existente
+    
+    class Config:
+        from_attributes = True
+
+
+class StatusJobRelatorio(str, Enum):
+    """Estados de um job de geração de relatório"""
+    PENDENTE = "pendente"
+    EXECUTANDO = "executando"
+    CONCLUIDO = "concluido"
+    FALHOU = "falhou"
+    CANCELADO = "cancelado"
+
+
+class RelatorioJobResponse(BaseModel):
+    """Estado de um job de relatório (resultado preenchido ao concluir)"""
+    id: str
+    status: StatusJobRelatorio
+    progresso: float = Field(..., ge=0, le=1)  # Fração concluída (0 a 1)
+    etapa: Optional[str] = None
+    tipo: TipoRelatorio
+    formato: FormatoRelatorio
+    criado_em: datetime
+    iniciado_em: Optional[datetime] = None
+    finalizado_em: Optional[datetime] = None
+    erro: Optional[str] = None
+    resultado: Optional[RelatorioResponse] = None
     
     class Config:
         from_attributes = True
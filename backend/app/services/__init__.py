@@ -6,6 +6,7 @@ from app.services.consulta_service import ConsultaService
 from app.services.cache_service import CacheService
 from app.services.backup_service import BackupService
 from app.services.relatorio_service import RelatorioService
+from app.services.relatorio_job_service import RelatorioJobService
 
 __all__ = [
     "PacienteService",
@@ -14,4 +15,5 @@ __all__ = [
     "CacheService",
     "BackupService",
     "RelatorioService",
+    "RelatorioJobService",
 ]
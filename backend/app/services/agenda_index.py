@@ -0,0 +1,150 @@
+"""
+Índice em memória das agendas dos médicos
+
+Conceitos de SO demonstrados:
+- Estruturas de dados em memória para evitar I/O (como o page cache)
+- Busca binária em vetores ordenados (bisect) - O(log n)
+- Carregamento sob demanda (lazy loading) e invalidação
+"""
+
+import bisect
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from app.infra.config import get_config
+from app.infra.logger import get_logger
+from app.repositories.consulta_repository import DURACAO_MAXIMA_MINUTOS
+
+logger = get_logger(__name__)
+
+
+class AgendaMedico:
+    """
+    Intervalos [início, fim) das consultas não canceladas de um médico
+    
+    Vetores paralelos ordenados pelo início. A busca de sobreposição
+    usa bisect e percorre apenas as consultas que começam dentro da
+    janela da duração máxima.
+    """
+    
+    __slots__ = ("inicios", "fins", "ids", "carregada_em", "horizonte")
+    
+    def __init__(self, horizonte: datetime):
+        self.inicios: List[datetime] = []
+        self.fins: List[datetime] = []
+        self.ids: List[str] = []
+        self.carregada_em = time.monotonic()
+        # Consultas anteriores ao horizonte não foram carregadas
+        self.horizonte = horizonte
+    
+    def __len__(self) -> int:
+        return len(self.ids)
+    
+    def inserir(self, consulta_id: str, inicio: datetime, fim: datetime):
+        """Insere intervalo mantendo a ordenação"""
+        pos = bisect.bisect_right(self.inicios, inicio)
+        self.inicios.insert(pos, inicio)
+        self.fins.insert(pos, fim)
+        self.ids.insert(pos, consulta_id)
+    
+    def remover(self, consulta_id: str) -> bool:
+        """Remove intervalo pelo ID da consulta"""
+        try:
+            pos = self.ids.index(consulta_id)
+        except ValueError:
+            return False
+        del self.inicios[pos]
+        del self.fins[pos]
+        del self.ids[pos]
+        return True
+    
+    def conflito(
+        self,
+        inicio: datetime,
+        fim: datetime,
+        ignorar_id: Optional[str] = None
+    ) -> Optional[Tuple[str, datetime]]:
+        """
+        Retorna (id, início) da primeira consulta que sobrepõe [inicio, fim)
+        
+        Complexidade: O(log n + k), k = consultas que começam na janela
+        (inicio - duração máxima, fim)
+        """
+        limite = inicio - timedelta(minutes=DURACAO_MAXIMA_MINUTOS)
+        lo = bisect.bisect_right(self.inicios, limite)
+        hi = bisect.bisect_left(self.inicios, fim)
+        
+        for i in range(lo, hi):
+            if self.fins[i] > inicio and self.ids[i] != ignorar_id:
+                return self.ids[i], self.inicios[i]
+        return None
+    
+    def cobre(self, inicio: datetime) -> bool:
+        """Indica se o índice tem dados suficientes para o horário"""
+        return inicio - timedelta(minutes=DURACAO_MAXIMA_MINUTOS) >= self.horizonte
+
+
+class AgendaIndex:
+    """
+    Índice das agendas por médico
+    
+    - Aquecido sob demanda na primeira verificação de cada médico
+    - Mantido pelo ConsultaService em criar/atualizar/cancelar/deletar
+    - Expira após agenda_index_ttl_seconds para incorporar escritas
+      feitas por outros processos (workers)
+    """
+    
+    def __init__(self):
+        self.config = get_config()
+        self.ttl_seconds = self.config.agenda_index_ttl_seconds
+        self._agendas: Dict[str, AgendaMedico] = {}
+    
+    def get(self, medico_id: str) -> Optional[AgendaMedico]:
+        """Retorna a agenda aquecida do médico (None se ausente ou expirada)"""
+        agenda = self._agendas.get(medico_id)
+        if agenda is None:
+            return None
+        if time.monotonic() - agenda.carregada_em > self.ttl_seconds:
+            del self._agendas[medico_id]
+            return None
+        return agenda
+    
+    def carregar(self, medico_id: str, horizonte: datetime, consultas) -> AgendaMedico:
+        """Monta a agenda do médico a partir das consultas não canceladas"""
+        agenda = AgendaMedico(horizonte)
+        ordenadas = sorted(consultas, key=lambda c: c.data_hora)
+        agenda.inicios = [c.data_hora for c in ordenadas]
+        agenda.fins = [c.data_hora_fim for c in ordenadas]
+        agenda.ids = [c.id for c in ordenadas]
+        self._agendas[medico_id] = agenda
+        logger.debug(f"Agenda carregada: Médico {medico_id} ({len(agenda)} consultas)")
+        return agenda
+    
+    def invalidar(self, medico_id: str):
+        """Descarta a agenda do médico (recarregada no próximo acesso)"""
+        self._agendas.pop(medico_id, None)
+    
+    def limpar(self):
+        """Descarta todas as agendas"""
+        self._agendas.clear()
+    
+    def get_stats(self) -> dict:
+        """Estatísticas do índice"""
+        return {
+            "medicos": len(self._agendas),
+            "intervalos": sum(len(a) for a in self._agendas.values()),
+            "ttl_seconds": self.ttl_seconds
+        }
+
+
+# Singleton
+_agenda_index: AgendaIndex | None = None
+
+
+def get_agenda_index() -> AgendaIndex:
+    """Retorna a instância do índice de agendas"""
+    global _agenda_index
+    if _agenda_index is None:
+        _agenda_index = AgendaIndex()
+    return _agenda_index
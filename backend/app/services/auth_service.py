@@ -9,9 +9,8 @@ from fastapi import HTTPException
 
 from app.models.db_models import Usuario, TipoUsuario
 from app.repositories.usuario_repository import UsuarioRepository
-from app.repositories.medico_repository import MedicoRepository
-from app.repositories.paciente_repository import PacienteRepository
 from app.schemas.usuario_schema import UsuarioCreate, LoginRequest, LoginResponse, AlterarSenhaRequest
+from app.services.carregadores import carregador_medicos, carregador_pacientes
 from app.infra.logger import get_logger
 
 logger = get_logger(__name__)
@@ -22,8 +21,6 @@ class AuthService:
     
     def __init__(self):
         self.repository = UsuarioRepository()
-        self.medico_repo = MedicoRepository()
-        self.paciente_repo = PacienteRepository()
     
     async def login(self, dados: LoginRequest) -> LoginResponse:
         """Autentica usuário e retorna dados"""
@@ -41,10 +38,10 @@ class AuthService:
         # Buscar nome do médico/paciente
         nome = None
         if usuario.tipo == TipoUsuario.MEDICO and usuario.referencia_id:
-            medico = await self.medico_repo.find_by_id(usuario.referencia_id)
+            medico = await carregador_medicos().load(usuario.referencia_id)
             nome = medico.nome if medico else None
         elif usuario.tipo == TipoUsuario.PACIENTE and usuario.referencia_id:
-            paciente = await self.paciente_repo.find_by_id(usuario.referencia_id)
+            paciente = await carregador_pacientes().load(usuario.referencia_id)
             nome = paciente.nome if paciente else None
         elif usuario.tipo == TipoUsuario.ADMIN:
             nome = "Administrador"
@@ -76,11 +73,11 @@ class AuthService:
         
         # Valida referência se for médico ou paciente
         if dados.tipo == TipoUsuario.MEDICO and dados.referencia_id:
-            medico = await self.medico_repo.find_by_id(dados.referencia_id)
+            medico = await carregador_medicos().load(dados.referencia_id)
             if not medico:
                 raise HTTPException(status_code=404, detail="Médico não encontrado")
         elif dados.tipo == TipoUsuario.PACIENTE and dados.referencia_id:
-            paciente = await self.paciente_repo.find_by_id(dados.referencia_id)
+            paciente = await carregador_pacientes().load(dados.referencia_id)
             if not paciente:
                 raise HTTPException(status_code=404, detail="Paciente não encontrado")
         
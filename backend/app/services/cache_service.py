@@ -5,142 +5,397 @@ Conceitos de SO demonstrados:
 - Gerenciamento de memória
 - Estruturas de dados dinâmicas
 - TTL (Time To Live) para evitar consumo excessivo
+- Exclusão mútua por chave (single-flight): falhas simultâneas da mesma
+  chave compartilham uma única carga, evitando o efeito manada
+- Armazenamento plugável (app.infra.cache_backend): memória do processo
+  ou arquivo compartilhado entre workers com invalidação propagada
+- Instrumentação: acertos, falhas e tempo de carga por namespace, como os
+  contadores de page faults e de latência de E/S do kernel
 """
 
-from typing import Any, Optional, Dict
-from datetime import datetime, timedelta
-from dataclasses import dataclass
+import asyncio
+import bisect
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional, TypeVar
 
 from app.infra.logger import get_logger
 from app.infra.config import get_config
+from app.infra.cache_backend import BaseCacheBackend, criar_cache_backend, namespace_da_chave
 
 logger = get_logger(__name__)
 
+T = TypeVar("T")
+
+# Limites superiores (ms) dos intervalos do histograma de tempo de carga
+_LIMITES_CARGA_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+
+
+@dataclass
+class HistogramaCarga:
+    """
+    Histograma de tempo de carga com intervalos fixos
+    Memória constante, independente do número de amostras
+    """
+    contagens: List[int] = field(default_factory=lambda: [0] * (len(_LIMITES_CARGA_MS) + 1))
+    total: int = 0
+    soma_ms: float = 0.0
+    max_ms: float = 0.0
+    
+    def registrar(self, duracao_ms: float):
+        """Conta a amostra no primeiro intervalo que a comporta"""
+        self.contagens[bisect.bisect_left(_LIMITES_CARGA_MS, duracao_ms)] += 1
+        self.total += 1
+        self.soma_ms += duracao_ms
+        self.max_ms = max(self.max_ms, duracao_ms)
+    
+    def percentil(self, fracao: float) -> Optional[float]:
+        """Limite superior do intervalo que contém o percentil (máximo no último)"""
+        if not self.total:
+            return None
+        alvo = fracao * self.total
+        acumulado = 0
+        for indice, contagem in enumerate(self.contagens):
+            acumulado += contagem
+            if acumulado >= alvo:
+                if indice < len(_LIMITES_CARGA_MS):
+                    return min(_LIMITES_CARGA_MS[indice], round(self.max_ms, 2))
+                break
+        return round(self.max_ms, 2)
+    
+    def to_dict(self) -> dict:
+        """Resumo para as estatísticas (percentis aproximados pelos intervalos)"""
+        rotulos = [f"<={limite}ms" for limite in _LIMITES_CARGA_MS] + [f">{_LIMITES_CARGA_MS[-1]}ms"]
+        return {
+            "count": self.total,
+            "avg_ms": round(self.soma_ms / self.total, 2) if self.total else None,
+            "max_ms": round(self.max_ms, 2) if self.total else None,
+            "p50_ms": self.percentil(0.5),
+            "p95_ms": self.percentil(0.95),
+            "p99_ms": self.percentil(0.99),
+            "buckets": dict(zip(rotulos, self.contagens))
+        }
+
 
 @dataclass
-class CacheEntry:
-    """Entrada do cache com TTL"""
-    value: Any
-    expires_at: datetime
+class MetricasNamespace:
+    """Contadores de uso do cache de um namespace"""
+    hits: int = 0
+    stale_hits: int = 0
+    misses: int = 0
+    # Falhas que aguardaram uma carga já em andamento (single-flight)
+    coalesced_misses: int = 0
+    load_errors: int = 0
+    carga: HistogramaCarga = field(default_factory=HistogramaCarga)
+    
+    def to_dict(self) -> dict:
+        """Contadores e taxa de acerto do namespace"""
+        acessos = self.hits + self.stale_hits + self.misses
+        return {
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "coalesced_misses": self.coalesced_misses,
+            "hit_ratio": round((self.hits + self.stale_hits) / acessos, 4) if acessos else None,
+            "load_errors": self.load_errors,
+            "load_time": self.carga.to_dict()
+        }
 
 
 class CacheService:
     """
-    Service de cache em memória
+    Service de cache
     
     Conceito de SO: Gerenciamento de memória
-    - Cache LRU-like (limitado por tamanho)
-    - TTL para expiração automática
-    - Limpeza periódica de dados expirados
+    - Armazenamento, LRU, expiração e orçamento de memória ficam no backend
+    - O service aplica o TTL padrão e coordena as cargas (single-flight),
+      que são por processo: cada worker carrega no máximo uma vez por chave
     """
     
-    def __init__(self):
+    def __init__(self, backend: Optional[BaseCacheBackend] = None):
         self.config = get_config()
-        self._cache: Dict[str, CacheEntry] = {}
+        self.backend = backend or criar_cache_backend(self.config)
+        # Cargas em andamento por chave (single-flight)
+        self._em_voo: Dict[str, asyncio.Task] = {}
+        self._metricas: Dict[str, MetricasNamespace] = {}
+        self._metricas_desde = datetime.now()
         self.max_size = self.config.cache_max_size
         self.ttl_seconds = self.config.cache_ttl_seconds
-        logger.info(f"CacheService iniciado - Max: {self.max_size}, TTL: {self.ttl_seconds}s")
+        logger.info(
+            f"CacheService iniciado - Backend: {self.backend.nome}, Max: {self.max_size}, "
+            f"Memória: {self.config.cache_max_memory_mb}MB, TTL: {self.ttl_seconds}s"
+        )
     
-    def _is_expired(self, entry: CacheEntry) -> bool:
-        """Verifica se entrada está expirada"""
-        return datetime.now() > entry.expires_at
+    def _metricas_de(self, key: str) -> MetricasNamespace:
+        """Contadores do namespace da chave (criados no primeiro uso)"""
+        nome = namespace_da_chave(key)
+        metricas = self._metricas.get(nome)
+        if metricas is None:
+            metricas = self._metricas[nome] = MetricasNamespace()
+        return metricas
     
-    def _cleanup_expired(self):
+    def registrar_carga(self, key: str, duracao_s: float, erro: bool = False):
         """
-        Remove entradas expiradas
-        Conceito: Liberação de memória
+        Registra o tempo de uma carga feita após falha no cache
+        Usado também por quem carrega fora de get_or_load (ex.: em lote)
         """
-        expired_keys = [
-            key for key, entry in self._cache.items() 
-            if self._is_expired(entry)
-        ]
-        
-        for key in expired_keys:
-            del self._cache[key]
-        
-        if expired_keys:
-            logger.debug(f"Cache: {len(expired_keys)} entradas expiradas removidas")
+        metricas = self._metricas_de(key)
+        metricas.carga.registrar(duracao_s * 1000)
+        if erro:
+            metricas.load_errors += 1
     
-    def _evict_oldest(self):
-        """
-        Remove entrada mais antiga se cache estiver cheio
-        Conceito: Gerenciamento de memória limitada
-        """
-        if len(self._cache) >= self.max_size:
-            oldest_key = min(
-                self._cache.keys(),
-                key=lambda k: self._cache[k].expires_at
-            )
-            del self._cache[oldest_key]
-            logger.debug(f"Cache: Entrada mais antiga removida (key={oldest_key})")
-    
-    def get(self, key: str) -> Optional[Any]:
+    async def get(self, key: str) -> Optional[Any]:
         """
         Busca valor no cache
         Retorna None se não encontrado ou expirado
         """
-        if key not in self._cache:
+        entrada = await self.backend.get_entry_async(key)
+        if entrada is None:
+            self._metricas_de(key).misses += 1
             logger.debug(f"Cache MISS: {key}")
             return None
         
-        entry = self._cache[key]
-        
-        if self._is_expired(entry):
-            del self._cache[key]
-            logger.debug(f"Cache EXPIRED: {key}")
-            return None
-        
+        self._metricas_de(key).hits += 1
         logger.debug(f"Cache HIT: {key}")
-        return entry.value
+        return entrada[0]
     
-    def set(self, key: str, value: Any, ttl_seconds: Optional[int] = None):
+    def set(
+        self,
+        key: str,
+        value: Any,
+        ttl_seconds: Optional[float] = None,
+        soft_ttl_seconds: Optional[float] = None
+    ):
         """
         Armazena valor no cache com TTL
+        soft_ttl_seconds (opcional) deve ser menor que o TTL rígido
         """
-        # Limpeza antes de adicionar
-        self._cleanup_expired()
+        ttl = ttl_seconds or self.ttl_seconds
+        self.backend.set(key, value, ttl, soft_ttl_seconds)
+        logger.debug(f"Cache SET: {key} (TTL={ttl}s)")
+    
+    async def get_or_load(
+        self,
+        key: str,
+        carregar: Callable[[], Awaitable[T]],
+        ttl_seconds: Optional[float] = None,
+        soft_ttl_seconds: Optional[float] = None
+    ) -> T:
+        """
+        Busca no cache ou carrega uma única vez (cache-aside com single-flight)
         
-        # Evict se necessário
-        if key not in self._cache:
-            self._evict_oldest()
+        - Falha: a primeira requisição inicia a carga; as concorrentes
+          aguardam a mesma tarefa em vez de repetir a query
+        - Entre o TTL suave e o rígido: devolve o valor atual e atualiza
+          em segundo plano (stale-while-revalidate)
+        - Valores None não são armazenados
+        """
+        metricas = self._metricas_de(key)
+        entrada = await self.backend.get_entry_async(key)
+        if entrada is not None:
+            value, fresco = entrada
+            if fresco:
+                metricas.hits += 1
+                logger.debug(f"Cache HIT: {key}")
+            else:
+                metricas.stale_hits += 1
+                if key not in self._em_voo:
+                    logger.debug(f"Cache STALE: {key} (atualizando em segundo plano)")
+                    self._iniciar_carga(key, carregar, ttl_seconds, soft_ttl_seconds)
+            return value
         
-        # Calcula expiração
-        ttl = ttl_seconds or self.ttl_seconds
-        expires_at = datetime.now() + timedelta(seconds=ttl)
+        metricas.misses += 1
+        tarefa = self._em_voo.get(key)
+        if tarefa is None:
+            logger.debug(f"Cache MISS: {key}")
+            tarefa = self._iniciar_carga(key, carregar, ttl_seconds, soft_ttl_seconds)
+        else:
+            metricas.coalesced_misses += 1
+            logger.debug(f"Cache MISS: {key} (aguardando carga em andamento)")
+        # shield: o cancelamento de um chamador não cancela a carga compartilhada
+        return await asyncio.shield(tarefa)
+    
+    async def get_or_load_many(
+        self,
+        keys: List[str],
+        carregar: Callable[[List[str]], Awaitable[Dict[str, Any]]],
+        ttl_seconds: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """
+        Versão em lote de get_or_load: uma carga para todas as chaves ausentes
         
-        # Armazena
-        self._cache[key] = CacheEntry(value=value, expires_at=expires_at)
-        logger.debug(f"Cache SET: {key} (TTL={ttl}s)")
+        - `carregar` recebe as chaves ausentes e devolve chave -> valor
+          (chaves sem valor são omitidas e não são armazenadas)
+        - As chaves ficam registradas como cargas em andamento: get_or_load
+          concorrente aguarda o lote, e uma invalidação durante a carga
+          impede que o valor lido antes dela seja armazenado
+        - Chaves já em carga por outra chamada aguardam aquela carga
+        
+        Returns:
+            chave -> valor, só para as chaves encontradas
+        """
+        resultado: Dict[str, Any] = {}
+        marcas: Dict[str, asyncio.Future] = {}
+        em_andamento: Dict[str, asyncio.Future] = {}
+        loop = asyncio.get_running_loop()
+        
+        for key in keys:
+            metricas = self._metricas_de(key)
+            entrada = await self.backend.get_entry_async(key)
+            if entrada is not None:
+                metricas.hits += 1
+                resultado[key] = entrada[0]
+                continue
+            metricas.misses += 1
+            tarefa = self._em_voo.get(key)
+            if tarefa is not None:
+                metricas.coalesced_misses += 1
+                em_andamento[key] = tarefa
+            elif key not in marcas:
+                marcas[key] = self._em_voo[key] = loop.create_future()
+        
+        if marcas:
+            inicio = time.perf_counter()
+            erro: Optional[BaseException] = None
+            try:
+                carregados = await carregar(list(marcas))
+            except BaseException as e:
+                erro = e
+                raise
+            finally:
+                # Um lote, uma amostra de tempo de carga no namespace
+                self.registrar_carga(next(iter(marcas)), time.perf_counter() - inicio, erro is not None)
+                for key, marca in marcas.items():
+                    vigente = self._em_voo.get(key) is marca
+                    if vigente:
+                        del self._em_voo[key]
+                    if isinstance(erro, asyncio.CancelledError):
+                        marca.cancel()
+                        continue
+                    if erro is not None:
+                        marca.set_exception(erro)
+                        marca.exception()  # recuperada: sem aviso se ninguém aguardava
+                        continue
+                    value = carregados.get(key)
+                    marca.set_result(value)
+                    # Invalidada durante a carga: resultado entregue, mas não armazenado
+                    if vigente and value is not None:
+                        self.set(key, value, ttl_seconds)
+            resultado.update((key, value) for key, value in carregados.items() if key in marcas)
+        
+        for key, tarefa in em_andamento.items():
+            value = await asyncio.shield(tarefa)
+            if value is not None:
+                resultado[key] = value
+        return resultado
+    
+    def _iniciar_carga(
+        self,
+        key: str,
+        carregar: Callable[[], Awaitable[Any]],
+        ttl_seconds: Optional[float],
+        soft_ttl_seconds: Optional[float]
+    ) -> asyncio.Task:
+        """Cria a tarefa de carga da chave e a registra como em andamento"""
+        tarefa = asyncio.ensure_future(
+            self._carregar(key, carregar, ttl_seconds, soft_ttl_seconds)
+        )
+        self._em_voo[key] = tarefa
+        tarefa.add_done_callback(self._finalizar_carga)
+        return tarefa
+    
+    async def _carregar(
+        self,
+        key: str,
+        carregar: Callable[[], Awaitable[Any]],
+        ttl_seconds: Optional[float],
+        soft_ttl_seconds: Optional[float]
+    ) -> Any:
+        """Executa a carga e armazena o resultado se a chave não foi invalidada"""
+        tarefa = asyncio.current_task()
+        inicio = time.perf_counter()
+        erro = True
+        try:
+            value = await carregar()
+            erro = False
+        finally:
+            self.registrar_carga(key, time.perf_counter() - inicio, erro)
+            vigente = self._em_voo.get(key) is tarefa
+            if vigente:
+                del self._em_voo[key]
+        
+        # Invalidada durante a carga: resultado entregue, mas não armazenado
+        if vigente and value is not None:
+            self.set(key, value, ttl_seconds, soft_ttl_seconds)
+        return value
+    
+    def _finalizar_carga(self, tarefa: asyncio.Task):
+        """Registra falhas de cargas (inclusive em segundo plano)"""
+        if not tarefa.cancelled() and tarefa.exception() is not None:
+            logger.warning(f"Cache: falha na carga - {tarefa.exception()}")
     
     def delete(self, key: str) -> bool:
-        """Remove entrada do cache"""
-        if key in self._cache:
-            del self._cache[key]
+        """Remove entrada do cache (e descarta a carga em andamento)"""
+        self._em_voo.pop(key, None)
+        if self.backend.delete(key):
             logger.debug(f"Cache DELETE: {key}")
             return True
         return False
     
+    def delete_prefix(self, prefixo: str) -> int:
+        """Remove todas as entradas cujas chaves começam com o prefixo"""
+        for key in [key for key in self._em_voo if key.startswith(prefixo)]:
+            del self._em_voo[key]
+        removidas = self.backend.delete_prefix(prefixo)
+        if removidas:
+            logger.debug(f"Cache DELETE: {removidas} entradas com prefixo {prefixo}")
+        return removidas
+    
     def clear(self):
         """
         Limpa todo o cache
         Conceito: Liberação de memória
         """
-        size = len(self._cache)
-        self._cache.clear()
+        self._em_voo.clear()
+        size = self.backend.clear()
         logger.info(f"Cache limpo: {size} entradas removidas")
     
-    def get_stats(self) -> dict:
-        """Retorna estatísticas do cache"""
-        total = len(self._cache)
-        expired = sum(1 for e in self._cache.values() if self._is_expired(e))
+    async def get_stats(self) -> dict:
+        """
+        Retorna estatísticas do cache (pode aguardar E/S do backend)
         
-        return {
-            "total_entries": total,
-            "expired_entries": expired,
-            "active_entries": total - expired,
-            "max_size": self.max_size,
-            "ttl_seconds": self.ttl_seconds
-        }
+        Entradas, memória estimada, despejos e expirações vêm do backend;
+        acertos, falhas e tempos de carga são contados desde `stats_since`.
+        """
+        stats = await self.backend.get_stats_async()
+        namespaces = stats.setdefault("namespaces", {})
+        for nome, metricas in self._metricas.items():
+            namespaces.setdefault(nome, {}).update(metricas.to_dict())
+        
+        hits = sum(m.hits + m.stale_hits for m in self._metricas.values())
+        misses = sum(m.misses for m in self._metricas.values())
+        stats.update({
+            "backend": self.backend.nome,
+            "ttl_seconds": self.ttl_seconds,
+            "in_flight_loads": len(self._em_voo),
+            "hits": hits,
+            "misses": misses,
+            "hit_ratio": round(hits / (hits + misses), 4) if hits + misses else None,
+            "stats_since": self._metricas_desde.isoformat()
+        })
+        return stats
+    
+    def reset_stats(self):
+        """Zera contadores e histogramas (as entradas são mantidas)"""
+        self._metricas.clear()
+        self._metricas_desde = datetime.now()
+        self.backend.reset_stats()
+        logger.info("Cache: estatísticas zeradas")
+    
+    def fechar(self):
+        """Conclui escritas pendentes e fecha o backend (shutdown)"""
+        self.backend.fechar()
 
 
 # Singleton
@@ -0,0 +1,96 @@
+"""
+Carregadores em lote e cache de médicos e pacientes
+
+Conceitos de SO demonstrados:
+- Agrupamento de E/S: várias buscas por ID na mesma requisição
+  resultam em uma query por tabela
+- Cache-aside (read-through): o lote só consulta o banco para os IDs
+  ausentes do cache; escritas invalidam exatamente as chaves afetadas
+"""
+
+from datetime import date, datetime, timedelta
+from typing import Awaitable, Callable, Dict, List
+
+from app.models.db_models import Medico, Paciente
+from app.repositories.medico_repository import MedicoRepository
+from app.repositories.paciente_repository import PacienteRepository
+from app.services.cache_service import get_cache_service
+from app.infra.batch_loader import BatchLoader, obter_do_escopo
+
+
+def chave_medico(medico_id: str) -> str:
+    """Chave do médico no cache"""
+    return f"medico:{medico_id}"
+
+
+def chave_paciente(paciente_id: str) -> str:
+    """Chave do paciente no cache"""
+    return f"paciente:{paciente_id}"
+
+
+def prefixo_horarios(medico_id: str) -> str:
+    """Prefixo das chaves de horários de um médico"""
+    return f"horarios:{medico_id}:"
+
+
+def chave_horarios(medico_id: str, dia: date) -> str:
+    """Chave dos horários livres de um médico em um dia"""
+    return f"{prefixo_horarios(medico_id)}{dia.isoformat()}"
+
+
+def _com_cache(chave: Callable[[str], str], buscar_lote: Callable[[List[str]], Awaitable[list]]):
+    """
+    Envolve a busca em lote: IDs em cache não vão ao banco
+    A carga passa por CacheService.get_or_load_many: um item invalidado
+    durante a busca (atualização/remoção) não volta ao cache
+    """
+    async def carregar(ids: List[str]) -> list:
+        por_chave = {chave(item_id): item_id for item_id in ids}
+        
+        async def buscar(chaves: List[str]) -> Dict[str, object]:
+            itens = await buscar_lote([por_chave[c] for c in chaves])
+            return {chave(item.id): item for item in itens}
+        
+        encontrados = await get_cache_service().get_or_load_many(list(por_chave), buscar)
+        return list(encontrados.values())
+    
+    return carregar
+
+
+def carregador_medicos() -> BatchLoader[Medico]:
+    """Carregador de médicos da requisição atual"""
+    return obter_do_escopo(
+        "medicos",
+        lambda: BatchLoader(_com_cache(chave_medico, MedicoRepository().find_by_ids))
+    )
+
+
+def carregador_pacientes() -> BatchLoader[Paciente]:
+    """Carregador de pacientes da requisição atual"""
+    return obter_do_escopo(
+        "pacientes",
+        lambda: BatchLoader(_com_cache(chave_paciente, PacienteRepository().find_by_ids))
+    )
+
+
+def invalidar_medico(medico_id: str):
+    """Descarta médico e seus horários do cache e do carregador"""
+    cache = get_cache_service()
+    cache.delete(chave_medico(medico_id))
+    cache.delete_prefix(prefixo_horarios(medico_id))
+    carregador_medicos().limpar(medico_id)
+
+
+def invalidar_paciente(paciente_id: str):
+    """Descarta paciente do cache e do carregador"""
+    get_cache_service().delete(chave_paciente(paciente_id))
+    carregador_pacientes().limpar(paciente_id)
+
+
+def invalidar_horarios(medico_id: str, inicio: datetime, fim: datetime):
+    """Descarta os horários em cache dos dias ocupados por [inicio, fim)"""
+    cache = get_cache_service()
+    dia = inicio.date()
+    while datetime.combine(dia, datetime.min.time()) < fim:
+        cache.delete(chave_horarios(medico_id, dia))
+        dia += timedelta(days=1)
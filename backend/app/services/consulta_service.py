@@ -6,20 +6,46 @@ Conceitos de SO demonstrados:
 - Sincronização: locks para evitar race conditions
 """
 
+import asyncio
 from typing import List, Optional
 from uuid import uuid4
 from datetime import datetime, timedelta, date
 from fastapi import HTTPException
 
-from app.models.db_models import Consulta, StatusConsulta
-from app.repositories.consulta_repository import ConsultaRepository
+from app.models.db_models import Consulta, Medico, StatusConsulta
+from app.repositories.consulta_repository import (
+    ConsultaRepository,
+    ConflitoAgendamentoError,
+    DURACAO_MAXIMA_MINUTOS
+)
 from app.repositories.paciente_repository import PacienteRepository
 from app.repositories.medico_repository import MedicoRepository
-from app.schemas.consulta_schema import ConsultaCreate, ConsultaUpdate, ConsultaDetalhada
+from app.schemas.consulta_schema import ConsultaCreate, ConsultaUpdate, ConsultaDetalhada, DisponibilidadeMedico, HorarioLivre
+from app.infra.config import get_config
 from app.infra.logger import get_logger
+from app.infra.concurrency import ShardedAsyncLock
+from app.infra.paginacao import Pagina, CursorInvalidoError, limite_efetivo
+from app.services.agenda_index import AgendaMedico, get_agenda_index
+from app.services import mapa_horarios
+from app.services.grade_semanal import get_grade_cache
+from app.services.carregadores import (
+    carregador_medicos,
+    carregador_pacientes,
+    chave_horarios,
+    invalidar_horarios
+)
+from app.services.cache_service import get_cache_service
 
 logger = get_logger(__name__)
 
+# Locks por médico compartilhados por todas as instâncias do service.
+# Serializam as reservas de um mesmo médico dentro do processo, evitando
+# que várias transações BEGIN IMMEDIATE disputem o lock de escrita do SQLite.
+_agenda_locks = ShardedAsyncLock(shards=64)
+
+# Dias de consultas carregados por query na busca de próximos horários
+_JANELA_BUSCA_DIAS = 7
+
 
 class ConsultaService:
     """
@@ -27,13 +53,19 @@ class ConsultaService:
     
     Implementa validação de conflitos de agendamento:
     - Médico não pode ter consultas no mesmo horário
-    - Paciente não pode ter consultas no mesmo horário
+    - Índice em memória da agenda de cada médico: conflitos conhecidos
+      são rejeitados sem abrir a transação de escrita
+    - Verificação e gravação atômicas (lock por médico + BEGIN IMMEDIATE)
     """
     
     def __init__(self):
+        self.config = get_config()
         self.repository = ConsultaRepository()
         self.paciente_repo = PacienteRepository()
         self.medico_repo = MedicoRepository()
+        self.agenda_index = get_agenda_index()
+        self.grades = get_grade_cache()
+        self.cache = get_cache_service()
     
     async def listar_todas(self) -> List[Consulta]:
         """Lista todas as consultas"""
@@ -45,25 +77,87 @@ class ConsultaService:
         logger.info("Listando consultas agendadas")
         return await self.repository.find_agendadas()
     
+    async def listar_pagina(
+        self,
+        limit: Optional[int] = None,
+        after: Optional[str] = None,
+        paciente_id: Optional[str] = None,
+        medico_id: Optional[str] = None,
+        apenas_agendadas: bool = False
+    ) -> Pagina[Consulta]:
+        """Lista consultas paginadas por cursor, em ordem de data/hora"""
+        limite = limite_efetivo(limit)
+        logger.info(
+            f"Listando consultas - Limite: {limite}, Após: {after}, "
+            f"Paciente: {paciente_id}, Médico: {medico_id}"
+        )
+        try:
+            return await self.repository.find_pagina(
+                limite,
+                after,
+                paciente_id=paciente_id,
+                medico_id=medico_id,
+                status=StatusConsulta.AGENDADA if apenas_agendadas else None
+            )
+        except CursorInvalidoError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    
     async def buscar_por_id(self, consulta_id: str) -> Optional[Consulta]:
         """Busca consulta por ID"""
         logger.info(f"Buscando consulta por ID: {consulta_id}")
         return await self.repository.find_by_id(consulta_id)
     
+    def _detalhada(self, linha) -> ConsultaDetalhada:
+        """Converte uma linha do JOIN em ConsultaDetalhada"""
+        return ConsultaDetalhada(
+            **linha.Consulta.to_dict(),
+            paciente_nome=linha.paciente_nome,
+            medico_nome=linha.medico_nome,
+            medico_especialidade=linha.medico_especialidade
+        )
+    
     async def buscar_detalhada(self, consulta_id: str) -> Optional[ConsultaDetalhada]:
         """Busca consulta com dados completos (join)"""
-        consulta = await self.repository.find_by_id(consulta_id)
-        if not consulta:
+        linha = await self.repository.find_detalhada_by_id(consulta_id)
+        if not linha:
             return None
+        return self._detalhada(linha)
+    
+    async def listar_detalhadas(
+        self,
+        limit: Optional[int] = None,
+        after: Optional[str] = None,
+        paciente_id: Optional[str] = None,
+        medico_id: Optional[str] = None,
+        status: Optional[StatusConsulta] = None,
+        data_inicio: Optional[date] = None,
+        data_fim: Optional[date] = None
+    ) -> Pagina[ConsultaDetalhada]:
+        """
+        Lista consultas com nomes do paciente e do médico
+        Uma query (JOIN) por página, em vez de três por consulta
+        """
+        limite = limite_efetivo(limit)
+        logger.info(
+            f"Listando consultas detalhadas - Limite: {limite}, Após: {after}, "
+            f"Paciente: {paciente_id}, Médico: {medico_id}, Status: {status}"
+        )
+        try:
+            pagina = await self.repository.find_detalhadas_pagina(
+                limite,
+                after,
+                paciente_id=paciente_id,
+                medico_id=medico_id,
+                status=status,
+                data_inicio=datetime.combine(data_inicio, datetime.min.time()) if data_inicio else None,
+                data_fim=datetime.combine(data_fim, datetime.max.time()) if data_fim else None
+            )
+        except CursorInvalidoError as e:
+            raise HTTPException(status_code=400, detail=str(e))
         
-        paciente = await self.paciente_repo.find_by_id(consulta.paciente_id)
-        medico = await self.medico_repo.find_by_id(consulta.medico_id)
-        
-        return ConsultaDetalhada(
-            **consulta.to_dict(),
-            paciente_nome=paciente.nome if paciente else None,
-            medico_nome=medico.nome if medico else None,
-            medico_especialidade=medico.especialidade if medico else None
+        return Pagina(
+            itens=[self._detalhada(linha) for linha in pagina.itens],
+            proximo_cursor=pagina.proximo_cursor
         )
     
     async def listar_por_paciente(self, paciente_id: str) -> List[Consulta]:
@@ -76,55 +170,99 @@ class ConsultaService:
         logger.info(f"Listando consultas do médico: {medico_id}")
         return await self.repository.find_by_medico(medico_id)
     
+    def _conflito_http(self, medico_id: str, data_hora: datetime) -> HTTPException:
+        """Converte conflito de agendamento em resposta HTTP 409"""
+        logger.warning(
+            f"Conflito de agendamento detectado: "
+            f"Médico {medico_id} já tem consulta às {data_hora}"
+        )
+        return HTTPException(
+            status_code=409,
+            detail=f"Médico já possui consulta agendada às {data_hora.strftime('%H:%M')}"
+        )
+    
+    async def _agenda(self, medico_id: str) -> AgendaMedico:
+        """
+        Retorna a agenda em memória do médico, carregando-a se necessário
+        Deve ser chamado com o lock do médico adquirido
+        """
+        agenda = self.agenda_index.get(medico_id)
+        if agenda is None:
+            # Consultas passadas não são reagendáveis pela API de criação;
+            # horários anteriores ao horizonte são validados só pelo banco
+            horizonte = datetime.combine(date.today() - timedelta(days=1), datetime.min.time())
+            consultas = await self.repository.find_ativas_by_medico(medico_id, horizonte)
+            agenda = self.agenda_index.carregar(medico_id, horizonte, consultas)
+        return agenda
+    
     async def _validar_conflito(
-        self, 
-        medico_id: str, 
-        data_hora: datetime, 
+        self,
+        medico_id: str,
+        data_hora: datetime,
         duracao_minutos: int,
         consulta_id: Optional[str] = None
     ):
         """
-        Valida conflitos de agendamento
+        Pré-validação de conflitos pelo índice em memória
         
         Conceito de SO: Controle de concorrência
-        - Verifica se médico já tem consulta no horário
-        - Considera sobreposição de horários
+        - Horário livre no índice não tem outra verificação prévia: segue
+          direto para agendar/reagendar, cuja busca de sobreposição dentro
+          do BEGIN IMMEDIATE continua necessária - o índice é por processo
+          e não vê as consultas gravadas por outros workers
+        - Conflito no índice é confirmado pela chave primária (o índice
+          pode estar desatualizado) e rejeitado sem abrir a transação de
+          escrita: tentativas em horários ocupados não disputam o lock de
+          escrita do SQLite com as reservas válidas
+        - O que o índice economiza é esse lock; toda tentativa ainda faz
+          uma ida ao banco
         """
-        # Busca consultas do médico no mesmo dia
-        consultas = await self.repository.find_by_medico_data(
-            medico_id, 
-            data_hora.date()
-        )
+        agenda = await self._agenda(medico_id)
+        if not agenda.cobre(data_hora):
+            return
         
-        # Calcula horário de término da nova consulta
-        fim_novo = data_hora + timedelta(minutes=duracao_minutos)
+        fim = data_hora + timedelta(minutes=duracao_minutos)
+        conflito = agenda.conflito(data_hora, fim, ignorar_id=consulta_id)
+        if not conflito:
+            return
         
-        for consulta in consultas:
-            # Ignora a própria consulta (se for atualização)
-            if consulta_id and consulta.id == consulta_id:
-                continue
-            
-            # Ignora consultas canceladas
-            if consulta.status == StatusConsulta.CANCELADA:
-                continue
-            
-            # Verifica sobreposição de horários
-            fim_existente = consulta.data_hora_fim
-            
-            # Há conflito se:
-            # - Início da nova cai dentro da existente OU
-            # - Fim da nova cai dentro da existente OU
-            # - Nova consulta engloba a existente
-            if (data_hora < fim_existente and fim_novo > consulta.data_hora):
-                logger.warning(
-                    f"Conflito de agendamento detectado: "
-                    f"Médico {medico_id} já tem consulta às {consulta.data_hora}"
-                )
+        existente = await self.repository.find_by_id(conflito[0])
+        if (
+            existente is not None
+            and existente.medico_id == medico_id
+            and existente.status != StatusConsulta.CANCELADA
+            and existente.data_hora < fim
+            and existente.data_hora_fim > data_hora
+        ):
+            raise self._conflito_http(medico_id, existente.data_hora)
+        
+        # Índice desatualizado: recarregado no próximo acesso; a transação decide
+        logger.info(f"Agenda do médico {medico_id} desatualizada: conflito não confirmado no banco")
+        self.agenda_index.invalidar(medico_id)
+    
+    def _validar_atendimento(self, medico: Medico, data_hora: datetime, duracao_minutos: int):
+        """Valida se a consulta cabe na grade de atendimento do médico"""
+        grade = self.grades.obter(medico)
+        ocupacao = {}
+        mapa_horarios.acumular_ocupacao(
+            ocupacao, medico.id, data_hora, data_hora + timedelta(minutes=duracao_minutos)
+        )
+        for (_, dia), mascara in ocupacao.items():
+            if mascara & ~grade[dia.weekday()]:
                 raise HTTPException(
-                    status_code=409,
-                    detail=f"Médico já possui consulta agendada às {consulta.data_hora.strftime('%H:%M')}"
+                    status_code=400,
+                    detail="Horário fora do atendimento do médico"
                 )
     
+    def _sincronizar_agenda(self, consulta: Consulta):
+        """Reflete a consulta gravada na agenda em memória (se carregada)"""
+        agenda = self.agenda_index.get(consulta.medico_id)
+        if agenda is None:
+            return
+        agenda.remover(consulta.id)
+        if consulta.status != StatusConsulta.CANCELADA:
+            agenda.inserir(consulta.id, consulta.data_hora, consulta.data_hora_fim)
+    
     async def criar(self, dados: ConsultaCreate) -> Consulta:
         """
         Cria nova consulta
@@ -133,24 +271,20 @@ class ConsultaService:
         """
         logger.info(f"Criando consulta: Paciente {dados.paciente_id}, Médico {dados.medico_id}")
         
+        # Paciente e médico buscados em paralelo pelos carregadores da requisição
+        paciente, medico = await asyncio.gather(
+            carregador_pacientes().load(dados.paciente_id),
+            carregador_medicos().load(dados.medico_id)
+        )
+        
         # Valida paciente
-        paciente = await self.paciente_repo.find_by_id(dados.paciente_id)
         if not paciente or not paciente.ativo:
             raise HTTPException(status_code=404, detail="Paciente não encontrado ou inativo")
         
         # Valida médico
-        medico = await self.medico_repo.find_by_id(dados.medico_id)
         if not medico or not medico.ativo:
             raise HTTPException(status_code=404, detail="Médico não encontrado ou inativo")
         
-        # Valida conflitos
-        await self._validar_conflito(
-            dados.medico_id,
-            dados.data_hora,
-            dados.duracao_minutos
-        )
-        
-        # Cria a consulta
         consulta = Consulta(
             id=str(uuid4()),
             paciente_id=dados.paciente_id,
@@ -161,7 +295,23 @@ class ConsultaService:
             observacoes=dados.observacoes
         )
         
-        return await self.repository.create(consulta)
+        self._validar_atendimento(medico, dados.data_hora, dados.duracao_minutos)
+        
+        async with _agenda_locks.for_key(dados.medico_id):
+            # Conflito conhecido rejeitado sem o lock de escrita do banco
+            await self._validar_conflito(dados.medico_id, dados.data_hora, dados.duracao_minutos)
+            
+            # Verifica conflito e insere atomicamente
+            try:
+                consulta = await self.repository.agendar(consulta)
+            except ConflitoAgendamentoError as e:
+                # Índice desatualizado (escrita de outro processo)
+                self.agenda_index.invalidar(dados.medico_id)
+                raise self._conflito_http(e.medico_id, e.data_hora)
+            
+            self._sincronizar_agenda(consulta)
+            invalidar_horarios(consulta.medico_id, consulta.data_hora, consulta.data_hora_fim)
+            return consulta
     
     async def atualizar(self, consulta_id: str, dados: ConsultaUpdate) -> Consulta:
         """Atualiza consulta existente"""
@@ -171,18 +321,18 @@ class ConsultaService:
         if not consulta:
             raise HTTPException(status_code=404, detail="Consulta não encontrada")
         
-        # Se alterando data/hora, valida conflitos
-        if dados.data_hora is not None:
-            duracao = dados.duracao_minutos or consulta.duracao_minutos
-            await self._validar_conflito(
-                consulta.medico_id,
-                dados.data_hora,
-                duracao,
-                consulta_id
-            )
-            consulta.data_hora = dados.data_hora
+        # Reativar uma consulta cancelada também ocupa o horário novamente
+        reativando = (
+            consulta.status == StatusConsulta.CANCELADA
+            and dados.status not in (None, StatusConsulta.CANCELADA)
+        )
+        
+        # Horário anterior: seus slots também mudam de estado
+        inicio_anterior, fim_anterior = consulta.data_hora, consulta.data_hora_fim
         
         # Atualiza campos
+        if dados.data_hora is not None:
+            consulta.data_hora = dados.data_hora
         if dados.duracao_minutos is not None:
             consulta.duracao_minutos = dados.duracao_minutos
         if dados.status is not None:
@@ -190,7 +340,32 @@ class ConsultaService:
         if dados.observacoes is not None:
             consulta.observacoes = dados.observacoes
         
-        return await self.repository.update(consulta_id, consulta)
+        async with _agenda_locks.for_key(consulta.medico_id):
+            # Se alterando horário, valida conflitos na mesma transação da escrita
+            if dados.data_hora is not None or dados.duracao_minutos is not None or reativando:
+                if consulta.status != StatusConsulta.CANCELADA:
+                    medico = await carregador_medicos().load(consulta.medico_id)
+                    if medico:
+                        self._validar_atendimento(medico, consulta.data_hora, consulta.duracao_minutos)
+                    await self._validar_conflito(
+                        consulta.medico_id,
+                        consulta.data_hora,
+                        consulta.duracao_minutos,
+                        consulta_id
+                    )
+                try:
+                    atualizada = await self.repository.reagendar(consulta_id, consulta)
+                except ConflitoAgendamentoError as e:
+                    self.agenda_index.invalidar(consulta.medico_id)
+                    raise self._conflito_http(e.medico_id, e.data_hora)
+            else:
+                atualizada = await self.repository.update(consulta_id, consulta)
+            
+            if atualizada:
+                self._sincronizar_agenda(atualizada)
+                invalidar_horarios(atualizada.medico_id, inicio_anterior, fim_anterior)
+                invalidar_horarios(atualizada.medico_id, atualizada.data_hora, atualizada.data_hora_fim)
+            return atualizada
     
     async def cancelar(self, consulta_id: str) -> Consulta:
         """Cancela uma consulta"""
@@ -201,12 +376,29 @@ class ConsultaService:
             raise HTTPException(status_code=404, detail="Consulta não encontrada")
         
         consulta.status = StatusConsulta.CANCELADA
-        return await self.repository.update(consulta_id, consulta)
+        async with _agenda_locks.for_key(consulta.medico_id):
+            cancelada = await self.repository.update(consulta_id, consulta)
+            if cancelada:
+                self._sincronizar_agenda(cancelada)
+                invalidar_horarios(cancelada.medico_id, cancelada.data_hora, cancelada.data_hora_fim)
+            return cancelada
     
     async def deletar(self, consulta_id: str) -> bool:
         """Remove consulta"""
         logger.info(f"Deletando consulta: {consulta_id}")
-        return await self.repository.delete(consulta_id)
+        
+        consulta = await self.repository.find_by_id(consulta_id)
+        if not consulta:
+            return False
+        
+        async with _agenda_locks.for_key(consulta.medico_id):
+            removida = await self.repository.delete(consulta_id)
+            agenda = self.agenda_index.get(consulta.medico_id)
+            if removida and agenda is not None:
+                agenda.remover(consulta_id)
+            if removida:
+                invalidar_horarios(consulta.medico_id, consulta.data_hora, consulta.data_hora_fim)
+            return removida
     
     async def listar_horarios_disponiveis(
         self, 
@@ -216,48 +408,197 @@ class ConsultaService:
         """
         Lista horários disponíveis para um médico em uma data específica
         
-        Horário de funcionamento: 08:00 às 18:00
-        Intervalos de 30 minutos
+        Horário de funcionamento: grade semanal do médico
+        (padrão 08:00 às 18:00), intervalos de 30 minutos
+        Resultado em cache por (médico, dia), invalidado nas escritas;
+        requisições simultâneas compartilham um único cálculo
         """
         logger.info(f"Listando horários disponíveis - Médico: {medico_id}, Data: {data}")
         
         # Valida médico
-        medico = await self.medico_repo.find_by_id(medico_id)
+        medico = await carregador_medicos().load(medico_id)
         if not medico or not medico.ativo:
             raise HTTPException(status_code=404, detail="Médico não encontrado ou inativo")
         
-        # Busca consultas do médico nessa data
-        consultas = await self.repository.find_by_medico_data(medico_id, data)
+        horarios_disponiveis = await self.cache.get_or_load(
+            chave_horarios(medico_id, data),
+            lambda: self._calcular_horarios_livres(medico, data),
+            soft_ttl_seconds=self.config.cache_horarios_soft_ttl_seconds
+        )
+        
+        logger.info(f"Horários disponíveis encontrados: {len(horarios_disponiveis)}")
+        return list(horarios_disponiveis)
+    
+    async def _calcular_horarios_livres(self, medico: Medico, data: date) -> tuple:
+        """Calcula os horários livres do dia a partir do banco"""
+        # Consultas do médico no dia, incluindo as da véspera que podem
+        # atravessar a meia-noite (mesma janela de buscar_proximos_horarios)
+        inicio = datetime.combine(data, datetime.min.time())
+        consultas = await self.repository.find_by_periodo(
+            inicio - timedelta(minutes=DURACAO_MAXIMA_MINUTOS),
+            datetime.combine(data, datetime.max.time()),
+            medico_ids=[medico.id]
+        )
+        
+        # Ocupação do dia em bits; livres = grade do dia AND NOT ocupados
+        ocupacao = mapa_horarios.mapa_ocupacao(
+            c for c in consultas if c.status != StatusConsulta.CANCELADA
+        )
+        grade = self.grades.obter(medico)
+        livres = grade[data.weekday()] & ~ocupacao.get((medico.id, data), 0)
+        
+        # Tupla: valor imutável compartilhado entre requisições
+        return tuple(mapa_horarios.horarios_livres(livres))
+    
+    async def listar_disponibilidade_periodo(
+        self,
+        data_inicio: date,
+        data_fim: date,
+        medico_ids: Optional[List[str]] = None,
+        especialidade: Optional[str] = None
+    ) -> List[DisponibilidadeMedico]:
+        """
+        Lista horários disponíveis de vários médicos em vários dias
+        
+        - Médicos por lista de IDs ou por especialidade
+        - Uma única query de consultas para todo o período e médicos
+        - Slots calculados em uma passada sobre as consultas
+        """
+        logger.info(
+            f"Listando disponibilidade - Período: {data_inicio} a {data_fim}, "
+            f"Médicos: {medico_ids}, Especialidade: {especialidade}"
+        )
+        
+        if data_fim < data_inicio:
+            raise HTTPException(status_code=400, detail="data_fim deve ser maior ou igual a data_inicio")
         
-        # Gera todos os horários possíveis (08:00 - 18:00, intervalos de 30min)
-        horarios_possiveis = []
-        hora_inicio = 8
-        hora_fim = 18
+        total_dias = (data_fim - data_inicio).days + 1
+        max_dias = self.config.disponibilidade_max_dias
+        if total_dias > max_dias:
+            raise HTTPException(status_code=400, detail=f"Período máximo de {max_dias} dias")
         
-        for hora in range(hora_inicio, hora_fim):
-            for minuto in [0, 30]:
-                horarios_possiveis.append(f"{hora:02d}:{minuto:02d}")
+        if medico_ids:
+            medicos = await carregador_medicos().load_many(dict.fromkeys(medico_ids))
+            medicos = [m for m in medicos if m and m.ativo]
+        elif especialidade:
+            medicos = await self.medico_repo.find_by_especialidade(especialidade)
+        else:
+            raise HTTPException(status_code=400, detail="Informe medico_ids ou especialidade")
         
-        # Remove horários já ocupados
-        horarios_ocupados = set()
-        for consulta in consultas:
-            if consulta.status == StatusConsulta.CANCELADA:
-                continue
+        if not medicos:
+            return []
+        
+        # Uma query para todos os médicos e dias (e a véspera, para
+        # consultas que atravessam a meia-noite)
+        consultas = await self.repository.find_by_periodo(
+            datetime.combine(data_inicio, datetime.min.time()) - timedelta(minutes=DURACAO_MAXIMA_MINUTOS),
+            datetime.combine(data_fim, datetime.max.time()),
+            medico_ids=[m.id for m in medicos]
+        )
+        
+        # Uma passada: (médico, dia) -> máscara de slots ocupados
+        ocupacao = mapa_horarios.mapa_ocupacao(
+            c for c in consultas if c.status != StatusConsulta.CANCELADA
+        )
+        
+        dias = [data_inicio + timedelta(days=i) for i in range(total_dias)]
+        
+        resultado = []
+        for medico in medicos:
+            grade = self.grades.obter(medico)
+            # Strings produzidas apenas aqui, na resposta
+            horarios = {
+                dia.isoformat(): mapa_horarios.horarios_livres(
+                    grade[dia.weekday()] & ~ocupacao.get((medico.id, dia), 0)
+                )
+                for dia in dias
+            }
+            resultado.append(DisponibilidadeMedico(
+                medico_id=medico.id,
+                medico_nome=medico.nome,
+                especialidade=medico.especialidade,
+                horarios=horarios
+            ))
+        
+        return resultado
+    
+    async def buscar_proximos_horarios(
+        self,
+        especialidade: str,
+        a_partir_de: Optional[datetime] = None,
+        quantidade: int = 5,
+        max_dias: Optional[int] = None
+    ) -> List[HorarioLivre]:
+        """
+        Busca os próximos horários livres entre os médicos de uma especialidade
+        
+        - Ocupação carregada em janelas de dias (uma query por janela)
+        - Cada dia custa uma operação de máscara por médico
+        - Interrompe a busca ao encontrar a quantidade pedida
+        """
+        agora = datetime.now()
+        a_partir_de = max(a_partir_de or agora, agora)
+        limite_dias = self.config.proximos_horarios_max_dias
+        max_dias = min(max_dias or limite_dias, limite_dias)
+        
+        logger.info(
+            f"Buscando próximos horários - Especialidade: {especialidade}, "
+            f"A partir de: {a_partir_de}, Quantidade: {quantidade}"
+        )
+        
+        medicos = await self.medico_repo.find_by_especialidade(especialidade)
+        if not medicos:
+            return []
+        
+        grades = [self.grades.obter(m) for m in medicos]
+        primeiro_dia = a_partir_de.date()
+        ultimo_dia = primeiro_dia + timedelta(days=max_dias - 1)
+        minutos = a_partir_de.hour * 60 + a_partir_de.minute
+        if a_partir_de.second or a_partir_de.microsecond:
+            minutos += 1  # minuto já iniciado não conta
+        corte_inicial = mapa_horarios.mascara_a_partir_de(minutos)
+        
+        resultado: List[HorarioLivre] = []
+        janela_inicio = primeiro_dia
+        while janela_inicio <= ultimo_dia and len(resultado) < quantidade:
+            janela_fim = min(janela_inicio + timedelta(days=_JANELA_BUSCA_DIAS - 1), ultimo_dia)
             
-            # Adiciona horário da consulta e próximos slots baseado na duração
-            hora_consulta = consulta.data_hora.strftime("%H:%M")
-            horarios_ocupados.add(hora_consulta)
+            # Inclui consultas da véspera que podem atravessar a meia-noite
+            consultas = await self.repository.find_by_periodo(
+                datetime.combine(janela_inicio, datetime.min.time()) - timedelta(minutes=DURACAO_MAXIMA_MINUTOS),
+                datetime.combine(janela_fim, datetime.max.time()),
+                medico_ids=[m.id for m in medicos]
+            )
+            ocupacao = mapa_horarios.mapa_ocupacao(
+                c for c in consultas if c.status != StatusConsulta.CANCELADA
+            )
             
-            # Se a consulta dura mais de 30min, marca próximos slots
-            if consulta.duracao_minutos > 30:
-                slots_ocupados = (consulta.duracao_minutos + 29) // 30  # Arredonda para cima
-                hora_atual = consulta.data_hora
-                for _ in range(1, slots_ocupados):
-                    hora_atual += timedelta(minutes=30)
-                    horarios_ocupados.add(hora_atual.strftime("%H:%M"))
-        
-        # Retorna horários disponíveis
-        horarios_disponiveis = [h for h in horarios_possiveis if h not in horarios_ocupados]
+            dia = janela_inicio
+            while dia <= janela_fim and len(resultado) < quantidade:
+                corte = corte_inicial if dia == primeiro_dia else mapa_horarios.MASCARA_DIA
+                livres = [
+                    grade[dia.weekday()] & ~ocupacao.get((medico.id, dia), 0) & corte
+                    for medico, grade in zip(medicos, grades)
+                ]
+                base = datetime.combine(dia, datetime.min.time())
+                
+                # Intercala os médicos em ordem de horário
+                while len(resultado) < quantidade:
+                    encontrado = mapa_horarios.primeiro_livre(livres)
+                    if encontrado is None:
+                        break
+                    slot, posicao = encontrado
+                    livres[posicao] &= ~(1 << slot)
+                    medico = medicos[posicao]
+                    resultado.append(HorarioLivre(
+                        medico_id=medico.id,
+                        medico_nome=medico.nome,
+                        especialidade=medico.especialidade,
+                        data_hora=base + timedelta(minutes=slot * mapa_horarios.SLOT_MINUTOS)
+                    ))
+                
+                dia += timedelta(days=1)
+            
+            janela_inicio = janela_fim + timedelta(days=1)
         
-        logger.info(f"Horários disponíveis encontrados: {len(horarios_disponiveis)}")
-        return horarios_disponiveis
+        return resultado
@@ -0,0 +1,99 @@
+"""
+Grade semanal de atendimento dos médicos
+
+Conceitos de SO demonstrados:
+- Pré-compilação: o JSON de Medico.horarios_atendimento é convertido uma
+  única vez em 7 máscaras de bits (uma por dia da semana)
+- Cache em memória invalidado na escrita (MedicoService.atualizar)
+
+Formato de horarios_atendimento (mesmo do frontend - HorariosPage):
+    [{"dia_semana": 1, "horario_inicio": "08:00", "horario_fim": "12:00"}, ...]
+    dia_semana: 0 = domingo ... 6 = sábado
+Sem grade cadastrada vale o horário padrão: 08:00 às 18:00, todos os dias.
+Faixas fora da divisão de 30 minutos valem só pelos slots inteiros que
+contêm (08:15-12:15 oferece de 08:30 a 11:30).
+"""
+
+import json
+from typing import Dict, Optional, Tuple
+
+from app.infra.logger import get_logger
+from app.services import mapa_horarios
+
+logger = get_logger(__name__)
+
+# Índice pelo weekday() do Python (0 = segunda ... 6 = domingo)
+GradeSemanal = Tuple[int, int, int, int, int, int, int]
+
+GRADE_PADRAO: GradeSemanal = (mapa_horarios.mascara_jornada(8, 18),) * 7
+GRADE_VAZIA: GradeSemanal = (0,) * 7
+
+
+def _minutos(horario: str) -> int:
+    """Converte HH:MM em minutos desde 00:00"""
+    hora, minuto = horario.split(":")
+    return int(hora) * 60 + int(minuto)
+
+
+def compilar_grade(horarios_json: Optional[str]) -> GradeSemanal:
+    """
+    Converte o JSON de horários de atendimento em máscaras por dia
+    
+    Grade inválida resulta em grade vazia (nenhum horário oferecido)
+    """
+    if not horarios_json:
+        return GRADE_PADRAO
+    
+    try:
+        faixas = json.loads(horarios_json)
+        grade = [0] * 7
+        for faixa in faixas:
+            # dia_semana do frontend (0 = domingo) -> weekday() (0 = segunda)
+            weekday = (int(faixa["dia_semana"]) - 1) % 7
+            grade[weekday] |= mapa_horarios.mascara_contida(
+                _minutos(faixa["horario_inicio"]),
+                _minutos(faixa["horario_fim"])
+            )
+        return tuple(grade)
+    except (ValueError, KeyError, TypeError) as e:
+        logger.warning(f"Horários de atendimento inválidos, grade vazia: {e}")
+        return GRADE_VAZIA
+
+
+class GradeCache:
+    """
+    Cache das grades compiladas por médico
+    
+    Guarda o JSON de origem junto com a grade: se o valor lido do banco
+    mudar (ex.: alterado por outro processo), a grade é recompilada.
+    """
+    
+    def __init__(self):
+        self._grades: Dict[str, Tuple[Optional[str], GradeSemanal]] = {}
+    
+    def obter(self, medico) -> GradeSemanal:
+        """Retorna a grade compilada do médico"""
+        origem = medico.horarios_atendimento
+        cache = self._grades.get(medico.id)
+        if cache is not None and cache[0] == origem:
+            return cache[1]
+        
+        grade = compilar_grade(origem)
+        self._grades[medico.id] = (origem, grade)
+        return grade
+    
+    def invalidar(self, medico_id: str):
+        """Descarta a grade compilada do médico"""
+        self._grades.pop(medico_id, None)
+
+
+# Singleton
+_grade_cache: GradeCache | None = None
+
+
+def get_grade_cache() -> GradeCache:
+    """Retorna a instância do cache de grades"""
+    global _grade_cache
+    if _grade_cache is None:
+        _grade_cache = GradeCache()
+    return _grade_cache
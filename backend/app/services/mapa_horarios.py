@@ -0,0 +1,133 @@
+"""
+Mapa de horários em bits (bitmap de slots)
+
+Conceitos de SO demonstrados:
+- Bitmaps de alocação (como o mapa de blocos livres de um sistema de arquivos)
+- Operações bit a bit: ocupação, interseção e busca do primeiro livre
+  processam todos os slots do dia de uma vez, sem laço por horário
+
+Cada dia é um inteiro de 48 bits: o bit i representa o slot de 30 minutos
+que começa em i * 30 minutos após a meia-noite (bit 16 = 08:00).
+Strings "HH:MM" só são produzidas na borda da API (horarios_livres).
+
+Observação: inteiros Python fazem as operações em palavras de máquina,
+sem dependência extra (NumPy não faz parte do requirements.txt).
+"""
+
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+SLOT_MINUTOS = 30
+SLOTS_POR_DIA = 24 * 60 // SLOT_MINUTOS
+MASCARA_DIA = (1 << SLOTS_POR_DIA) - 1
+
+# Rótulos pré-calculados: evita strftime por slot
+_ROTULOS: Tuple[str, ...] = tuple(
+    f"{(i * SLOT_MINUTOS) // 60:02d}:{(i * SLOT_MINUTOS) % 60:02d}"
+    for i in range(SLOTS_POR_DIA)
+)
+
+
+def mascara_intervalo(inicio_minutos: int, fim_minutos: int) -> int:
+    """
+    Máscara dos slots que intersectam [inicio, fim) (minutos desde 00:00)
+    
+    Ex.: 09:15-09:45 ocupa os slots de 09:00 e 09:30
+    """
+    primeiro = max(inicio_minutos, 0) // SLOT_MINUTOS
+    ultimo = min(-(-fim_minutos // SLOT_MINUTOS), SLOTS_POR_DIA)  # teto
+    if ultimo <= primeiro:
+        return 0
+    return ((1 << (ultimo - primeiro)) - 1) << primeiro
+
+
+def mascara_contida(inicio_minutos: int, fim_minutos: int) -> int:
+    """
+    Máscara dos slots inteiramente dentro de [inicio, fim)
+    
+    Arredonda para dentro, ao contrário de mascara_intervalo:
+    ex.: 08:15-12:15 contém os slots de 08:30 a 11:30
+    """
+    primeiro = -(-max(inicio_minutos, 0) // SLOT_MINUTOS)  # teto
+    ultimo = min(fim_minutos // SLOT_MINUTOS, SLOTS_POR_DIA)
+    if ultimo <= primeiro:
+        return 0
+    return ((1 << (ultimo - primeiro)) - 1) << primeiro
+
+
+def mascara_a_partir_de(minutos: int) -> int:
+    """Máscara dos slots que começam em ou após o minuto informado"""
+    primeiro = -(-max(minutos, 0) // SLOT_MINUTOS)  # teto
+    if primeiro >= SLOTS_POR_DIA:
+        return 0
+    return MASCARA_DIA & ~((1 << primeiro) - 1)
+
+
+def mascara_jornada(hora_inicio: int = 8, hora_fim: int = 18) -> int:
+    """Máscara do horário de funcionamento (padrão 08:00 às 18:00)"""
+    return mascara_intervalo(hora_inicio * 60, hora_fim * 60)
+
+
+def acumular_ocupacao(
+    mapa: Dict[Tuple[str, date], int],
+    medico_id: str,
+    inicio: datetime,
+    fim: datetime
+):
+    """
+    Marca no mapa (médico, dia) -> máscara os slots de uma consulta
+    Consultas que atravessam a meia-noite ocupam os dois dias
+    """
+    dia = inicio.date()
+    while True:
+        base = datetime.combine(dia, datetime.min.time())
+        inicio_min = int((inicio - base).total_seconds() // 60)
+        fim_min = int(-(-(fim - base).total_seconds() // 60))
+        chave = (medico_id, dia)
+        mapa[chave] = mapa.get(chave, 0) | mascara_intervalo(inicio_min, fim_min)
+        if fim_min <= 24 * 60:
+            break
+        dia += timedelta(days=1)
+
+
+def mapa_ocupacao(consultas: Iterable) -> Dict[Tuple[str, date], int]:
+    """
+    Ocupação de todos os (médico, dia) em uma passada
+    As consultas recebidas já devem estar filtradas (sem canceladas)
+    """
+    mapa: Dict[Tuple[str, date], int] = {}
+    for consulta in consultas:
+        acumular_ocupacao(mapa, consulta.medico_id, consulta.data_hora, consulta.data_hora_fim)
+    return mapa
+
+
+def indices_livres(mascara: int) -> List[int]:
+    """Índices dos bits ligados, em ordem crescente"""
+    indices = []
+    while mascara:
+        menor = mascara & -mascara
+        indices.append(menor.bit_length() - 1)
+        mascara ^= menor
+    return indices
+
+
+def horarios_livres(mascara: int) -> List[str]:
+    """Converte a máscara de slots livres em horários HH:MM"""
+    return [_ROTULOS[i] for i in indices_livres(mascara)]
+
+
+def primeiro_livre(mascaras: Sequence[int]) -> Optional[Tuple[int, int]]:
+    """
+    Primeiro slot livre entre N máscaras (ex.: N médicos no mesmo dia)
+    
+    Returns:
+        (índice do slot, posição da máscara) ou None se todas vazias
+    """
+    melhor: Optional[Tuple[int, int]] = None
+    for posicao, mascara in enumerate(mascaras):
+        if not mascara:
+            continue
+        slot = (mascara & -mascara).bit_length() - 1
+        if melhor is None or slot < melhor[0]:
+            melhor = (slot, posicao)
+    return melhor
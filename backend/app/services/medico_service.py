@@ -10,8 +10,11 @@ import json
 from app.models.db_models import Medico, Usuario, TipoUsuario
 from app.repositories.medico_repository import MedicoRepository
 from app.repositories.usuario_repository import UsuarioRepository
-from app.schemas.medico_schema import MedicoCreate, MedicoUpdate
+from app.schemas.medico_schema import MedicoCreate, MedicoUpdate, HorarioAtendimentoSchema
+from app.services.grade_semanal import get_grade_cache
+from app.services.carregadores import carregador_medicos, invalidar_medico
 from app.infra.logger import get_logger
+from app.infra.paginacao import Pagina, CursorInvalidoError, limite_efetivo
 
 logger = get_logger(__name__)
 
@@ -22,6 +25,13 @@ class MedicoService:
     def __init__(self):
         self.repository = MedicoRepository()
         self.usuario_repository = UsuarioRepository()
+        self.grades = get_grade_cache()
+    
+    def _horarios_json(self, horarios: Optional[List[HorarioAtendimentoSchema]]) -> Optional[str]:
+        """Serializa os horários de atendimento para a coluna JSON"""
+        if horarios is None:
+            return None
+        return json.dumps([h.model_dump() for h in horarios])
     
     async def listar_todos(self) -> List[Medico]:
         """Lista todos os médicos"""
@@ -33,10 +43,27 @@ class MedicoService:
         logger.info("Listando médicos ativos")
         return await self.repository.find_ativos()
     
+    async def listar_pagina(
+        self,
+        limit: Optional[int] = None,
+        after: Optional[str] = None,
+        apenas_ativos: bool = True,
+        especialidade: Optional[str] = None
+    ) -> Pagina[Medico]:
+        """Lista médicos paginados por cursor"""
+        limite = limite_efetivo(limit)
+        logger.info(f"Listando médicos - Limite: {limite}, Após: {after}")
+        try:
+            return await self.repository.find_pagina(
+                limite, after, apenas_ativos=apenas_ativos, especialidade=especialidade
+            )
+        except CursorInvalidoError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    
     async def buscar_por_id(self, medico_id: str) -> Optional[Medico]:
         """Busca médico por ID"""
         logger.info(f"Buscando médico por ID: {medico_id}")
-        medico = await self.repository.find_by_id(medico_id)
+        medico = await carregador_medicos().load(medico_id)
         if not medico:
             logger.warning(f"Médico não encontrado: {medico_id}")
         return medico
@@ -69,7 +96,8 @@ class MedicoService:
             especialidade=dados.especialidade,
             telefone=dados.telefone,
             email=dados.email,
-            ativo=True
+            ativo=True,
+            horarios_atendimento=self._horarios_json(dados.horarios_atendimento)
         )
         
         medico_criado = await self.repository.create(medico)
@@ -114,8 +142,15 @@ class MedicoService:
             medico.email = dados.email
         if dados.ativo is not None:
             medico.ativo = dados.ativo
+        if dados.horarios_atendimento is not None:
+            medico.horarios_atendimento = self._horarios_json(dados.horarios_atendimento)
+        
+        atualizado = await self.repository.update(medico_id, medico)
         
-        return await self.repository.update(medico_id, medico)
+        # Grade compilada recalculada no próximo acesso
+        self.grades.invalidar(medico_id)
+        invalidar_medico(medico_id)
+        return atualizado
     
     async def deletar(self, medico_id: str) -> bool:
         """Remove médico (soft delete - marca como inativo)"""
@@ -129,4 +164,5 @@ class MedicoService:
         # Soft delete
         medico.ativo = False
         await self.repository.update(medico_id, medico)
+        invalidar_medico(medico_id)
         return True
@@ -11,7 +11,9 @@ from app.models.db_models import Paciente, Usuario, TipoUsuario
 from app.repositories.paciente_repository import PacienteRepository
 from app.repositories.usuario_repository import UsuarioRepository
 from app.schemas.paciente_schema import PacienteCreate, PacienteUpdate
+from app.services.carregadores import carregador_pacientes, invalidar_paciente
 from app.infra.logger import get_logger
+from app.infra.paginacao import Pagina, CursorInvalidoError, limite_efetivo
 
 logger = get_logger(__name__)
 
@@ -33,10 +35,24 @@ class PacienteService:
         logger.info("Listando pacientes ativos")
         return await self.repository.find_ativos()
     
+    async def listar_pagina(
+        self,
+        limit: Optional[int] = None,
+        after: Optional[str] = None,
+        apenas_ativos: bool = True
+    ) -> Pagina[Paciente]:
+        """Lista pacientes paginados por cursor"""
+        limite = limite_efetivo(limit)
+        logger.info(f"Listando pacientes - Limite: {limite}, Após: {after}")
+        try:
+            return await self.repository.find_pagina(limite, after, apenas_ativos=apenas_ativos)
+        except CursorInvalidoError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    
     async def buscar_por_id(self, paciente_id: str) -> Optional[Paciente]:
         """Busca paciente por ID"""
         logger.info(f"Buscando paciente por ID: {paciente_id}")
-        paciente = await self.repository.find_by_id(paciente_id)
+        paciente = await carregador_pacientes().load(paciente_id)
         if not paciente:
             logger.warning(f"Paciente não encontrado: {paciente_id}")
         return paciente
@@ -127,7 +143,9 @@ class PacienteService:
         if dados.ativo is not None:
             paciente.ativo = dados.ativo
         
-        return await self.repository.update(paciente_id, paciente)
+        atualizado = await self.repository.update(paciente_id, paciente)
+        invalidar_paciente(paciente_id)
+        return atualizado
     
     async def deletar(self, paciente_id: str) -> bool:
         """Remove paciente (soft delete - marca como inativo)"""
@@ -141,4 +159,5 @@ class PacienteService:
         # Soft delete
         paciente.ativo = False
         await self.repository.update(paciente_id, paciente)
+        invalidar_paciente(paciente_id)
         return True
@@ -0,0 +1,273 @@
+"""
+Service de Jobs de Relatório - geração em segundo plano
+
+Conceitos de SO demonstrados:
+- Fila de tarefas: a requisição HTTP só enfileira o job e retorna
+- Escalonamento com limite de concorrência: um semáforo define quantas
+  gerações executam ao mesmo tempo em cada worker (grau de multiprogramação)
+- Estados de processo: pendente -> executando -> concluído/falhou/cancelado
+- Memória compartilhada entre processos: o estado dos jobs fica no banco
+  (tabela relatorio_jobs), visível a todos os workers; o limite de jobs
+  ativos é global
+- Sinalização entre threads e processos: o pedido de cancelamento é
+  gravado no banco; o worker dono do job o lê periodicamente e avisa a
+  geração por um threading.Event
+- Heartbeat: jobs cujo worker parou de dar sinal são marcados como falhos
+"""
+
+import asyncio
+import os
+import socket
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from functools import partial
+from typing import Dict, List, Optional
+from uuid import uuid4
+
+from fastapi import HTTPException
+
+from app.models.db_models import JobRelatorio
+from app.repositories.relatorio_job_repository import RelatorioJobRepository
+from app.schemas.relatorio_schema import RelatorioRequest, StatusJobRelatorio
+from app.services.relatorio_service import RelatorioCanceladoError, get_relatorio_service
+from app.infra.config import get_config
+from app.infra.logger import get_logger
+
+logger = get_logger(__name__)
+
+_STATUS_FINAIS = {
+    StatusJobRelatorio.CONCLUIDO.value,
+    StatusJobRelatorio.FALHOU.value,
+    StatusJobRelatorio.CANCELADO.value
+}
+
+
+@dataclass
+class RelatorioJob:
+    """Job em execução neste worker (tarefa, progresso e sinal de cancelamento)"""
+    id: str
+    request: RelatorioRequest
+    status: StatusJobRelatorio = StatusJobRelatorio.PENDENTE
+    progresso: float = 0.0
+    etapa: Optional[str] = "na fila"
+    tarefa: Optional[asyncio.Task] = field(default=None, repr=False)
+    cancelamento: threading.Event = field(default_factory=threading.Event, repr=False)
+
+
+class RelatorioJobService:
+    """
+    Fila de jobs de relatório
+    
+    Conceitos de SO:
+    - Cada job é uma tarefa asyncio do worker que o recebeu; a escrita do
+      arquivo ocorre no pool de threads/processos do RelatorioService
+    - Semáforo limita as gerações simultâneas do worker; as demais aguardam
+    - O estado vai para o banco: transições na hora, progresso e heartbeat
+      a cada relatorio_job_sincronizacao_ms (tarefa de monitoramento)
+    - Jobs finalizados ficam consultáveis por relatorio_job_retencao_minutos
+    """
+    
+    def __init__(self):
+        self.config = get_config()
+        self.relatorios = get_relatorio_service()
+        self.repository = RelatorioJobRepository()
+        self.worker = f"{socket.gethostname()}:{os.getpid()}"
+        self._locais: Dict[str, RelatorioJob] = {}
+        self._semaforo = asyncio.Semaphore(self.config.relatorio_max_jobs_simultaneos)
+        self._monitor: Optional[asyncio.Task] = None
+    
+    async def enfileirar(self, request: RelatorioRequest) -> JobRelatorio:
+        """
+        Valida o pedido e enfileira a geração
+        
+        Raises:
+            ValueError: se os filtros obrigatórios do tipo não foram informados
+            HTTPException: 429 se a fila (de todos os workers) estiver cheia
+        """
+        request.validate_filters()
+        await self._remover_expirados()
+        
+        agora = datetime.now()
+        registro = JobRelatorio(
+            id=str(uuid4()),
+            tipo=request.tipo.value,
+            formato=request.formato.value,
+            parametros=request.model_dump_json(),
+            status=StatusJobRelatorio.PENDENTE.value,
+            progresso=0.0,
+            etapa="na fila",
+            cancelar=False,
+            worker=self.worker,
+            criado_em=agora,
+            atualizado_em=agora
+        )
+        if not await self.repository.create_se_houver_vaga(registro, self.config.relatorio_max_jobs_pendentes):
+            raise HTTPException(
+                status_code=429,
+                detail="Fila de relatórios cheia, tente novamente em instantes"
+            )
+        
+        job = RelatorioJob(id=registro.id, request=request)
+        self._locais[job.id] = job
+        job.tarefa = asyncio.create_task(self._executar(job))
+        self._iniciar_monitor()
+        logger.info(f"Job de relatório enfileirado: {job.id} ({request.tipo.value}/{request.formato.value})")
+        return registro
+    
+    async def obter(self, job_id: str) -> JobRelatorio:
+        """Busca job por ID em qualquer worker (404 se não existir ou já expirou)"""
+        registro = await self.repository.find_by_id(job_id)
+        if registro is None:
+            raise HTTPException(status_code=404, detail="Job de relatório não encontrado")
+        return self._com_progresso_local(registro)
+    
+    async def listar(self) -> List[JobRelatorio]:
+        """Jobs retidos, do mais recente ao mais antigo"""
+        await self._remover_expirados()
+        return [self._com_progresso_local(registro) for registro in await self.repository.find_recentes()]
+    
+    async def cancelar(self, job_id: str) -> JobRelatorio:
+        """
+        Cancela um job pendente ou em execução, em qualquer worker
+        
+        O pedido é gravado no banco. No worker dono do job: pendente, a
+        tarefa é cancelada antes de ocupar o semáforo; em execução, a
+        geração para no próximo reporte de progresso.
+        """
+        registro = await self.obter(job_id)
+        if registro.status in _STATUS_FINAIS or not await self.repository.solicitar_cancelamento(job_id):
+            registro = await self.obter(job_id)
+            raise HTTPException(status_code=409, detail=f"Job já finalizado ({registro.status})")
+        
+        job = self._locais.get(job_id)
+        if job is not None:
+            self._sinalizar_cancelamento(job)
+        logger.info(f"Cancelamento solicitado: job {job_id}")
+        return await self.obter(job_id)
+    
+    async def encerrar(self):
+        """Cancela os jobs deste worker (shutdown da aplicação)"""
+        tarefas = []
+        for job in self._locais.values():
+            if job.tarefa is not None:
+                job.cancelamento.set()
+                job.tarefa.cancel()
+                tarefas.append(job.tarefa)
+        await asyncio.gather(*tarefas, return_exceptions=True)
+        if self._monitor is not None:
+            self._monitor.cancel()
+            await asyncio.gather(self._monitor, return_exceptions=True)
+    
+    def _com_progresso_local(self, registro: JobRelatorio) -> JobRelatorio:
+        """Progresso em memória para jobs deste worker (mais recente que o banco)"""
+        job = self._locais.get(registro.id)
+        if job is not None and registro.status not in _STATUS_FINAIS and not registro.cancelar:
+            registro.progresso = job.progresso
+            registro.etapa = job.etapa
+        return registro
+    
+    def _sinalizar_cancelamento(self, job: RelatorioJob):
+        """Avisa a geração; job ainda na fila tem a tarefa cancelada"""
+        job.cancelamento.set()
+        if job.status == StatusJobRelatorio.PENDENTE and job.tarefa is not None:
+            job.tarefa.cancel()
+        else:
+            job.etapa = "cancelando"
+    
+    async def _executar(self, job: RelatorioJob):
+        """Aguarda vaga no semáforo, gera o relatório e grava o estado final"""
+        campos = {}
+        try:
+            async with self._semaforo:
+                job.status = StatusJobRelatorio.EXECUTANDO
+                await self.repository.update(
+                    job.id, status=job.status.value, iniciado_em=datetime.now()
+                )
+                resultado = await self.relatorios.gerar_relatorio(
+                    job.request, partial(self._reportar_progresso, job)
+                )
+            campos = {
+                "status": StatusJobRelatorio.CONCLUIDO.value,
+                "progresso": 1.0,
+                "resultado_json": resultado.model_dump_json()
+            }
+            logger.info(f"Job de relatório concluído: {job.id} ({resultado.arquivo})")
+        except (asyncio.CancelledError, RelatorioCanceladoError):
+            campos = {"status": StatusJobRelatorio.CANCELADO.value}
+            logger.info(f"Job de relatório cancelado: {job.id}")
+        except Exception as e:
+            campos = {"status": StatusJobRelatorio.FALHOU.value, "erro": str(e)}
+            logger.error(f"Erro no job de relatório {job.id}: {e}")
+        finally:
+            self._locais.pop(job.id, None)
+            try:
+                await self.repository.update(
+                    job.id, etapa=None, finalizado_em=datetime.now(), **campos
+                )
+            except Exception as e:
+                logger.error(f"Job de relatório {job.id}: falha ao gravar o estado final - {e}")
+    
+    def _reportar_progresso(self, job: RelatorioJob, fracao: float, etapa: str):
+        """
+        Atualiza o progresso do job em memória (chamado também da thread
+        geradora); o monitor o grava no banco
+        Interrompe a geração se o cancelamento foi solicitado
+        """
+        if job.cancelamento.is_set():
+            raise RelatorioCanceladoError(f"Job {job.id} cancelado")
+        job.progresso = round(fracao, 4)
+        job.etapa = etapa
+    
+    def _iniciar_monitor(self):
+        """Inicia a tarefa de monitoramento se não estiver rodando"""
+        if self._monitor is None or self._monitor.done():
+            self._monitor = asyncio.create_task(self._monitorar())
+    
+    async def _monitorar(self):
+        """
+        Enquanto houver jobs locais: grava progresso e heartbeat e aplica
+        os cancelamentos pedidos por qualquer worker
+        """
+        intervalo = self.config.relatorio_job_sincronizacao_ms / 1000
+        while self._locais:
+            await asyncio.sleep(intervalo)
+            locais = dict(self._locais)
+            if not locais:
+                break
+            try:
+                cancelados = await self.repository.sincronizar(
+                    {job_id: (job.progresso, job.etapa) for job_id, job in locais.items()}
+                )
+            except Exception as e:
+                logger.warning(f"Jobs de relatório: falha ao sincronizar estado - {e}")
+                continue
+            for job_id in cancelados:
+                job = locais[job_id]
+                if not job.cancelamento.is_set():
+                    logger.info(f"Cancelamento recebido de outro worker: job {job_id}")
+                    self._sinalizar_cancelamento(job)
+    
+    async def _remover_expirados(self):
+        """Marca jobs órfãos como falhos e descarta os finalizados há mais que a retenção"""
+        agora = datetime.now()
+        orfaos = await self.repository.marcar_orfaos(
+            agora - timedelta(seconds=self.config.relatorio_job_heartbeat_limite_segundos)
+        )
+        if orfaos:
+            logger.warning(f"Jobs de relatório sem heartbeat marcados como falhos: {orfaos}")
+        await self.repository.delete_finalizados(
+            agora - timedelta(minutes=self.config.relatorio_job_retencao_minutos)
+        )
+
+
+# Singleton
+_relatorio_job_service: RelatorioJobService | None = None
+
+
+def get_relatorio_job_service() -> RelatorioJobService:
+    """Retorna a instância do serviço de jobs de relatório"""
+    global _relatorio_job_service
+    if _relatorio_job_service is None:
+        _relatorio_job_service = RelatorioJobService()
+    return _relatorio_job_service
@@ -0,0 +1,320 @@
+"""
+Renderização de relatórios - executada em processos do pool
+
+Conceitos de SO demonstrados:
+- Paralelismo real: layout de PDF e serialização de planilhas são
+  limitados por CPU e rodam em processos separados, fora do GIL
+- Passagem de mensagens: o processo pai envia apenas dados serializáveis
+  (caminho, filtros, URL do banco) e recebe o resultado
+- E/S em fluxo: o processo filho lê as consultas do banco em lotes; a
+  planilha é gravada em modo write-only (linhas vão direto para o
+  arquivo temporário do xlsx). No PDF só o layout é em fluxo: o
+  ReportLab guarda as páginas prontas até gravar o arquivo, então a
+  memória cresce com o número de páginas
+- Comunicação entre processos: a cada lote o filho grava o avanço e
+  consulta o pedido de cancelamento em objetos compartilhados com o pai
+  (SinalGeracao)
+
+Funções de nível de módulo: o processo filho (spawn) importa este módulo
+e recebe tudo o que precisa pelos argumentos.
+"""
+
+from datetime import datetime
+from typing import Callable, Iterator, List, Optional, Tuple
+
+from reportlab.lib.pagesizes import A4
+from reportlab.lib import colors
+from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+
+# Colunas de ConsultaRepository.select_relatorio nos relatórios tabulares (CSV e Excel)
+CABECALHO_RELATORIO = [
+    'ID', 'Paciente ID', 'Paciente', 'Médico ID', 'Médico', 'Especialidade',
+    'Data/Hora', 'Duração (min)', 'Status', 'Observações'
+]
+
+_CABECALHO_PDF = ["Data/Hora", "Paciente", "Médico", "Especialidade", "Status"]
+
+# Larguras fixas (pt), somando a área útil do A4 com as margens padrão:
+# o layout não precisa medir cada célula para dimensionar as colunas
+_LARGURAS_PDF = [80, 120, 110, 81, 60]
+# Caracteres que cabem em cada coluna de texto (Helvetica 10)
+_LIMITE_NOME_PDF = 22
+_LIMITE_ESPECIALIDADE_PDF = 15
+
+# Fração do avanço do PDF atribuída à leitura e montagem das páginas; o restante é o salvamento
+_FRACAO_PAGINAS_PDF = 0.95
+# Fração do avanço do Excel atribuída à leitura/escrita das linhas; o restante é o salvamento
+_FRACAO_LEITURA_EXCEL = 0.9
+
+_ESTILO_TABELA_PDF = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, 0), 10),
+    ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+    ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+    ('GRID', (0, 0), (-1, -1), 1, colors.black)
+])
+
+
+class RelatorioCanceladoError(Exception):
+    """Geração interrompida pelo cancelamento do job"""
+
+
+class SinalGeracao:
+    """
+    Canal entre o processo pai e o filho durante uma geração
+    
+    Guarda proxies de um multiprocessing.Manager (dict e Event), que
+    atravessam o pickle da tarefa: o filho grava o avanço e consulta o
+    cancelamento; o pai lê o avanço e pede o cancelamento.
+    """
+    
+    def __init__(self, gerenciador):
+        self._estado = gerenciador.dict(fracao=0.0, etapa="aguardando processo")
+        self._cancelamento = gerenciador.Event()
+    
+    def reportar(self, fracao: float, etapa: str):
+        """Filho: grava o avanço (0 a 1); interrompe se o cancelamento foi pedido"""
+        if self._cancelamento.is_set():
+            raise RelatorioCanceladoError("Geração cancelada")
+        self._estado.update(fracao=min(fracao, 1.0), etapa=etapa)
+    
+    def ler(self) -> Tuple[float, str]:
+        """Pai: último avanço reportado pelo filho"""
+        estado = self._estado.copy()
+        return estado["fracao"], estado["etapa"]
+    
+    def cancelar(self):
+        """Pai: pede a interrupção no próximo reporte do filho"""
+        self._cancelamento.set()
+
+
+def _ler_consultas(
+    database_url: str,
+    filtros: dict,
+    tamanho_lote: int,
+    sinal: Optional[SinalGeracao] = None,
+    fracao_leitura: float = 1.0,
+    etapa: str = "lendo consultas"
+) -> Iterator:
+    """
+    Consultas filtradas, lidas em lotes pela sessão síncrona
+    A engine do processo filho aponta para o mesmo banco do pai
+    
+    Com `sinal`, reporta ao fim de cada lote a fração lida (escalada para
+    0..fracao_leitura) e para se o cancelamento foi pedido.
+    """
+    from sqlalchemy import func, select
+    from app.infra.database import init_database, get_db_session
+    from app.repositories.consulta_repository import ConsultaRepository
+    
+    init_database(database_url)
+    consulta = ConsultaRepository().select_relatorio(**filtros)
+    stmt = consulta.execution_options(yield_per=tamanho_lote)
+    
+    with get_db_session() as db:
+        total = 0
+        if sinal is not None:
+            total = db.scalar(select(func.count()).select_from(consulta.subquery()))
+            sinal.reportar(0.0, etapa)
+        lidas = 0
+        for lote in db.execute(stmt).partitions():
+            yield from lote
+            lidas += len(lote)
+            if sinal is not None:
+                sinal.reportar(fracao_leitura * lidas / max(total, 1), etapa)
+
+
+def _abreviar(texto: Optional[str], limite: int) -> str:
+    """Corta o texto para caber na coluna de largura fixa"""
+    texto = texto or ''
+    return texto if len(texto) <= limite else texto[:limite - 1] + '…'
+
+
+def _data_hora_br(valor: datetime) -> str:
+    """Data e hora no formato exibido no PDF e no Excel"""
+    return valor.strftime("%d/%m/%Y %H:%M")
+
+
+def linha_relatorio(linha, formatar_data: Callable[[datetime], str] = datetime.isoformat) -> list:
+    """
+    Valores de uma linha de ConsultaRepository.select_relatorio na ordem
+    de CABECALHO_RELATORIO; cada formato escolhe como escrever a data
+    """
+    return [
+        linha.id,
+        linha.paciente_id,
+        linha.paciente_nome or '',
+        linha.medico_id,
+        linha.medico_nome or '',
+        linha.medico_especialidade or '',
+        formatar_data(linha.data_hora),
+        linha.duracao_minutos,
+        linha.status.value,
+        linha.observacoes or ''
+    ]
+
+
+def _linha_pdf(linha) -> list:
+    """Células de uma linha de ConsultaRepository.select_relatorio no PDF"""
+    return [
+        _data_hora_br(linha.data_hora),
+        _abreviar(linha.paciente_nome, _LIMITE_NOME_PDF),
+        _abreviar(linha.medico_nome, _LIMITE_NOME_PDF),
+        _abreviar(linha.medico_especialidade, _LIMITE_ESPECIALIDADE_PDF),
+        linha.status.value
+    ]
+
+
+class _FlowablesSobDemanda(list):
+    """
+    Lista de flowables reabastecida por um gerador conforme o build a consome
+    
+    O build do platypus retira os flowables do início da lista e testa
+    len() a cada passo: mantendo só os próximos itens na lista, os blocos
+    já desenhados são liberados e os seguintes são lidos do banco só
+    quando necessários.
+    """
+    
+    def __init__(self, iniciais: list, gerador: Iterator):
+        super().__init__(iniciais)
+        self._gerador = gerador
+    
+    def __len__(self) -> int:
+        # Dois itens: o atual e o seguinte (consultado por keepWithNext)
+        while self._gerador is not None and super().__len__() < 2:
+            proximo = next(self._gerador, None)
+            if proximo is None:
+                self._gerador = None
+            else:
+                self.append(proximo)
+        return super().__len__()
+
+
+def _tabela_pdf(linhas: List[list]) -> Table:
+    """Bloco da tabela com cabeçalho próprio (repetido se o bloco quebrar de página)"""
+    table = Table([_CABECALHO_PDF] + linhas, colWidths=_LARGURAS_PDF, repeatRows=1)
+    table.setStyle(_ESTILO_TABELA_PDF)
+    return table
+
+
+def renderizar_pdf(
+    caminho: str,
+    titulo: str,
+    gerado_em: datetime,
+    database_url: str,
+    filtros: dict,
+    tamanho_lote: int,
+    linhas_por_tabela: int,
+    sinal: Optional[SinalGeracao] = None
+) -> int:
+    """
+    Gera relatório em PDF lendo as consultas do banco em lotes
+    
+    Em vez de uma única tabela com todas as linhas (layout superlinear),
+    monta blocos de `linhas_por_tabela` linhas com larguras fixas; cada
+    bloco é dividido e posicionado sozinho. Os blocos são criados conforme
+    o build avança (_FlowablesSobDemanda): leitura e layout andam juntos e
+    só os blocos da página atual ficam em memória. A memória não é
+    limitada: o canvas acumula as páginas prontas (cerca de 5 MB a cada
+    10 mil linhas) até gravar o arquivo no fim.
+    
+    Com `sinal`, o avanço e o cancelamento são verificados a cada lote lido.
+    
+    Returns:
+        Número de consultas exportadas
+    """
+    # Cria documento
+    doc = SimpleDocTemplate(caminho, pagesize=A4)
+    elements = []
+    styles = getSampleStyleSheet()
+    
+    # Título
+    title = Paragraph(f"<b>Relatório de Consultas - {titulo}</b>", styles['Title'])
+    elements.append(title)
+    elements.append(Spacer(1, 12))
+    
+    # Data de geração
+    data_text = Paragraph(f"Gerado em: {gerado_em.strftime('%d/%m/%Y %H:%M:%S')}", styles['Normal'])
+    elements.append(data_text)
+    elements.append(Spacer(1, 12))
+    
+    # Tabela de dados, em blocos montados conforme o build os consome
+    total = 0
+    
+    def _tabelas() -> Iterator[Table]:
+        nonlocal total
+        bloco = []
+        for linha in _ler_consultas(
+            database_url, filtros, tamanho_lote, sinal, _FRACAO_PAGINAS_PDF, "montando páginas"
+        ):
+            bloco.append(_linha_pdf(linha))
+            total += 1
+            if len(bloco) >= linhas_por_tabela:
+                yield _tabela_pdf(bloco)
+                bloco = []
+        
+        # Último bloco (ou só o cabeçalho, se não houver consultas)
+        if bloco or not total:
+            yield _tabela_pdf(bloco)
+        if sinal is not None:
+            sinal.reportar(_FRACAO_PAGINAS_PDF, "salvando PDF")
+    
+    doc.build(_FlowablesSobDemanda(elements, _tabelas()))
+    return total
+
+
+def renderizar_excel(
+    caminho: str,
+    database_url: str,
+    filtros: dict,
+    tamanho_lote: int,
+    linhas_por_planilha: int,
+    sinal: Optional[SinalGeracao] = None
+) -> int:
+    """
+    Gera relatório em Excel lendo as consultas do banco em fluxo
+    
+    Workbook write-only: cada linha é serializada ao ser adicionada, sem
+    manter as células em memória. Ao atingir `linhas_por_planilha` (limite
+    do Excel: 1.048.576 linhas, cabeçalho incluso) continua em nova aba.
+    Com `sinal`, o avanço e o cancelamento são verificados a cada lote.
+    
+    Returns:
+        Número de consultas exportadas
+    """
+    from openpyxl import Workbook
+    
+    # Cria workbook
+    wb = Workbook(write_only=True)
+    ws = None
+    linhas_na_planilha = linhas_por_planilha
+    total = 0
+    
+    for linha in _ler_consultas(
+        database_url, filtros, tamanho_lote, sinal, _FRACAO_LEITURA_EXCEL, "gravando planilha"
+    ):
+        # Nova aba ao atingir o limite de linhas
+        if linhas_na_planilha >= linhas_por_planilha:
+            planilhas = len(wb.worksheets)
+            ws = wb.create_sheet("Consultas" if not planilhas else f"Consultas ({planilhas + 1})")
+            ws.append(CABECALHO_RELATORIO)
+            linhas_na_planilha = 0
+        
+        ws.append(linha_relatorio(linha, _data_hora_br))
+        linhas_na_planilha += 1
+        total += 1
+    
+    # Relatório vazio: planilha só com o cabeçalho
+    if ws is None:
+        ws = wb.create_sheet("Consultas")
+        ws.append(CABECALHO_RELATORIO)
+    
+    # Salva
+    if sinal is not None:
+        sinal.reportar(_FRACAO_LEITURA_EXCEL, "salvando planilha")
+    wb.save(caminho)
+    return total
@@ -3,31 +3,70 @@ Service de Relatórios - geração de PDFs e CSVs
 
 Conceitos de SO demonstrados:
 - Operações de I/O em threads separadas
+- Operações CPU-bound (PDF, Excel) em processos separados
 - Geração de arquivos
 - Paths específicos por SO
+- Cancelamento cooperativo: a geração consulta o sinal de cancelamento
+  ao reportar progresso e interrompe entre linhas; no processo filho
+  (PDF/Excel), entre lotes, via objetos compartilhados
+- Streaming: exportação CSV em fluxo, com memória limitada a um lote
+- Cache em disco: relatórios identificados por filtros + versão dos dados,
+  publicados por rename atômico e despejados por idade/tamanho
 """
 
+import asyncio
 import csv
+import hashlib
+import io
+import json
+import os
+import time
 from datetime import datetime, date
 from pathlib import Path
-from typing import List
+from typing import AsyncIterator, Callable, Iterator, Optional
 from uuid import uuid4
 
-from reportlab.lib.pagesizes import A4
-from reportlab.lib import colors
-from reportlab.lib.styles import getSampleStyleSheet
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-
 from app.repositories.consulta_repository import ConsultaRepository
-from app.repositories.paciente_repository import PacienteRepository
-from app.repositories.medico_repository import MedicoRepository
 from app.schemas.relatorio_schema import RelatorioRequest, RelatorioResponse, TipoRelatorio, FormatoRelatorio
+from app.services.relatorio_render import (
+    CABECALHO_RELATORIO,
+    RelatorioCanceladoError,
+    SinalGeracao,
+    renderizar_pdf,
+    renderizar_excel,
+    linha_relatorio
+)
 from app.infra.config import get_config
+from app.infra.database import get_database_url
 from app.infra.logger import get_logger
 from app.infra.concurrency import get_concurrency_manager
 
 logger = get_logger(__name__)
 
+# Progresso (fração de 0 a 1) e etapa atual da geração
+ProgressoCallback = Callable[[float, str], None]
+
+# Faixa de progresso ocupada pela escrita do arquivo e intervalo de reporte
+_INICIO_GERACAO = 0.1
+_FIM_GERACAO = 0.95
+_PASSO_PROGRESSO = 200
+# Intervalo de leitura do avanço do processo filho (PDF/Excel)
+_INTERVALO_PROGRESSO_PROCESSO = 0.25
+
+
+def _sem_progresso(fracao: float, etapa: str):
+    """Callback padrão: geração síncrona, sem acompanhamento"""
+
+
+def _acompanhar(consultas: list, progresso: ProgressoCallback) -> Iterator:
+    """Percorre as consultas reportando o avanço a cada _PASSO_PROGRESSO linhas"""
+    total = len(consultas) or 1
+    for indice, consulta in enumerate(consultas):
+        if indice % _PASSO_PROGRESSO == 0:
+            fracao = _INICIO_GERACAO + (_FIM_GERACAO - _INICIO_GERACAO) * indice / total
+            progresso(fracao, "gerando arquivo")
+        yield consulta
+
 
 class RelatorioService:
     """
@@ -42,38 +81,79 @@ class RelatorioService:
     def __init__(self):
         self.config = get_config()
         self.consulta_repo = ConsultaRepository()
-        self.paciente_repo = PacienteRepository()
-        self.medico_repo = MedicoRepository()
         self.concurrency = get_concurrency_manager()
     
-    async def gerar_relatorio(self, request: RelatorioRequest) -> RelatorioResponse:
+    async def gerar_relatorio(
+        self,
+        request: RelatorioRequest,
+        progresso: Optional[ProgressoCallback] = None
+    ) -> RelatorioResponse:
         """
         Gera relatório conforme especificação
-        Usa thread pool para não bloquear
+        CSV no pool de threads; PDF e Excel no pool de processos
+        
+        Args:
+            progresso: chamado com (fração, etapa) durante a geração; pode
+                lançar RelatorioCanceladoError para interrompê-la até a
+                publicação do arquivo, depois da qual não é mais chamado
         """
         logger.info(f"Gerando relatório: {request.tipo.value} - Formato: {request.formato.value}")
+        progresso = progresso or _sem_progresso
         
         # Valida filtros
         request.validate_filters()
         
-        # Busca dados
-        consultas = await self._buscar_consultas(request)
-        
-        # Gera arquivo em thread separada (I/O pesado)
-        if request.formato == FormatoRelatorio.PDF:
-            file_path = await self.concurrency.run_in_thread(
-                self._gerar_pdf, request, consultas
-            )
-        elif request.formato == FormatoRelatorio.CSV:
-            file_path = await self.concurrency.run_in_thread(
-                self._gerar_csv, request, consultas
-            )
-        else:
-            file_path = await self.concurrency.run_in_thread(
-                self._gerar_excel, request, consultas
-            )
-        
-        # Informações do arquivo
+        extensao = {
+            FormatoRelatorio.PDF: "pdf",
+            FormatoRelatorio.CSV: "csv",
+            FormatoRelatorio.EXCEL: "xlsx"
+        }[request.formato]
+        
+        # Mesmo pedido sobre os mesmos dados: devolve o arquivo já gerado
+        versao = await self.consulta_repo.versao_dados()
+        destino = self._caminho_arquivo(request, extensao, self._chave_cache(request, versao))
+        if self._reaproveitar(destino):
+            logger.info(f"Relatório reaproveitado (versão dos dados {versao}): {destino.name}")
+            progresso(1.0, "concluído")
+            return self._resposta(request, destino, reaproveitado=True)
+        
+        # Geração em arquivo parcial; publicado por rename atômico ao concluir
+        file_path = destino.with_name(f"{destino.name}.{uuid4().hex[:6]}.parcial")
+        try:
+            # PDF e Excel: o processo filho lê as consultas do banco em fluxo
+            if request.formato == FormatoRelatorio.EXCEL:
+                progresso(_INICIO_GERACAO, "gerando planilha")
+                await self._gerar_excel(request, file_path, progresso)
+            elif request.formato == FormatoRelatorio.PDF:
+                progresso(_INICIO_GERACAO, "renderizando")
+                await self._gerar_pdf(request, file_path, progresso)
+            else:
+                # Busca dados
+                progresso(0.0, "buscando dados")
+                consultas = await self._buscar_consultas(request)
+                progresso(_INICIO_GERACAO, "gerando arquivo")
+                
+                # Escrita sequencial (limitada por I/O): thread separada
+                await self.concurrency.run_in_thread(
+                    self._gerar_csv, request, consultas, file_path, progresso
+                )
+            
+            # Despejo antes da publicação (o .parcial entra no total, mas não sai)
+            await self.concurrency.run_in_thread(self._limpar_relatorios, destino)
+            
+            # Último ponto de cancelamento: após o rename o relatório está
+            # publicado e nada mais pode lançar nem aguardar
+            progresso(_FIM_GERACAO, "publicando")
+            os.replace(file_path, destino)
+        except BaseException:
+            # Não deixa arquivo parcial (falha ou cancelamento)
+            file_path.unlink(missing_ok=True)
+            raise
+        
+        return self._resposta(request, destino)
+    
+    def _resposta(self, request: RelatorioRequest, file_path: Path, reaproveitado: bool = False) -> RelatorioResponse:
+        """Informações do arquivo gerado (data de geração = mtime)"""
         stat = file_path.stat()
         
         return RelatorioResponse(
@@ -81,152 +161,251 @@ class RelatorioService:
             caminho=str(file_path),
             tipo=request.tipo,
             formato=request.formato,
-            data_geracao=datetime.now(),
-            tamanho_bytes=stat.st_size
+            data_geracao=datetime.fromtimestamp(stat.st_mtime),
+            tamanho_bytes=stat.st_size,
+            reaproveitado=reaproveitado
+        )
+    
+    def _chave_cache(self, request: RelatorioRequest, versao: int) -> str:
+        """Hash de (tipo, formato, filtros, versão dos dados)"""
+        chave = json.dumps(
+            {
+                "tipo": request.tipo.value,
+                "formato": request.formato.value,
+                "filtros": self._filtros(request),
+                "versao": versao
+            },
+            sort_keys=True,
+            default=str
         )
+        return hashlib.sha256(chave.encode()).hexdigest()[:16]
+    
+    def _reaproveitar(self, file_path: Path) -> bool:
+        """
+        Marca o acesso a um relatório existente (atime, usado no despejo)
+        False se o arquivo não existe ou acabou de ser despejado
+        """
+        try:
+            stat = file_path.stat()
+            os.utime(file_path, (time.time(), stat.st_mtime))
+            return True
+        except FileNotFoundError:
+            return False
+    
+    def _limpar_relatorios(self, manter: Optional[Path] = None) -> int:
+        """
+        Política de despejo do diretório de relatórios
+        
+        Conceito de SO: Gerenciamento de disco
+        - Idade: remove arquivos gerados há mais de relatorio_cache_max_idade_horas
+        - Tamanho: acima de relatorio_cache_max_mb remove os menos acessados
+          (atime) primeiro; arquivos .parcial (gerações em andamento) só
+          saem pela idade
+        
+        Returns:
+            Número de arquivos removidos
+        """
+        limite_idade = time.time() - self.config.relatorio_cache_max_idade_horas * 3600
+        limite_bytes = self.config.relatorio_cache_max_mb * 1024 * 1024
+        candidatos = []
+        total = 0
+        removidos = 0
+        
+        for caminho in self.config.reports_dir.glob("relatorio_*"):
+            try:
+                stat = caminho.stat()
+                if stat.st_mtime < limite_idade:
+                    caminho.unlink()
+                    removidos += 1
+                    continue
+            except FileNotFoundError:
+                continue
+            total += stat.st_size
+            if caminho.suffix != ".parcial" and caminho != manter:
+                candidatos.append((stat.st_atime, stat.st_size, caminho))
+        
+        for _, tamanho, caminho in sorted(candidatos):
+            if total <= limite_bytes:
+                break
+            caminho.unlink(missing_ok=True)
+            total -= tamanho
+            removidos += 1
+        
+        if removidos:
+            logger.info(f"Relatórios removidos do cache: {removidos}")
+        return removidos
     
     async def _buscar_consultas(self, request: RelatorioRequest):
-        """Busca consultas conforme filtros"""
-        if request.tipo == TipoRelatorio.POR_PACIENTE:
-            return await self.consulta_repo.find_by_paciente(request.paciente_id)
+        """
+        Busca consultas conforme filtros, já com nomes e especialidade
+        Uma única instrução SQL (JOIN): nenhuma busca por linha
+        """
+        return await self.consulta_repo.find_relatorio(**self._filtros(request))
+    
+    async def exportar_csv(self, request: RelatorioRequest) -> AsyncIterator[bytes]:
+        """
+        Exporta o CSV em fluxo, sem arquivo intermediário
+        
+        Conceito de SO: Pipeline produtor/consumidor
+        - Cada lote lido do banco vira um bloco de bytes enviado ao cliente
+        - Memória limitada a um lote; o primeiro byte (cabeçalho) sai
+          antes da primeira leitura
         
-        elif request.tipo == TipoRelatorio.POR_MEDICO:
-            return await self.consulta_repo.find_by_medico(request.medico_id)
+        Os filtros devem ser validados antes (validate_filters): erros
+        após o início do fluxo não podem mais mudar o status HTTP.
+        """
+        encoding = self.config.file_encoding
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        
+        writer.writerow(CABECALHO_RELATORIO)
+        yield buffer.getvalue().encode(encoding)
         
-        elif request.tipo == TipoRelatorio.POR_PERIODO:
-            data_inicio = datetime.combine(request.data_inicio, datetime.min.time())
-            data_fim = datetime.combine(request.data_fim, datetime.max.time())
-            return await self.consulta_repo.find_by_periodo(data_inicio, data_fim)
+        total = 0
+        async for lote in self.consulta_repo.stream_lotes(
+            **self._filtros(request), tamanho_lote=self.config.relatorio_stream_lote
+        ):
+            buffer.seek(0)
+            buffer.truncate()
+            writer.writerows(linha_relatorio(consulta) for consulta in lote)
+            total += len(lote)
+            yield buffer.getvalue().encode(encoding)
         
-        else:  # GERAL
-            return await self.consulta_repo.find_all()
+        logger.info(f"CSV exportado em fluxo: {request.tipo.value} ({total} linhas)")
     
-    def _gerar_pdf(self, request: RelatorioRequest, consultas: list) -> Path:
-        """Gera relatório em PDF"""
-        # Nome do arquivo
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"relatorio_{request.tipo.value}_{timestamp}.pdf"
+    def _filtros(self, request: RelatorioRequest) -> dict:
+        """Filtros do repositório conforme o tipo do relatório"""
+        if request.tipo == TipoRelatorio.POR_PACIENTE:
+            return {"paciente_id": request.paciente_id}
+        if request.tipo == TipoRelatorio.POR_MEDICO:
+            return {"medico_id": request.medico_id}
+        if request.tipo == TipoRelatorio.POR_PERIODO:
+            return {
+                "data_inicio": datetime.combine(request.data_inicio, datetime.min.time()),
+                "data_fim": datetime.combine(request.data_fim, datetime.max.time())
+            }
+        return {}
+    
+    def _caminho_arquivo(self, request: RelatorioRequest, extensao: str, chave: str) -> Path:
+        """
+        Caminho do arquivo no diretório de relatórios
+        Determinístico: o mesmo pedido sobre os mesmos dados gera o mesmo nome
+        """
+        filename = f"relatorio_{request.tipo.value}_{chave}.{extensao}"
         file_path = self.config.reports_dir / filename
         
         # Garante que diretório existe
         file_path.parent.mkdir(parents=True, exist_ok=True)
-        
-        # Cria documento
-        doc = SimpleDocTemplate(str(file_path), pagesize=A4)
-        elements = []
-        styles = getSampleStyleSheet()
-        
-        # Título
-        title = Paragraph(f"<b>Relatório de Consultas - {request.tipo.value.replace('_', ' ').title()}</b>", styles['Title'])
-        elements.append(title)
-        elements.append(Spacer(1, 12))
-        
-        # Data de geração
-        data_text = Paragraph(f"Gerado em: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}", styles['Normal'])
-        elements.append(data_text)
-        elements.append(Spacer(1, 12))
-        
-        # Tabela de dados
-        data = [["ID", "Paciente", "Médico", "Data/Hora", "Status"]]
-        
-        for consulta in consultas:
-            data.append([
-                consulta.id[:8],
-                consulta.paciente_id[:8],
-                consulta.medico_id[:8],
-                consulta.data_hora.strftime("%d/%m/%Y %H:%M"),
-                consulta.status.value
-            ])
-        
-        table = Table(data)
-        table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 10),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black)
-        ]))
-        
-        elements.append(table)
-        
-        # Gera PDF
-        doc.build(elements)
-        
-        logger.info(f"PDF gerado: {file_path}")
         return file_path
     
-    def _gerar_csv(self, request: RelatorioRequest, consultas: list) -> Path:
-        """Gera relatório em CSV"""
-        # Nome do arquivo
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"relatorio_{request.tipo.value}_{timestamp}.csv"
-        file_path = self.config.reports_dir / filename
+    async def _executar_em_processo(self, progresso: ProgressoCallback, func: Callable, *args) -> int:
+        """
+        Executa a renderização no pool de processos acompanhando o filho
         
-        # Garante que diretório existe
-        file_path.parent.mkdir(parents=True, exist_ok=True)
+        Conceito de SO: Comunicação entre processos
+        - O filho recebe um SinalGeracao (objetos do Manager) e reporta o
+          avanço a cada lote/página; o pai o repassa a `progresso` a cada
+          _INTERVALO_PROGRESSO_PROCESSO segundos
+        - Se `progresso` lança (cancelamento) ou a tarefa é cancelada, o
+          pai sinaliza o filho, que para no próximo reporte
+        """
+        if progresso is _sem_progresso:
+            return await self.concurrency.run_in_process(func, *args)
         
+        gerenciador = await self.concurrency.gerenciador_compartilhado()
+        sinal = await self.concurrency.run_in_thread(SinalGeracao, gerenciador)
+        tarefa = asyncio.ensure_future(self.concurrency.run_in_process(func, *args, sinal=sinal))
+        try:
+            while True:
+                concluidas, _ = await asyncio.wait({tarefa}, timeout=_INTERVALO_PROGRESSO_PROCESSO)
+                if concluidas:
+                    return tarefa.result()
+                fracao, etapa = await self.concurrency.run_in_thread(sinal.ler)
+                progresso(_INICIO_GERACAO + (_FIM_GERACAO - _INICIO_GERACAO) * fracao, etapa)
+        except BaseException:
+            if not tarefa.done():
+                await self.concurrency.run_in_thread(sinal.cancelar)
+                # Aguarda o filho parar de escrever no arquivo parcial
+                await asyncio.shield(asyncio.wait({tarefa}))
+            raise
+    
+    async def _gerar_pdf(
+        self,
+        request: RelatorioRequest,
+        file_path: Path,
+        progresso: ProgressoCallback = _sem_progresso
+    ):
+        """
+        Renderiza o PDF no pool de processos
+        
+        Conceito de SO: Paralelismo real (fora do GIL)
+        - O filho lê as consultas em lotes e monta a tabela em blocos de
+          relatorio_pdf_linhas_por_tabela linhas (custo de layout linear),
+          criados conforme as páginas são montadas
+        - A memória do filho ainda cresce com o total de páginas: o
+          ReportLab só grava o arquivo ao final
+        - Avanço e cancelamento a cada lote lido
+        """
+        titulo = request.tipo.value.replace('_', ' ').title()
+        total = await self._executar_em_processo(
+            progresso,
+            renderizar_pdf,
+            str(file_path),
+            titulo,
+            datetime.now(),
+            get_database_url(),
+            self._filtros(request),
+            self.config.relatorio_stream_lote,
+            self.config.relatorio_pdf_linhas_por_tabela
+        )
+        logger.info(f"PDF gerado: {file_path} ({total} linhas)")
+    
+    async def _gerar_excel(
+        self,
+        request: RelatorioRequest,
+        file_path: Path,
+        progresso: ProgressoCallback = _sem_progresso
+    ):
+        """
+        Gera a planilha no pool de processos
+        
+        Conceito de SO: Memória constante em processo separado
+        - O filho abre a própria conexão (sessão síncrona) e lê em lotes
+        - Nenhuma lista de consultas é montada no pai nem serializada
+        - Avanço e cancelamento a cada lote
+        """
+        total = await self._executar_em_processo(
+            progresso,
+            renderizar_excel,
+            str(file_path),
+            get_database_url(),
+            self._filtros(request),
+            self.config.relatorio_stream_lote,
+            self.config.relatorio_excel_linhas_por_planilha
+        )
+        logger.info(f"Excel gerado: {file_path} ({total} linhas)")
+    
+    def _gerar_csv(
+        self,
+        request: RelatorioRequest,
+        consultas: list,
+        file_path: Path,
+        progresso: ProgressoCallback = _sem_progresso
+    ) -> Path:
+        """Gera relatório em CSV"""
         # Escreve CSV
         with open(file_path, 'w', newline='', encoding=self.config.file_encoding) as csvfile:
             writer = csv.writer(csvfile)
             
             # Cabeçalho
-            writer.writerow(['ID', 'Paciente ID', 'Médico ID', 'Data/Hora', 'Duração (min)', 'Status', 'Observações'])
+            writer.writerow(CABECALHO_RELATORIO)
             
             # Dados
-            for consulta in consultas:
-                writer.writerow([
-                    consulta.id,
-                    consulta.paciente_id,
-                    consulta.medico_id,
-                    consulta.data_hora.isoformat(),
-                    consulta.duracao_minutos,
-                    consulta.status.value,
-                    consulta.observacoes or ''
-                ])
+            for consulta in _acompanhar(consultas, progresso):
+                writer.writerow(linha_relatorio(consulta))
         
         logger.info(f"CSV gerado: {file_path}")
         return file_path
-    
-    def _gerar_excel(self, request: RelatorioRequest, consultas: list) -> Path:
-        """Gera relatório em Excel"""
-        from openpyxl import Workbook
-        
-        # Nome do arquivo
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"relatorio_{request.tipo.value}_{timestamp}.xlsx"
-        file_path = self.config.reports_dir / filename
-        
-        # Garante que diretório existe
-        file_path.parent.mkdir(parents=True, exist_ok=True)
-        
-        # Cria workbook
-        wb = Workbook()
-        ws = wb.active
-        ws.title = "Consultas"
-        
-        # Cabeçalho
-        ws.append(['ID', 'Paciente ID', 'Médico ID', 'Data/Hora', 'Duração (min)', 'Status', 'Observações'])
-        
-        # Dados
-        for consulta in consultas:
-            ws.append([
-                consulta.id,
-                consulta.paciente_id,
-                consulta.medico_id,
-                consulta.data_hora.strftime("%d/%m/%Y %H:%M"),
-                consulta.duracao_minutos,
-                consulta.status.value,
-                consulta.observacoes or ''
-            ])
-        
-        # Salva
-        wb.save(file_path)
-        
-        logger.info(f"Excel gerado: {file_path}")
-        return file_path
 
 
 # Singleton
@@ -0,0 +1,136 @@
+"""
+Benchmark da renderização de relatórios em PDF
+
+Compara a tabela em blocos (renderizar_pdf) com a tabela única usada
+antes, em um banco SQLite temporário com consultas sintéticas. Mede o
+tempo de renderização e o pico de memória (tracemalloc, em uma segunda
+execução para não distorcer o tempo), ambos normalizados por 10 mil linhas.
+
+Uso (a partir de backend/):
+    python benchmarks/bench_relatorio_pdf.py --linhas 5000 10000 20000
+    python benchmarks/bench_relatorio_pdf.py --linhas 50000 --sem-tabela-unica
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from pathlib import Path
+from uuid import uuid4
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from reportlab.lib.pagesizes import A4
+from reportlab.platypus import SimpleDocTemplate, Table
+from sqlalchemy import insert
+
+from app.infra.config import get_config
+from app.infra.database import Base, init_database, get_db_session
+from app.models.db_models import Consulta, Medico, Paciente, StatusConsulta
+from app.services.relatorio_render import (
+    _CABECALHO_PDF,
+    _ESTILO_TABELA_PDF,
+    _ler_consultas,
+    _linha_pdf,
+    renderizar_pdf
+)
+
+
+def popular_banco(database_url: str, linhas: int):
+    """Cria as tabelas e insere `linhas` consultas de um paciente/médico"""
+    engine = init_database(database_url)
+    Base.metadata.create_all(bind=engine)
+    
+    paciente_id = str(uuid4())
+    medico_id = str(uuid4())
+    inicio = datetime(2026, 1, 5, 8, 0)
+    status = list(StatusConsulta)
+    
+    with get_db_session() as db:
+        db.add(Paciente(
+            id=paciente_id, nome="Paciente Benchmark", cpf="000.000.000-00",
+            data_nascimento="1990-01-01", telefone="0", email="p@bench.local"
+        ))
+        db.add(Medico(
+            id=medico_id, nome="Médico Benchmark", crm="BENCH-1",
+            especialidade="Clínica Geral", telefone="0", email="m@bench.local"
+        ))
+        db.flush()
+        db.execute(insert(Consulta), [
+            {
+                "id": str(uuid4()),
+                "paciente_id": paciente_id,
+                "medico_id": medico_id,
+                "data_hora": inicio + timedelta(minutes=30 * i),
+                "duracao_minutos": 30,
+                "status": status[i % len(status)],
+                "observacoes": None
+            }
+            for i in range(linhas)
+        ])
+
+
+def renderizar_pdf_tabela_unica(caminho: str, database_url: str, tamanho_lote: int) -> int:
+    """Referência: uma única Table com todas as linhas e larguras automáticas"""
+    data = [_CABECALHO_PDF]
+    for linha in _ler_consultas(database_url, {}, tamanho_lote):
+        data.append(_linha_pdf(linha))
+    
+    table = Table(data)
+    table.setStyle(_ESTILO_TABELA_PDF)
+    SimpleDocTemplate(caminho, pagesize=A4).build([table])
+    return len(data) - 1
+
+
+def medir(renderizar, caminho: Path) -> tuple:
+    """Executa a renderização duas vezes: (segundos, pico de memória em MB)"""
+    inicio = time.perf_counter()
+    renderizar(str(caminho))
+    duracao = time.perf_counter() - inicio
+    
+    tracemalloc.start()
+    try:
+        renderizar(str(caminho))
+        _, pico = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return duracao, pico / 1024 / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--linhas", type=int, nargs="+", default=[5000, 10000, 20000])
+    parser.add_argument("--sem-tabela-unica", action="store_true", help="mede apenas a tabela em blocos")
+    args = parser.parse_args()
+    
+    config = get_config()
+    lote = config.relatorio_stream_lote
+    linhas_por_tabela = config.relatorio_pdf_linhas_por_tabela
+    
+    print(f"{'linhas':>8} {'modo':<14} {'tempo (s)':>10} {'s/10k':>8} {'pico (MB)':>10} {'MB/10k':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for linhas in args.linhas:
+            database_url = f"sqlite:///{Path(tmp) / f'bench_{linhas}.db'}"
+            popular_banco(database_url, linhas)
+            
+            modos = {
+                "blocos": lambda caminho: renderizar_pdf(
+                    caminho, "Geral", datetime.now(), database_url, {}, lote, linhas_por_tabela
+                )
+            }
+            if not args.sem_tabela_unica:
+                modos["tabela_unica"] = lambda caminho: renderizar_pdf_tabela_unica(caminho, database_url, lote)
+            
+            for modo, renderizar in modos.items():
+                duracao, pico = medir(renderizar, Path(tmp) / f"{modo}_{linhas}.pdf")
+                fator = 10_000 / linhas
+                print(
+                    f"{linhas:>8} {modo:<14} {duracao:>10.2f} {duracao * fator:>8.2f} "
+                    f"{pico:>10.1f} {pico * fator:>8.1f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
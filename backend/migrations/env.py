@@ -0,0 +1,61 @@
+"""
+Ambiente do Alembic
+
+Usa a mesma engine da aplicação (app.infra.database), incluindo os
+PRAGMAs de desempenho. Quando chamado por run_migrations(), reaproveita
+a conexão recebida em config.attributes["connection"].
+"""
+
+from logging.config import fileConfig
+
+from alembic import context
+
+from app.infra.database import Base, get_engine, get_database_url
+import app.models.db_models  # noqa: F401 - registra as tabelas no metadata
+
+config = context.config
+
+# Logging do alembic.ini apenas quando executado pela CLI
+if config.config_file_name is not None and "connection" not in config.attributes:
+    fileConfig(config.config_file_name, disable_existing_loggers=False)
+
+target_metadata = Base.metadata
+
+
+def run_migrations_offline():
+    """Gera o SQL das migrações sem conectar ao banco"""
+    context.configure(
+        url=get_database_url(),
+        target_metadata=target_metadata,
+        literal_binds=True,
+        render_as_batch=True,  # SQLite não suporta ALTER TABLE completo
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def _run_with_connection(connection):
+    context.configure(
+        connection=connection,
+        target_metadata=target_metadata,
+        render_as_batch=True,
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online():
+    """Aplica as migrações no banco"""
+    connection = config.attributes.get("connection")
+    if connection is not None:
+        _run_with_connection(connection)
+        return
+    
+    with get_engine().connect() as connection:
+        _run_with_connection(connection)
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
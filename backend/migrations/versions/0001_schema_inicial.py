@@ -0,0 +1,81 @@
+"""Schema inicial (equivalente ao antigo Base.metadata.create_all)
+
+Bancos criados antes das migrações já possuem estas tabelas e são
+marcados (stamp) nesta revisão por run_migrations().
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "usuarios",
+        sa.Column("id", sa.String(36), primary_key=True),
+        sa.Column("username", sa.String(200), nullable=False),
+        sa.Column("senha_hash", sa.String(64), nullable=False),
+        sa.Column("tipo", sa.Enum("ADMIN", "MEDICO", "PACIENTE", name="tipousuario"), nullable=False),
+        sa.Column("referencia_id", sa.String(36), nullable=True),
+        sa.Column("ativo", sa.Boolean(), nullable=False),
+    )
+    op.create_index("ix_usuarios_username", "usuarios", ["username"], unique=True)
+    
+    op.create_table(
+        "medicos",
+        sa.Column("id", sa.String(36), primary_key=True),
+        sa.Column("nome", sa.String(200), nullable=False),
+        sa.Column("crm", sa.String(20), nullable=False),
+        sa.Column("especialidade", sa.String(100), nullable=False),
+        sa.Column("telefone", sa.String(20), nullable=False),
+        sa.Column("email", sa.String(200), nullable=False),
+        sa.Column("ativo", sa.Boolean(), nullable=False),
+        sa.Column("horarios_atendimento", sa.Text(), nullable=True),
+    )
+    op.create_index("ix_medicos_crm", "medicos", ["crm"], unique=True)
+    
+    op.create_table(
+        "pacientes",
+        sa.Column("id", sa.String(36), primary_key=True),
+        sa.Column("nome", sa.String(200), nullable=False),
+        sa.Column("cpf", sa.String(14), nullable=False),
+        sa.Column("data_nascimento", sa.String(10), nullable=False),
+        sa.Column("telefone", sa.String(20), nullable=False),
+        sa.Column("email", sa.String(200), nullable=False),
+        sa.Column("ativo", sa.Boolean(), nullable=False),
+        sa.Column("endereco", sa.Text(), nullable=True),
+    )
+    op.create_index("ix_pacientes_cpf", "pacientes", ["cpf"], unique=True)
+    
+    op.create_table(
+        "consultas",
+        sa.Column("id", sa.String(36), primary_key=True),
+        sa.Column("paciente_id", sa.String(36), sa.ForeignKey("pacientes.id"), nullable=False),
+        sa.Column("medico_id", sa.String(36), sa.ForeignKey("medicos.id"), nullable=False),
+        sa.Column("data_hora", sa.DateTime(), nullable=False),
+        sa.Column("duracao_minutos", sa.Integer(), nullable=False),
+        sa.Column(
+            "status",
+            sa.Enum("AGENDADA", "CONFIRMADA", "REALIZADA", "CANCELADA", name="statusconsulta"),
+            nullable=False,
+        ),
+        sa.Column("observacoes", sa.Text(), nullable=True),
+    )
+    op.create_index("ix_consultas_paciente_id", "consultas", ["paciente_id"])
+    op.create_index("ix_consultas_medico_id", "consultas", ["medico_id"])
+    op.create_index("ix_consultas_data_hora", "consultas", ["data_hora"])
+
+
+def downgrade():
+    op.drop_table("consultas")
+    op.drop_table("pacientes")
+    op.drop_table("medicos")
+    op.drop_table("usuarios")
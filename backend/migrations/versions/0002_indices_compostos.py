@@ -0,0 +1,38 @@
+"""Índices compostos para os caminhos de acesso de consultas
+
+- (medico_id, data_hora): conflitos e horários disponíveis (find_by_medico_data)
+- (paciente_id, data_hora): histórico do paciente
+- (status, data_hora): consultas agendadas / relatórios por status
+
+Os índices simples de medico_id e paciente_id passam a ser prefixo dos
+compostos e são removidos (menos escrita por INSERT).
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index("ix_consultas_medico_data_hora", "consultas", ["medico_id", "data_hora"])
+    op.create_index("ix_consultas_paciente_data_hora", "consultas", ["paciente_id", "data_hora"])
+    op.create_index("ix_consultas_status_data_hora", "consultas", ["status", "data_hora"])
+    op.drop_index("ix_consultas_medico_id", table_name="consultas")
+    op.drop_index("ix_consultas_paciente_id", table_name="consultas")
+    # Atualiza estatísticas para o planner escolher os novos índices
+    op.execute("ANALYZE consultas")
+
+
+def downgrade():
+    op.create_index("ix_consultas_paciente_id", "consultas", ["paciente_id"])
+    op.create_index("ix_consultas_medico_id", "consultas", ["medico_id"])
+    op.drop_index("ix_consultas_status_data_hora", table_name="consultas")
+    op.drop_index("ix_consultas_paciente_data_hora", table_name="consultas")
+    op.drop_index("ix_consultas_medico_data_hora", table_name="consultas")
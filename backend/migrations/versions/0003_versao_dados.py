@@ -0,0 +1,41 @@
+"""Contador de versão dos dados de consultas
+
+Tabela versao_dados com uma linha por tabela monitorada e triggers que a
+incrementam a cada INSERT/UPDATE/DELETE em consultas. O cache de
+relatórios usa a versão na chave: qualquer escrita (API, scripts,
+processos do pool) invalida os relatórios gerados antes dela.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+_OPERACOES = ("INSERT", "UPDATE", "DELETE")
+
+
+def upgrade():
+    op.create_table(
+        "versao_dados",
+        sa.Column("nome", sa.String(50), primary_key=True),
+        sa.Column("versao", sa.Integer(), nullable=False),
+    )
+    op.execute("INSERT INTO versao_dados (nome, versao) VALUES ('consultas', 0)")
+    for operacao in _OPERACOES:
+        op.execute(
+            f"CREATE TRIGGER trg_consultas_versao_{operacao.lower()} AFTER {operacao} ON consultas "
+            "BEGIN UPDATE versao_dados SET versao = versao + 1 WHERE nome = 'consultas'; END"
+        )
+
+
+def downgrade():
+    for operacao in _OPERACOES:
+        op.execute(f"DROP TRIGGER IF EXISTS trg_consultas_versao_{operacao.lower()}")
+    op.drop_table("versao_dados")
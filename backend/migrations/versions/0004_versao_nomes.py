@@ -0,0 +1,35 @@
+"""Versão dos dados: nomes de pacientes e médicos
+
+Os relatórios passam a trazer nome do paciente, nome e especialidade do
+médico. Alterar esses campos incrementa os contadores 'pacientes' e
+'medicos' de versao_dados, invalidando os relatórios em cache.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute("INSERT INTO versao_dados (nome, versao) VALUES ('pacientes', 0), ('medicos', 0)")
+    op.execute(
+        "CREATE TRIGGER trg_pacientes_versao_nome AFTER UPDATE OF nome ON pacientes "
+        "BEGIN UPDATE versao_dados SET versao = versao + 1 WHERE nome = 'pacientes'; END"
+    )
+    op.execute(
+        "CREATE TRIGGER trg_medicos_versao_nome AFTER UPDATE OF nome, especialidade ON medicos "
+        "BEGIN UPDATE versao_dados SET versao = versao + 1 WHERE nome = 'medicos'; END"
+    )
+
+
+def downgrade():
+    op.execute("DROP TRIGGER IF EXISTS trg_medicos_versao_nome")
+    op.execute("DROP TRIGGER IF EXISTS trg_pacientes_versao_nome")
+    op.execute("DELETE FROM versao_dados WHERE nome IN ('pacientes', 'medicos')")
@@ -0,0 +1,47 @@
+"""Jobs de relatório compartilhados entre workers
+
+Status, progresso, heartbeat e pedido de cancelamento dos jobs ficam no
+banco: qualquer worker atende GET/cancelar de um job e o limite de jobs
+ativos passa a ser global.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "relatorio_jobs",
+        sa.Column("id", sa.String(36), primary_key=True),
+        sa.Column("tipo", sa.String(20), nullable=False),
+        sa.Column("formato", sa.String(10), nullable=False),
+        sa.Column("parametros", sa.Text(), nullable=False),
+        sa.Column("status", sa.String(20), nullable=False),
+        sa.Column("progresso", sa.Float(), nullable=False),
+        sa.Column("etapa", sa.String(100), nullable=True),
+        sa.Column("erro", sa.Text(), nullable=True),
+        sa.Column("resultado_json", sa.Text(), nullable=True),
+        sa.Column("cancelar", sa.Boolean(), nullable=False),
+        sa.Column("worker", sa.String(100), nullable=False),
+        sa.Column("criado_em", sa.DateTime(), nullable=False),
+        sa.Column("iniciado_em", sa.DateTime(), nullable=True),
+        sa.Column("finalizado_em", sa.DateTime(), nullable=True),
+        sa.Column("atualizado_em", sa.DateTime(), nullable=False),
+    )
+    op.create_index("ix_relatorio_jobs_status", "relatorio_jobs", ["status"])
+    op.create_index("ix_relatorio_jobs_criado_em", "relatorio_jobs", ["criado_em"])
+
+
+def downgrade():
+    op.drop_index("ix_relatorio_jobs_criado_em", table_name="relatorio_jobs")
+    op.drop_index("ix_relatorio_jobs_status", table_name="relatorio_jobs")
+    op.drop_table("relatorio_jobs")
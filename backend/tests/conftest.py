@@ -0,0 +1,37 @@
+"""
+Configuração dos testes
+
+Diretórios de dados, relatórios e o banco SQLite ficam em uma pasta
+temporária: HOME é redirecionado antes de importar a aplicação e o
+caminho do banco é trocado antes do startup.
+"""
+
+import os
+import tempfile
+from pathlib import Path
+
+import pytest
+
+_TMP = Path(tempfile.mkdtemp(prefix="agendamento-testes-"))
+os.environ["HOME"] = str(_TMP)
+os.environ["LOCALAPPDATA"] = str(_TMP)
+
+import app.infra.database as database  # noqa: E402
+
+database.get_database_path = lambda: _TMP / "database.db"
+
+
+@pytest.fixture(scope="session")
+def client():
+    """Cliente HTTP com o ciclo de vida completo da aplicação (startup/shutdown)"""
+    from fastapi.testclient import TestClient
+    from app.main import app
+    
+    with TestClient(app) as cliente:
+        yield cliente
+
+
+@pytest.fixture
+def anyio_backend():
+    """Testes assíncronos (pytest.mark.anyio) rodam no asyncio"""
+    return "asyncio"
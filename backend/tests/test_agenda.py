@@ -0,0 +1,140 @@
+"""Grade de atendimento e horários disponíveis"""
+
+import random
+from datetime import date, timedelta
+
+from sqlalchemy import update
+
+from app.infra.database import get_engine
+from app.models.db_models import Consulta, StatusConsulta
+from app.repositories.consulta_repository import ConsultaRepository
+
+
+
+def _proxima_segunda() -> date:
+    """Segunda-feira com pelo menos 2 dias de antecedência"""
+    dia = date.today() + timedelta(days=2)
+    return dia + timedelta(days=(7 - dia.weekday()) % 7)
+
+
+def _criar_medico(client, horarios_atendimento=None) -> str:
+    dados = {
+        "nome": "Dra Teste",
+        "crm": f"CRM{random.randrange(10**6):06d}",
+        "especialidade": "Clínica Geral",
+        "telefone": "11999999999",
+        "email": "medico@teste.com"
+    }
+    if horarios_atendimento is not None:
+        dados["horarios_atendimento"] = horarios_atendimento
+    resposta = client.post("/api/v1/medicos", json=dados)
+    assert resposta.status_code == 201, resposta.text
+    return resposta.json()["medico"]["id"]
+
+
+def _criar_paciente(client) -> str:
+    resposta = client.post("/api/v1/pacientes", json={
+        "nome": "Paciente Teste",
+        "cpf": f"{random.randrange(10**11):011d}",
+        "data_nascimento": "1990-01-01",
+        "telefone": "11999999999",
+        "email": "paciente@teste.com",
+        "endereco": {
+            "rua": "Rua A", "numero": "1", "bairro": "Centro",
+            "cidade": "São Paulo", "estado": "SP", "cep": "01001000"
+        }
+    })
+    assert resposta.status_code == 201, resposta.text
+    return resposta.json()["paciente"]["id"]
+
+
+def test_grade_fora_da_divisao_de_slots(client):
+    """08:15-12:15 oferece só os slots inteiros: 08:30 a 11:30"""
+    segunda = _proxima_segunda()
+    medico_id = _criar_medico(client, [
+        {"dia_semana": 1, "horario_inicio": "08:15", "horario_fim": "12:15"}
+    ])
+    paciente_id = _criar_paciente(client)
+    
+    resposta = client.get(f"/api/v1/consultas/horarios-disponiveis/{medico_id}/{segunda}")
+    assert resposta.status_code == 200
+    assert resposta.json() == ["08:30", "09:00", "09:30", "10:00", "10:30", "11:00", "11:30"]
+    
+    for horario, esperado in (("08:00", 400), ("12:00", 400), ("08:30", 201)):
+        resposta = client.post("/api/v1/consultas", json={
+            "paciente_id": paciente_id,
+            "medico_id": medico_id,
+            "data_hora": f"{segunda}T{horario}:00",
+            "duracao_minutos": 30
+        })
+        assert resposta.status_code == esperado, (horario, resposta.text)
+
+
+def test_consulta_que_atravessa_a_meia_noite(client):
+    """Consulta às 23:30 de 60 minutos ocupa 00:00 do dia seguinte nas duas buscas"""
+    segunda = _proxima_segunda()
+    terca = segunda + timedelta(days=1)
+    medico_id = _criar_medico(client, [
+        {"dia_semana": 1, "horario_inicio": "22:00", "horario_fim": "24:00"},
+        {"dia_semana": 2, "horario_inicio": "00:00", "horario_fim": "02:00"}
+    ])
+    paciente_id = _criar_paciente(client)
+    
+    resposta = client.post("/api/v1/consultas", json={
+        "paciente_id": paciente_id,
+        "medico_id": medico_id,
+        "data_hora": f"{segunda}T23:30:00",
+        "duracao_minutos": 60
+    })
+    assert resposta.status_code == 201, resposta.text
+    
+    esperado = ["00:30", "01:00", "01:30"]
+    resposta = client.get(f"/api/v1/consultas/horarios-disponiveis/{medico_id}/{terca}")
+    assert resposta.status_code == 200
+    assert resposta.json() == esperado
+    
+    resposta = client.get("/api/v1/consultas/horarios-disponiveis", params={
+        "data_inicio": terca.isoformat(),
+        "data_fim": terca.isoformat(),
+        "medico_ids": [medico_id]
+    })
+    assert resposta.status_code == 200
+    assert resposta.json()[0]["horarios"] == {terca.isoformat(): esperado}
+
+
+def test_conflito_do_indice_nao_abre_a_transacao(client, monkeypatch):
+    """Conflito conhecido pelo índice é rejeitado sem agendar; índice desatualizado não rejeita"""
+    segunda = _proxima_segunda()
+    medico_id = _criar_medico(client)
+    paciente_id = _criar_paciente(client)
+    dados = {
+        "paciente_id": paciente_id,
+        "medico_id": medico_id,
+        "data_hora": f"{segunda}T10:00:00",
+        "duracao_minutos": 30
+    }
+    resposta = client.post("/api/v1/consultas", json=dados)
+    assert resposta.status_code == 201, resposta.text
+    consulta_id = resposta.json()["id"]
+    
+    chamadas = []
+    agendar = ConsultaRepository.agendar
+    
+    async def agendar_contando(self, consulta):
+        chamadas.append(consulta.data_hora)
+        return await agendar(self, consulta)
+    
+    monkeypatch.setattr(ConsultaRepository, "agendar", agendar_contando)
+    
+    resposta = client.post("/api/v1/consultas", json=dados)
+    assert resposta.status_code == 409
+    assert chamadas == []
+    
+    # Cancelada por fora do service (como por outro worker): o índice ainda a tem
+    with get_engine().begin() as conn:
+        conn.execute(
+            update(Consulta).where(Consulta.id == consulta_id).values(status=StatusConsulta.CANCELADA)
+        )
+    resposta = client.post("/api/v1/consultas", json=dados)
+    assert resposta.status_code == 201, resposta.text
+    assert len(chamadas) == 1
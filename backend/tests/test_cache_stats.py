@@ -0,0 +1,49 @@
+"""Estatísticas do cache com escritas concorrentes no event loop"""
+
+import asyncio
+import sys
+
+import httpx
+import pytest
+
+from app.main import app
+from app.services.cache_service import get_cache_service
+
+
+@pytest.mark.anyio
+async def test_stats_durante_escritas():
+    """
+    O endpoint roda no event loop, como as escritas: percorrer as
+    estruturas do backend nunca encontra uma alteração no meio
+    """
+    cache = get_cache_service()
+    parar = asyncio.Event()
+    for i in range(5000):
+        cache.set(f"medico:teste-{i}", {"id": i})
+    
+    async def escrever():
+        i = 0
+        while not parar.is_set():
+            for _ in range(50):
+                cache.set(f"medico:teste-{i % 10000}", {"id": i})
+                cache.delete(f"medico:teste-{(i + 5000) % 10000}")
+                i += 1
+            await asyncio.sleep(0)
+    
+    # Trocas de thread frequentes: uma leitura fora do loop seria
+    # interrompida no meio da iteração
+    intervalo = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    escritor = asyncio.create_task(escrever())
+    try:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://teste") as cliente:
+            for _ in range(200):
+                resposta = await cliente.get("/api/v1/sistema/cache/stats")
+                assert resposta.status_code == 200
+                assert resposta.json()["backend"] == cache.backend.nome
+    finally:
+        sys.setswitchinterval(intervalo)
+        parar.set()
+        await escritor
+        cache.clear()
@@ -0,0 +1,62 @@
+"""Carregadores em lote com cache"""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from app.services.cache_service import get_cache_service
+from app.services.carregadores import _com_cache, chave_medico, invalidar_medico
+
+
+@pytest.mark.anyio
+async def test_invalidacao_durante_carga_em_lote():
+    """O médico lido antes da invalidação é entregue, mas não volta ao cache"""
+    cache = get_cache_service()
+    lendo = asyncio.Event()
+    liberar = asyncio.Event()
+    
+    async def buscar_lote(ids):
+        lendo.set()
+        await liberar.wait()
+        return [SimpleNamespace(id=medico_id, ativo=True) for medico_id in ids]
+    
+    carregar = _com_cache(chave_medico, buscar_lote)
+    carga = asyncio.create_task(carregar(["m-invalidado", "m-intacto"]))
+    await lendo.wait()
+    invalidar_medico("m-invalidado")
+    liberar.set()
+    
+    itens = await carga
+    assert sorted(item.id for item in itens) == ["m-intacto", "m-invalidado"]
+    assert await cache.get(chave_medico("m-invalidado")) is None
+    assert (await cache.get(chave_medico("m-intacto"))).id == "m-intacto"
+    cache.delete(chave_medico("m-intacto"))
+
+
+@pytest.mark.anyio
+async def test_carga_em_lote_compartilhada_com_get_or_load():
+    """get_or_load concorrente aguarda o lote em vez de repetir a busca"""
+    cache = get_cache_service()
+    chamadas = []
+    liberar = asyncio.Event()
+    
+    async def buscar_lote(ids):
+        chamadas.append(list(ids))
+        await liberar.wait()
+        return [SimpleNamespace(id=medico_id) for medico_id in ids]
+    
+    async def buscar_um():
+        chamadas.append(["avulso"])
+        return SimpleNamespace(id="m-compartilhado")
+    
+    carga = asyncio.create_task(_com_cache(chave_medico, buscar_lote)(["m-compartilhado"]))
+    await asyncio.sleep(0)
+    avulso = asyncio.create_task(cache.get_or_load(chave_medico("m-compartilhado"), buscar_um))
+    await asyncio.sleep(0)
+    liberar.set()
+    
+    await carga
+    assert (await avulso).id == "m-compartilhado"
+    assert chamadas == [["m-compartilhado"]]
+    cache.delete(chave_medico("m-compartilhado"))
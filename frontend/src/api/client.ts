@@ -39,4 +39,19 @@ apiClient.interceptors.response.use(
   }
 )
 
+// Percorre todas as páginas de uma listagem paginada por cursor (X-Next-Cursor)
+export async function listarTodasPaginas<T>(
+  url: string,
+  params: Record<string, unknown> = {}
+): Promise<T[]> {
+  const itens: T[] = []
+  let after: string | undefined
+  do {
+    const response = await apiClient.get<T[]>(url, { params: { ...params, after } })
+    itens.push(...response.data)
+    after = response.headers['x-next-cursor'] || undefined
+  } while (after)
+  return itens
+}
+
 export default apiClient
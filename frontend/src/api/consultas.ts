@@ -1,4 +1,4 @@
-import apiClient from './client'
+import apiClient, { listarTodasPaginas } from './client'
 import { Consulta, ConsultaDetalhada, ConsultaCreate, ConsultaUpdate } from '../types/consulta'
 
 export const consultasApi = {
@@ -7,14 +7,21 @@ export const consultasApi = {
     pacienteId?: string,
     medicoId?: string
   ): Promise<Consulta[]> => {
-    const response = await apiClient.get('/consultas', {
-      params: {
-        apenas_agendadas: apenasAgendadas,
-        paciente_id: pacienteId,
-        medico_id: medicoId
-      }
+    return listarTodasPaginas<Consulta>('/consultas', {
+      apenas_agendadas: apenasAgendadas,
+      paciente_id: pacienteId,
+      medico_id: medicoId
+    })
+  },
+
+  listarDetalhadas: async (
+    pacienteId?: string,
+    medicoId?: string
+  ): Promise<ConsultaDetalhada[]> => {
+    return listarTodasPaginas<ConsultaDetalhada>('/consultas/detalhadas', {
+      paciente_id: pacienteId,
+      medico_id: medicoId
     })
-    return response.data
   },
 
   buscar: async (id: string): Promise<ConsultaDetalhada> => {
@@ -1,15 +1,12 @@
-import apiClient from './client'
+import apiClient, { listarTodasPaginas } from './client'
 import { Medico, MedicoCreate, MedicoUpdate } from '../types/medico'
 
 export const medicosApi = {
   listar: async (apenasAtivos: boolean = true, especialidade?: string): Promise<Medico[]> => {
-    const response = await apiClient.get('/medicos', {
-      params: { 
-        apenas_ativos: apenasAtivos,
-        especialidade 
-      }
+    return listarTodasPaginas<Medico>('/medicos', {
+      apenas_ativos: apenasAtivos,
+      especialidade
     })
-    return response.data
   },
 
   buscar: async (id: string): Promise<Medico> => {
@@ -1,12 +1,9 @@
-import apiClient from './client'
+import apiClient, { listarTodasPaginas } from './client'
 import { Paciente, PacienteCreate, PacienteUpdate } from '../types/paciente'
 
 export const pacientesApi = {
   listar: async (apenasAtivos: boolean = true): Promise<Paciente[]> => {
-    const response = await apiClient.get('/pacientes', {
-      params: { apenas_ativos: apenasAtivos }
-    })
-    return response.data
+    return listarTodasPaginas<Paciente>('/pacientes', { apenas_ativos: apenasAtivos })
   },
 
   buscar: async (id: string): Promise<Paciente> => {
@@ -1,14 +1,59 @@
 import apiClient from './client'
-import { RelatorioRequest, RelatorioResponse } from '../types/relatorio'
+import { RelatorioRequest, RelatorioJob, StatusJobRelatorio } from '../types/relatorio'
+
+const INTERVALO_POLLING_MS = 1000
+
+const STATUS_FINAIS = [
+  StatusJobRelatorio.CONCLUIDO,
+  StatusJobRelatorio.FALHOU,
+  StatusJobRelatorio.CANCELADO
+]
 
 export const relatoriosApi = {
-  gerar: async (request: RelatorioRequest): Promise<RelatorioResponse> => {
+  // Enfileira a geração; o arquivo fica pronto quando o job conclui
+  gerar: async (request: RelatorioRequest): Promise<RelatorioJob> => {
     const response = await apiClient.post('/relatorios/gerar', request)
     return response.data
   },
 
+  status: async (jobId: string): Promise<RelatorioJob> => {
+    const response = await apiClient.get(`/relatorios/jobs/${jobId}`)
+    return response.data
+  },
+
+  cancelar: async (jobId: string): Promise<RelatorioJob> => {
+    const response = await apiClient.post(`/relatorios/jobs/${jobId}/cancelar`)
+    return response.data
+  },
+
+  // Consulta o job até finalizar, repassando cada estado intermediário
+  aguardar: async (
+    jobId: string,
+    onProgresso?: (job: RelatorioJob) => void
+  ): Promise<RelatorioJob> => {
+    for (;;) {
+      const job = await relatoriosApi.status(jobId)
+      onProgresso?.(job)
+      if (STATUS_FINAIS.includes(job.status)) {
+        return job
+      }
+      await new Promise(resolve => setTimeout(resolve, INTERVALO_POLLING_MS))
+    }
+  },
+
   download: (arquivo: string): string => {
     const baseUrl = apiClient.defaults.baseURL?.replace('/api/v1', '') || 'http://localhost:8000'
     return `${baseUrl}/api/v1/relatorios/download/${arquivo}`
+  },
+
+  // CSV enviado em fluxo pelo servidor, sem job nem arquivo intermediário
+  exportarCsv: (request: RelatorioRequest): string => {
+    const baseUrl = apiClient.defaults.baseURL?.replace('/api/v1', '') || 'http://localhost:8000'
+    const params = new URLSearchParams({ tipo: request.tipo })
+    if (request.paciente_id) params.set('paciente_id', request.paciente_id)
+    if (request.medico_id) params.set('medico_id', request.medico_id)
+    if (request.data_inicio) params.set('data_inicio', request.data_inicio)
+    if (request.data_fim) params.set('data_fim', request.data_fim)
+    return `${baseUrl}/api/v1/relatorios/exportar/csv?${params}`
   }
 }
@@ -31,17 +31,12 @@ export default function AgendaPage() {
   const carregarDados = async () => {
     try {
       setLoading(true)
-      const [consultasData, pacientesData, medicosData] = await Promise.all([
-        consultasApi.listar(),
+      const [consultasDetalhadas, pacientesData, medicosData] = await Promise.all([
+        consultasApi.listarDetalhadas(),
         pacientesApi.listar(),
         medicosApi.listar()
       ])
       
-      // Buscar detalhes de cada consulta
-      const consultasDetalhadas = await Promise.all(
-        consultasData.map(c => consultasApi.buscar(c.id))
-      )
-      
       setConsultas(consultasDetalhadas)
       setPacientes(pacientesData)
       setMedicos(medicosData)
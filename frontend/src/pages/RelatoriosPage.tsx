@@ -3,7 +3,7 @@ import Layout from '../components/common/Layout'
 import { relatoriosApi } from '../api/relatorios'
 import { pacientesApi } from '../api/pacientes'
 import { medicosApi } from '../api/medicos'
-import { TipoRelatorio, FormatoRelatorio, RelatorioRequest } from '../types/relatorio'
+import { TipoRelatorio, FormatoRelatorio, RelatorioRequest, RelatorioJob, StatusJobRelatorio } from '../types/relatorio'
 import { Paciente } from '../types/paciente'
 import { Medico } from '../types/medico'
 
@@ -17,6 +17,7 @@ export default function RelatoriosPage() {
   const [loading, setLoading] = useState(false)
   const [error, setError] = useState('')
   const [success, setSuccess] = useState('')
+  const [job, setJob] = useState<RelatorioJob | null>(null)
   
   useEffect(() => {
     carregarDados()
@@ -41,18 +42,50 @@ export default function RelatoriosPage() {
     setError('')
     setSuccess('')
     
+    if (formData.formato === FormatoRelatorio.CSV) {
+      // CSV em fluxo: o download começa imediatamente
+      window.open(relatoriosApi.exportarCsv(formData), '_blank')
+      setSuccess('Exportação CSV iniciada')
+      setLoading(false)
+      return
+    }
+    
     try {
-      const response = await relatoriosApi.gerar(formData)
-      const downloadUrl = relatoriosApi.download(response.arquivo)
-      
-      // Abre em nova aba para download
-      window.open(downloadUrl, '_blank')
+      // Enfileira e acompanha o job até finalizar
+      const enfileirado = await relatoriosApi.gerar(formData)
+      setJob(enfileirado)
+      const finalizado = await relatoriosApi.aguardar(enfileirado.id, setJob)
       
-      setSuccess(`Relatório gerado com sucesso: ${response.arquivo}`)
+      if (finalizado.status === StatusJobRelatorio.CONCLUIDO && finalizado.resultado) {
+        const downloadUrl = relatoriosApi.download(finalizado.resultado.arquivo)
+        
+        // Abre em nova aba para download
+        window.open(downloadUrl, '_blank')
+        
+        setSuccess(
+          finalizado.resultado.reaproveitado
+            ? `Relatório reaproveitado (dados inalterados): ${finalizado.resultado.arquivo}`
+            : `Relatório gerado com sucesso: ${finalizado.resultado.arquivo}`
+        )
+      } else if (finalizado.status === StatusJobRelatorio.CANCELADO) {
+        setError('Geração do relatório cancelada')
+      } else {
+        setError(finalizado.erro || 'Erro ao gerar relatório')
+      }
     } catch (err: any) {
       setError(err.response?.data?.detail || 'Erro ao gerar relatório')
     } finally {
       setLoading(false)
+      setJob(null)
+    }
+  }
+  
+  const handleCancelar = async () => {
+    if (!job) return
+    try {
+      await relatoriosApi.cancelar(job.id)
+    } catch (err: any) {
+      setError(err.response?.data?.detail || 'Erro ao cancelar relatório')
     }
   }
   
@@ -156,8 +189,21 @@ export default function RelatoriosPage() {
             style={{ width: '100%' }}
             disabled={loading}
           >
-            {loading ? 'Gerando...' : 'Gerar Relatório'}
+            {loading
+              ? `Gerando... ${Math.round((job?.progresso ?? 0) * 100)}%${job?.etapa ? ` (${job.etapa})` : ''}`
+              : 'Gerar Relatório'}
           </button>
+          
+          {job && (
+            <button 
+              type="button" 
+              className="button button-danger" 
+              style={{ width: '100%', marginTop: '10px' }}
+              onClick={handleCancelar}
+            >
+              Cancelar
+            </button>
+          )}
         </form>
       </div>
     </Layout>
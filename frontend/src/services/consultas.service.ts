@@ -1,10 +1,9 @@
-import apiClient from '../api/client';
+import apiClient, { listarTodasPaginas } from '../api/client';
 import { Consulta, CreateConsultaDTO, UpdateConsultaDTO, HorarioDisponivel } from '../types/consulta.types';
 
 export const consultasService = {
   async getAll(): Promise<Consulta[]> {
-    const response = await apiClient.get<Consulta[]>('/consultas');
-    return response.data;
+    return listarTodasPaginas<Consulta>('/consultas');
   },
 
   async getById(id: string): Promise<Consulta> {
@@ -1,10 +1,9 @@
-import apiClient from '../api/client';
+import apiClient, { listarTodasPaginas } from '../api/client';
 import { Medico, CreateMedicoDTO, UpdateMedicoDTO } from '../types/medico.types';
 
 export const medicosService = {
   async getAll(): Promise<Medico[]> {
-    const response = await apiClient.get<Medico[]>('/medicos');
-    return response.data;
+    return listarTodasPaginas<Medico>('/medicos');
   },
 
   async getById(id: string): Promise<Medico> {
@@ -1,10 +1,9 @@
-import apiClient from '../api/client';
+import apiClient, { listarTodasPaginas } from '../api/client';
 import { Paciente, CreatePacienteDTO, UpdatePacienteDTO } from '../types/paciente.types';
 
 export const pacientesService = {
   async getAll(): Promise<Paciente[]> {
-    const response = await apiClient.get<Paciente[]>('/pacientes');
-    return response.data;
+    return listarTodasPaginas<Paciente>('/pacientes');
   },
 
   async getById(id: string): Promise<Paciente> {
@@ -27,4 +27,27 @@ export interface RelatorioResponse {
   formato: FormatoRelatorio
   data_geracao: string
   tamanho_bytes: number
+  reaproveitado: boolean
+}
+
+export enum StatusJobRelatorio {
+  PENDENTE = 'pendente',
+  EXECUTANDO = 'executando',
+  CONCLUIDO = 'concluido',
+  FALHOU = 'falhou',
+  CANCELADO = 'cancelado'
+}
+
+export interface RelatorioJob {
+  id: string
+  status: StatusJobRelatorio
+  progresso: number
+  etapa?: string | null
+  tipo: TipoRelatorio
+  formato: FormatoRelatorio
+  criado_em: string
+  iniciado_em?: string | null
+  finalizado_em?: string | null
+  erro?: string | null
+  resultado?: RelatorioResponse | null
 }